@@ -1,6 +1,11 @@
 import sys
 import os
-from basic import run
+import io
+import glob
+import time
+import contextlib
+import basic
+from basic import run_file
 
 # Add these constants at the top of your file
 VERSION = "1.0"  # Update this with your actual version
@@ -11,6 +16,15 @@ Options:
   --version      Show version information
   --help         Show this help message
   --examples     Show example scripts
+  --batch <dir>  Run every .jhay file in <dir>
+  --jobs <n>     Worker processes for --batch (default: one per CPU)
+  --optimize     Fold constant expressions and drop dead code before running
+
+Environment:
+  JHAYSCRIPT_CACHE_DIR  Keep parsed scripts in this directory between runs.
+                        It must belong to you and not be writable by others;
+                        the same goes for the <filename>c files written
+                        next to scripts. Files that fail this are ignored.
 """
 
 def show_version():
@@ -30,31 +44,111 @@ def show_examples():
     echo "Sum: {a + b}"
     """)
 
-def run_script(filename):
+def run_script(filename, optimize=False):
+    # Reuses the compiled <filename>c written by an earlier run when fresh.
+    # Returns the exit status: 0 on success, 1 on an error
+    basic.module_registry.optimize = optimize
     try:
-        with open(filename, 'r') as f:
-            script = f.read()
+        result, error = run_file(filename, optimize=optimize)
     except FileNotFoundError:
         print(f"Error: File '{filename}' not found")
-        return
-    
-    result, error = run(filename, script)
+        return 1
     
     if error:
         print(error.as_string())
+        return 1
     elif result:
         if isinstance(result, (list, tuple)):
             print('\n'.join(map(str, result)))
         else:
             print(result)
+    return 0
+
+# Batch mode runs each script in a long-lived worker process that loaded
+# the interpreter and its builtins once. Scripts still start from the same
+# globals, module state and (empty) task queue as a fresh process would.
+# The workers are not daemonic, so a script can use parallel_map.
+builtin_symbols = None
+optimize_scripts = False
+
+def init_batch_worker(optimize):
+    global builtin_symbols, optimize_scripts
+    builtin_symbols = dict(basic.global_symbol_table.symbols)
+    optimize_scripts = optimize
+
+def run_batch_file(filename):
+    basic.global_symbol_table.symbols = dict(builtin_symbols)
+    basic.module_registry.clear()
+    # Tasks an earlier script left behind when it failed
+    basic.event_loop.cancel_pending()
+
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        try:
+            status = run_script(filename, optimize_scripts)
+        except Exception as e:
+            print(f"Internal error: {type(e).__name__}: {e}")
+            status = 2
+    return filename, status, output.getvalue(), time.perf_counter() - start
+
+def run_batch(directory, jobs, optimize=False):
+    from concurrent.futures import ProcessPoolExecutor
+
+    filenames = sorted(glob.glob(os.path.join(directory, '*.jhay')))
+    if not filenames:
+        print(f"Error: No .jhay files in '{directory}'")
+        return 1
+
+    start = time.perf_counter()
+    failed = 0
+    script_time = 0
+    with ProcessPoolExecutor(jobs, initializer=init_batch_worker, initargs=(optimize,)) as pool:
+        for filename, status, output, elapsed in pool.map(run_batch_file, filenames):
+            label = "ok" if status == 0 else f"FAILED ({status})"
+            print(f"=== {filename}: {label} in {elapsed:.3f}s")
+            if output:
+                print(output, end='' if output.endswith('\n') else '\n')
+            failed += status != 0
+            script_time += elapsed
+    wall_time = time.perf_counter() - start
+
+    print(f"{len(filenames)} scripts, {len(filenames) - failed} ok, {failed} failed")
+    print(f"{wall_time:.2f}s wall time, {script_time:.2f}s in scripts, {jobs} jobs")
+    return 1 if failed else 0
 
 def main():
     if len(sys.argv) < 2:
         show_help()
         return
     
+    # --optimize combines with running a file or a batch
+    args = sys.argv[1:]
+    optimize = '--optimize' in args
+    if optimize:
+        args.remove('--optimize')
+        if not args:
+            show_help()
+            return
+
     # Handle command-line options
-    first_arg = sys.argv[1]
+    first_arg = args[0]
+    if first_arg == '--batch':
+        args = args[1:]
+        jobs = os.cpu_count() or 1
+        if '--jobs' in args:
+            index = args.index('--jobs')
+            try:
+                jobs = int(args[index + 1])
+            except (IndexError, ValueError):
+                show_help()
+                return
+            del args[index:index + 2]
+        if len(args) != 1 or jobs < 1:
+            show_help()
+            return
+        sys.exit(run_batch(args[0], jobs, optimize))
+
     if first_arg.startswith('--'):
         {
             '--version': show_version,
@@ -64,8 +158,8 @@ def main():
         return
     
     # If not a flag, treat as filename
-    filename = sys.argv[1]
-    run_script(filename)
+    filename = first_arg
+    run_script(filename, optimize)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -6,11 +6,30 @@ from strings_with_arrows import *
 
 import string
 import os
+import re
 import math
+import operator
 import random
-import threading
-import asyncio
 import atexit
+import time
+import hashlib
+import pickle
+import gc
+import struct
+import shutil
+import tempfile
+from collections import OrderedDict
+from bisect import bisect_right
+from array import array
+from itertools import repeat, accumulate, islice
+
+# asyncio is only imported once a script uses async features (EventLoop.loop)
+asyncio = None
+# multiprocessing is only imported by the first parallel_map (WorkerPool)
+multiprocessing = None
+# numpy is optional, and only imported by the first vec_* builtin
+# (load_numpy). False once an import has failed.
+numpy = None
 
 
 
@@ -26,7 +45,7 @@ LETTERS_DIGITS = LETTERS + DIGITS
 # ERRORS
 #######################################
 
-class Error:
+class Error(Exception):
   def __init__(self, pos_start, pos_end, error_name, details):
     self.pos_start = pos_start
     self.pos_end = pos_end
@@ -79,25 +98,48 @@ class RTError(Error):
 #######################################
 
 class Position:
-  def __init__(self, idx, ln, col, fn, ftxt):
-    self.idx = idx
-    self.ln = ln
-    self.col = col
-    self.fn = fn
-    self.ftxt = ftxt
-
-  def advance(self, current_char=None):
-    self.idx += 1
-    self.col += 1
-
-    if current_char == '\n':
-      self.ln += 1
-      self.col = 0
+  # An offset into a Source. The line and column are only worked out, from
+  # the source's line starts, the first time something reads them. An end
+  # position sits one column past the character before it, so a span that
+  # ends with a newline still ends on that newline's line.
+  __slots__ = ('idx', 'source', 'is_end', '_ln', '_col')
 
-    return self
+  def __init__(self, idx, source, is_end=False):
+    self.idx = idx
+    self.source = source
+    self.is_end = is_end
+    self._ln = None
+    self._col = None
+
+  @property
+  def fn(self):
+    return self.source.fn
+
+  @property
+  def ftxt(self):
+    return self.source.text
+
+  @property
+  def ln(self):
+    if self._ln is None: self.locate()
+    return self._ln
+
+  @property
+  def col(self):
+    if self._col is None: self.locate()
+    return self._col
+
+  def locate(self):
+    if self.is_end and self.idx > 0:
+      self._ln, col = self.source.locate(self.idx - 1)
+      self._col = col + 1
+    else:
+      self._ln, self._col = self.source.locate(self.idx)
 
   def copy(self):
-    return Position(self.idx, self.ln, self.col, self.fn, self.ftxt)
+    copy = Position(self.idx, self.source, self.is_end)
+    copy._ln, copy._col = self._ln, self._col
+    return copy
 
 #######################################
 # TOKENS
@@ -172,17 +214,24 @@ KEYWORDS = [
 ]
 
 class Token:
-  def __init__(self, type_, value=None, pos_start=None, pos_end=None):
+  # Spans are offsets into the token's Source; pos_start and pos_end build
+  # Positions from them when an error needs one
+  __slots__ = ('type', 'value', 'source', 'start', 'end')
+
+  def __init__(self, type_, value=None, source=None, start=0, end=None):
     self.type = type_
     self.value = value
+    self.source = source
+    self.start = start
+    self.end = start + 1 if end is None else end
 
-    if pos_start:
-      self.pos_start = pos_start.copy()
-      self.pos_end = pos_start.copy()
-      self.pos_end.advance()
+  @property
+  def pos_start(self):
+    return Position(self.start, self.source)
 
-    if pos_end:
-      self.pos_end = pos_end.copy()
+  @property
+  def pos_end(self):
+    return Position(self.end, self.source, True)
 
   def matches(self, type_, value):
     return self.type == type_ and self.value == value
@@ -192,334 +241,325 @@ class Token:
     return f'{self.type}'
 
 #######################################
-# LEXER
+# SOURCE
 #######################################
 
-class Lexer:
+class Source:
+  # A file's text, shared by every token, node and position made from it.
+  # Line start offsets are only found the first time a line is asked for.
   def __init__(self, fn, text):
     self.fn = fn
     self.text = text
-    self.pos = Position(-1, 0, -1, fn, text)
-    self.current_char = None
-    self.advance()
-
-  def advance(self):
-    self.pos.advance(self.current_char)
-    self.current_char = self.text[self.pos.idx] if self.pos.idx < len(self.text) else None
-
-  def make_tokens(self):
-    tokens = []
+    self.line_starts = None
 
-    while self.current_char != None:
-      if self.current_char in ' \t':
-        self.advance()
-        
-      elif self.current_char == ':':
-        # Check if this is the start of a comment
-        next_char = self.text[self.pos.idx + 1] if self.pos.idx + 1 < len(self.text) else None
-        if next_char == ':':
-          self.skip_comment()
-        else:
-          pos_start = self.pos.copy()
-          char = self.current_char
-          self.advance()
-          return [], IllegalCharError(pos_start, self.pos, "'" + char + "'")
-        
-      elif self.current_char in ';\n':
-        tokens.append(Token(TT_NEWLINE, pos_start=self.pos))
-        self.advance()
-        
-      elif self.current_char in DIGITS:
-        tokens.append(self.make_number())
-        
-      elif self.current_char in LETTERS:
-        tokens.append(self.make_identifier())
-        
-      elif self.current_char in ('"', "'"):  # Handle both single and double quotes
-        token, error = self.make_string()
-        if error: return [], error
-        tokens.append(token)
-        
-      elif self.current_char == '{':
-        tokens.append(Token(TT_LBRACE, pos_start=self.pos))
-        self.advance()
-        
-      elif self.current_char == '}':
-        tokens.append(Token(TT_RBRACE, pos_start=self.pos))
-        self.advance()
-        
-      elif self.current_char == '"':
-        tokens.append(self.make_string())
-        
-      elif self.current_char == '+':
-        tokens.append(Token(TT_PLUS, pos_start=self.pos))
-        self.advance()
-        
-      elif self.current_char == '-':
-        tokens.append(self.make_minus_or_arrow())
-        
-      elif self.current_char == '*':
-        tokens.append(Token(TT_MUL, pos_start=self.pos))
-        self.advance()
-        
-      elif self.current_char == '%':
-        tokens.append(Token(TT_MOD, pos_start=self.pos))
-        self.advance()
-        
-      elif self.current_char == '/':
-        tokens.append(Token(TT_DIV, pos_start=self.pos))
-        self.advance()
-        
-      elif self.current_char == '^':
-        tokens.append(Token(TT_POW, pos_start=self.pos))
-        self.advance()
-        
-      elif self.current_char == '(':
-        tokens.append(Token(TT_LPAREN, pos_start=self.pos))
-        self.advance()
-        
-      elif self.current_char == ')':
-        tokens.append(Token(TT_RPAREN, pos_start=self.pos))
-        self.advance()
-        
-      elif self.current_char == '[':
-        tokens.append(Token(TT_LSQUARE, pos_start=self.pos))
-        self.advance()
-        
-      elif self.current_char == ']':
-        tokens.append(Token(TT_RSQUARE, pos_start=self.pos))
-        self.advance()
-        
-      elif self.current_char == '!':
-        token, error = self.make_not_equals()
-        if error: return [], error
-        tokens.append(token)
-        
-      elif self.current_char == '=':
-        tokens.append(self.make_equals())
-        
-      elif self.current_char == '<':
-        tokens.append(self.make_less_than())
-        
-      elif self.current_char == '>':
-        tokens.append(self.make_greater_than())
-        
-      elif self.current_char == ',':
-        tokens.append(Token(TT_COMMA, pos_start=self.pos))
-        self.advance()
-        
-      else:
-        pos_start = self.pos.copy()
-        char = self.current_char
-        self.advance()
-        return [], IllegalCharError(pos_start, self.pos, "'" + char + "'")
+  def position(self, idx):
+    return Position(idx, self)
 
-    tokens.append(Token(TT_EOF, pos_start=self.pos))
-    return tokens, None
+  def locate(self, idx):
+    if self.line_starts is None:
+      self.line_starts = [0] + [match.end() for match in re.finditer('\n', self.text)]
 
-  def make_number(self):
-    num_str = ''
-    dot_count = 0
-    pos_start = self.pos.copy()
+    ln = bisect_right(self.line_starts, idx) - 1
+    return ln, idx - self.line_starts[ln]
 
-    while self.current_char != None and self.current_char in DIGITS + '.':
-      if self.current_char == '.':
-        if dot_count == 1: break
-        dot_count += 1
-      num_str += self.current_char
-      self.advance()
+#######################################
+# LEXER
+#######################################
 
-    if dot_count == 0:
-      return Token(TT_INT, int(num_str), pos_start, self.pos)
-    else:
-      return Token(TT_FLOAT, float(num_str), pos_start, self.pos)
+# One scan of a single master pattern over the whole text. Each match is
+# taken as the tuple of its groups, blanks first and then the one group
+# that matched, which names the token kind; offsets are counted up from
+# the lengths of the pieces rather than asked of the match. ERROR takes any other character but a
+# blank, so no text is skipped over except trailing blanks.
+TOKEN_PATTERN = re.compile(r"""
+  ([ \t]*)
+  (?:
+     (?P<IDENTIFIER>[A-Za-z][A-Za-z0-9_]*)
+    |(?P<OPERATOR>->|==|!=|<=|>=|[-+*/%^=<>(){}\[\],])
+    |(?P<NEWLINE>[;\n])
+    |(?P<NUMBER>[0-9]+(?:\.[0-9]*)?)
+    |(?P<STRING>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+    |(?P<COMMENT>::[^\n]*\n?)
+    |(?P<ERROR>[^ \t])
+  )
+""", re.VERBOSE | re.DOTALL)
+
+ESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+ESCAPE_CHARACTERS = {
+  'n': '\n',
+  't': '\t'
+}
+
+OPERATOR_TOKENS = {
+  '+':  TT_PLUS,
+  '-':  TT_MINUS,
+  '*':  TT_MUL,
+  '/':  TT_DIV,
+  '%':  TT_MOD,
+  '^':  TT_POW,
+  '=':  TT_EQ,
+  '<':  TT_LT,
+  '>':  TT_GT,
+  '(':  TT_LPAREN,
+  ')':  TT_RPAREN,
+  '[':  TT_LSQUARE,
+  ']':  TT_RSQUARE,
+  '{':  TT_LBRACE,
+  '}':  TT_RBRACE,
+  ',':  TT_COMMA,
+  '->': TT_ARROW,
+  '==': TT_EE,
+  '!=': TT_NE,
+  '<=': TT_LTE,
+  '>=': TT_GTE,
+}
+
+KEYWORD_SET = frozenset(KEYWORDS)
+
+def unescape(match):
+  char = match.group(1)
+  return ESCAPE_CHARACTERS.get(char, char)
 
-  def make_string(self):
-    string = ''
-    pos_start = self.pos.copy()
-    escape_character = False
-    quote_char = self.current_char
-    self.advance()
+class Lexer:
+  def __init__(self, fn, text):
+    self.fn = fn
+    self.text = text
+    self.source = Source(fn, text)
 
-    escape_characters = {
-      'n': '\n',
-      't': '\t'
-    }
+  def make_tokens(self):
+    # Tokens are only ever kept, so the collector has nothing to find
+    # while they pile up; pause it as load_tree does
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+      return self.scan()
+    finally:
+      if enabled: gc.enable()
 
-    while self.current_char != None and (self.current_char != quote_char or escape_character):
-        if escape_character:
-            string += escape_characters.get(self.current_char, self.current_char)
-            escape_character = False
+  def scan(self):
+    tokens = []
+    append = tokens.append
+    source = self.source
+    idx = 0
+
+    matches = map(re.Match.groups, TOKEN_PATTERN.finditer(self.text))
+    for blanks, identifier, operator, newline, number, string, comment, error in matches:
+      if blanks: idx += len(blanks)
+
+      if identifier:
+        end = idx + len(identifier)
+        append(Token(TT_KEYWORD if identifier in KEYWORD_SET else TT_IDENTIFIER, identifier, source, idx, end))
+
+      elif operator:
+        end = idx + len(operator)
+        append(Token(OPERATOR_TOKENS[operator], None, source, idx, end))
+
+      elif newline:
+        end = idx + 1
+        append(Token(TT_NEWLINE, None, source, idx, end))
+
+      elif number:
+        end = idx + len(number)
+        if '.' in number:
+          append(Token(TT_FLOAT, float(number), source, idx, end))
         else:
-            if self.current_char == '\\':
-                escape_character = True
-            else:
-                string += self.current_char
-        self.advance()
-
-    if self.current_char != quote_char:
-        return None, IllegalCharError(pos_start, self.pos, f"Expected closing quote {quote_char}")
-
-    self.advance()
-    return Token(TT_STRING, string, pos_start, self.pos), None
-
-  def make_identifier(self):
-    id_str = ''
-    pos_start = self.pos.copy()
-
-    while self.current_char != None and self.current_char in LETTERS_DIGITS + '_':
-      id_str += self.current_char
-      self.advance()
-
-    tok_type = TT_KEYWORD if id_str in KEYWORDS else TT_IDENTIFIER
-    return Token(tok_type, id_str, pos_start, self.pos)
-
-  def make_minus_or_arrow(self):
-    tok_type = TT_MINUS
-    pos_start = self.pos.copy()
-    self.advance()
-
-    if self.current_char == '>':
-      self.advance()
-      tok_type = TT_ARROW
-
-    return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
-
-  def make_not_equals(self):
-    pos_start = self.pos.copy()
-    self.advance()
-
-    if self.current_char == '=':
-      self.advance()
-      return Token(TT_NE, pos_start=pos_start, pos_end=self.pos), None
-
-    self.advance()
-    return None, ExpectedCharError(pos_start, self.pos, "'=' (after '!')")
-
-  def make_equals(self):
-    tok_type = TT_EQ
-    pos_start = self.pos.copy()
-    self.advance()
-
-    if self.current_char == '=':
-      self.advance()
-      tok_type = TT_EE
-
-    return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
+          append(Token(TT_INT, int(number), source, idx, end))
 
-  def make_less_than(self):
-    tok_type = TT_LT
-    pos_start = self.pos.copy()
-    self.advance()
+      elif string:
+        end = idx + len(string)
+        value = string[1:-1]
+        if '\\' in value:
+          value = ESCAPE_PATTERN.sub(unescape, value)
+        append(Token(TT_STRING, value, source, idx, end))
 
-    if self.current_char == '=':
-      self.advance()
-      tok_type = TT_LTE
+      elif comment:
+        # The comment swallows its newline, so no NEWLINE token is made
+        end = idx + len(comment)
 
-    return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
+      else:
+        return [], self.make_error(idx)
 
-  def make_greater_than(self):
-    tok_type = TT_GT
-    pos_start = self.pos.copy()
-    self.advance()
+      idx = end
 
-    if self.current_char == '=':
-      self.advance()
-      tok_type = TT_GTE
+    append(Token(TT_EOF, None, source, len(self.text), len(self.text) + 1))
+    return tokens, None
 
-    return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
+  def make_error(self, idx):
+    char = self.text[idx]
+    pos_start = self.source.position(idx)
 
-  def skip_comment(self):
-    # Skip both colons
-    self.advance()  # first colon
-    self.advance()  # second colon
+    if char in ('"', "'"):
+      return IllegalCharError(pos_start, self.source.position(len(self.text)), f"Expected closing quote {char}")
 
-    # Skip everything until newline
-    while self.current_char != None and self.current_char != '\n':
-        self.advance()
+    if char == '!':
+      return ExpectedCharError(pos_start, self.source.position(idx + 2), "'=' (after '!')")
 
-    # Skip the newline character if present
-    if self.current_char == '\n':
-        self.advance()
+    return IllegalCharError(pos_start, self.source.position(idx + 1), "'" + char + "'")
 
 #######################################
 # NODES
 #######################################
 
-class NumberNode:
+class NodePosition:
+  # Builds a node's Position from its offsets the first time it is read,
+  # then leaves it in the node's __dict__ so the interpreter's later reads
+  # are plain attribute lookups. Nodes nothing reads a position from never
+  # get one, nor a __dict__ to hold it.
+  def __init__(self, name, is_end=False):
+    self.name = name
+    self.is_end = is_end
+
+  def __get__(self, node, owner=None):
+    if node is None: return self
+    position = Position(node.end if self.is_end else node.start, node.source, self.is_end)
+    node.__dict__[self.name] = position
+    return position
+
+class Node:
+  # Every node spans source[start:end]. Fields are slots; suspends is set
+  # by the AsyncInterpreter (see suspends)
+  __slots__ = ('source', 'start', 'end', 'suspends', '__dict__')
+
+  pos_start = NodePosition('pos_start')
+  pos_end = NodePosition('pos_end', True)
+
+  def __init_subclass__(cls, **kwargs):
+    super().__init_subclass__(**kwargs)
+    cls.field_names = tuple(
+      name for klass in reversed(cls.__mro__)
+      for name in vars(klass).get('__slots__', ())
+      if name not in ('__dict__', 'suspends')
+    )
+
+  def fields(self):
+    # The values of the node's fields, for passes that look through every
+    # field of any node type
+    return [getattr(self, name, None) for name in self.field_names]
+
+class NumberNode(Node):
+  __slots__ = ('tok',)
+
   def __init__(self, tok):
     self.tok = tok
 
-    self.pos_start = self.tok.pos_start
-    self.pos_end = self.tok.pos_end
+    self.source = tok.source
+    self.start = tok.start
+    self.end = tok.end
 
   def __repr__(self):
     return f'{self.tok}'
 
-class StringNode:
+class StringNode(Node):
+  __slots__ = ('tok',)
+
   def __init__(self, tok):
     self.tok = tok
 
-    self.pos_start = self.tok.pos_start
-    self.pos_end = self.tok.pos_end
+    self.source = tok.source
+    self.start = tok.start
+    self.end = tok.end
 
   def __repr__(self):
     return f'{self.tok}'
 
-class ListNode:
-  def __init__(self, element_nodes, pos_start, pos_end):
+class ListNode(Node):
+  __slots__ = ('element_nodes',)
+
+  def __init__(self, element_nodes, source, start, end):
     self.element_nodes = element_nodes
 
-    self.pos_start = pos_start
-    self.pos_end = pos_end
+    self.source = source
+    self.start = start
+    self.end = end
+
+class MapNode(Node):
+  __slots__ = ('key_nodes', 'value_nodes')
+
+  def __init__(self, key_nodes, value_nodes, source, start, end):
+    self.key_nodes = key_nodes
+    self.value_nodes = value_nodes
+
+    self.source = source
+    self.start = start
+    self.end = end
+
+class SetNode(Node):
+  __slots__ = ('element_nodes',)
+
+  def __init__(self, element_nodes, source, start, end):
+    self.element_nodes = element_nodes
+
+    self.source = source
+    self.start = start
+    self.end = end
+
+class VarAccessNode(Node):
+  __slots__ = ('var_name_tok', 'slot')
 
-class VarAccessNode:
   def __init__(self, var_name_tok):
     self.var_name_tok = var_name_tok
+    # Index into the function frame, set by the Resolver for locals
+    self.slot = None
 
-    self.pos_start = self.var_name_tok.pos_start
-    self.pos_end = self.var_name_tok.pos_end
+    self.source = var_name_tok.source
+    self.start = var_name_tok.start
+    self.end = var_name_tok.end
+
+class VarAssignNode(Node):
+  __slots__ = ('var_name_tok', 'value_node', 'slot')
 
-class VarAssignNode:
   def __init__(self, var_name_tok, value_node):
     self.var_name_tok = var_name_tok
     self.value_node = value_node
+    self.slot = None
+
+    self.source = var_name_tok.source
+    self.start = var_name_tok.start
+    self.end = value_node.end
 
-    self.pos_start = self.var_name_tok.pos_start
-    self.pos_end = self.value_node.pos_end
+class BinOpNode(Node):
+  __slots__ = ('left_node', 'op_tok', 'right_node')
 
-class BinOpNode:
   def __init__(self, left_node, op_tok, right_node):
     self.left_node = left_node
     self.op_tok = op_tok
     self.right_node = right_node
 
-    self.pos_start = self.left_node.pos_start
-    self.pos_end = self.right_node.pos_end
+    self.source = left_node.source
+    self.start = left_node.start
+    self.end = right_node.end
 
   def __repr__(self):
     return f'({self.left_node}, {self.op_tok}, {self.right_node})'
 
-class UnaryOpNode:
+class UnaryOpNode(Node):
+  __slots__ = ('op_tok', 'node')
+
   def __init__(self, op_tok, node):
     self.op_tok = op_tok
     self.node = node
 
-    self.pos_start = self.op_tok.pos_start
-    self.pos_end = node.pos_end
+    self.source = op_tok.source
+    self.start = op_tok.start
+    self.end = node.end
 
   def __repr__(self):
     return f'({self.op_tok}, {self.node})'
 
-class IfNode:
+class IfNode(Node):
+  __slots__ = ('cases', 'else_case')
+
   def __init__(self, cases, else_case):
     self.cases = cases
     self.else_case = else_case
 
-    self.pos_start = self.cases[0][0].pos_start
-    self.pos_end = (self.else_case or self.cases[len(self.cases) - 1])[0].pos_end
+    self.source = cases[0][0].source
+    self.start = cases[0][0].start
+    self.end = (else_case or cases[len(cases) - 1])[0].end
+
+class ForNode(Node):
+  __slots__ = ('var_name_tok', 'start_value_node', 'end_value_node', 'step_value_node', 'body_node', 'should_return_null', 'slot')
 
-class ForNode:
   def __init__(self, var_name_tok, start_value_node, end_value_node, step_value_node, body_node, should_return_null):
     self.var_name_tok = var_name_tok
     self.start_value_node = start_value_node
@@ -527,26 +567,48 @@ class ForNode:
     self.step_value_node = step_value_node
     self.body_node = body_node
     self.should_return_null = should_return_null
+    self.slot = None
+
+    self.source = var_name_tok.source
+    self.start = var_name_tok.start
+    self.end = body_node.end
+
+class ForInNode(Node):
+  __slots__ = ('var_name_tok', 'iterable_node', 'body_node', 'should_return_null', 'slot')
+
+  def __init__(self, var_name_tok, iterable_node, body_node, should_return_null):
+    self.var_name_tok = var_name_tok
+    self.iterable_node = iterable_node
+    self.body_node = body_node
+    self.should_return_null = should_return_null
+    self.slot = None
+
+    self.source = var_name_tok.source
+    self.start = var_name_tok.start
+    self.end = body_node.end
 
-    self.pos_start = self.var_name_tok.pos_start
-    self.pos_end = self.body_node.pos_end
+class WhileNode(Node):
+  __slots__ = ('condition_node', 'body_node', 'should_return_null')
 
-class WhileNode:
   def __init__(self, condition_node, body_node, should_return_null):
     self.condition_node = condition_node
     self.body_node = body_node
     self.should_return_null = should_return_null
 
-    self.pos_start = self.condition_node.pos_start
-    self.pos_end = self.body_node.pos_end
+    self.source = condition_node.source
+    self.start = condition_node.start
+    self.end = body_node.end
 
-class TryNode:
-  def __init__(self, try_body, catch_var, catch_body, pos_start, pos_end):
+class TryNode(Node):
+  __slots__ = ('try_body', 'catch_var', 'catch_body')
+
+  def __init__(self, try_body, catch_var, catch_body, source, start, end):
     self.try_body = try_body
     self.catch_var = catch_var
     self.catch_body = catch_body
-    self.pos_start = pos_start
-    self.pos_end = pos_end
+    self.source = source
+    self.start = start
+    self.end = end
     
   def __str__(self):
     return str(self.value)
@@ -554,78 +616,107 @@ class TryNode:
   def __repr__(self):
     return f"<error: {self.value}>"
 
-class FuncDefNode:
+class FuncDefNode(Node):
+  __slots__ = ('var_name_tok', 'arg_name_toks', 'body_node', 'should_auto_return', 'layout')
+
   def __init__(self, var_name_tok, arg_name_toks, body_node, should_auto_return):
     self.var_name_tok = var_name_tok
     self.arg_name_toks = arg_name_toks
     self.body_node = body_node
     self.should_auto_return = should_auto_return
+    # Slot layout of the body's frame, set by the Resolver
+    self.layout = None
 
+    self.source = body_node.source
     if self.var_name_tok:
-      self.pos_start = self.var_name_tok.pos_start
+      self.start = self.var_name_tok.start
     elif len(self.arg_name_toks) > 0:
-      self.pos_start = self.arg_name_toks[0].pos_start
+      self.start = self.arg_name_toks[0].start
     else:
-      self.pos_start = self.body_node.pos_start
+      self.start = self.body_node.start
 
-    self.pos_end = self.body_node.pos_end
+    self.end = self.body_node.end
+
+class CallNode(Node):
+  __slots__ = ('node_to_call', 'arg_nodes')
 
-class CallNode:
   def __init__(self, node_to_call, arg_nodes):
     self.node_to_call = node_to_call
     self.arg_nodes = arg_nodes
 
-    self.pos_start = self.node_to_call.pos_start
+    self.source = node_to_call.source
+    self.start = node_to_call.start
 
     if len(self.arg_nodes) > 0:
-      self.pos_end = self.arg_nodes[len(self.arg_nodes) - 1].pos_end
+      self.end = self.arg_nodes[len(self.arg_nodes) - 1].end
     else:
-      self.pos_end = self.node_to_call.pos_end
+      self.end = self.node_to_call.end
+
+class ReturnNode(Node):
+  __slots__ = ('node_to_return',)
 
-class ReturnNode:
-  def __init__(self, node_to_return, pos_start, pos_end):
+  def __init__(self, node_to_return, source, start, end):
     self.node_to_return = node_to_return
 
-    self.pos_start = pos_start
-    self.pos_end = pos_end
+    self.source = source
+    self.start = start
+    self.end = end
 
-class ContinueNode:
-  def __init__(self, pos_start, pos_end):
-    self.pos_start = pos_start
-    self.pos_end = pos_end
+class ContinueNode(Node):
+  __slots__ = ()
 
-class BreakNode:
-  def __init__(self, pos_start, pos_end):
-    self.pos_start = pos_start
-    self.pos_end = pos_end
+  def __init__(self, source, start, end):
+    self.source = source
+    self.start = start
+    self.end = end
+
+class BreakNode(Node):
+  __slots__ = ()
+
+  def __init__(self, source, start, end):
+    self.source = source
+    self.start = start
+    self.end = end
 
-class ImportNode:
-  def __init__(self, imports, module_path, pos_start, pos_end):
+class ImportNode(Node):
+  __slots__ = ('imports', 'module_path')
+
+  def __init__(self, imports, module_path, source, start, end):
     self.imports = imports  # List of (name, alias) tuples
     self.module_path = module_path
-    self.pos_start = pos_start
-    self.pos_end = pos_end
+    self.source = source
+    self.start = start
+    self.end = end
 
   def __repr__(self):
     return f"Import({self.imports} from '{self.module_path}')"
 
-class AsyncNode:
+class AsyncNode(Node):
+  __slots__ = ('node',)
+
   def __init__(self, node):
     self.node = node
-    self.pos_start = node.pos_start
-    self.pos_end = node.pos_end
+    self.source = node.source
+    self.start = node.start
+    self.end = node.end
+
+class AwaitNode(Node):
+  __slots__ = ('node',)
 
-class AwaitNode:
   def __init__(self, node):
     self.node = node
-    self.pos_start = node.pos_start
-    self.pos_end = node.pos_end
+    self.source = node.source
+    self.start = node.start
+    self.end = node.end
+
+class SleepNode(Node):
+  __slots__ = ('duration_node',)
 
-class SleepNode:
-  def __init__(self, duration_node, pos_start, pos_end):
+  def __init__(self, duration_node, source, start, end):
     self.duration_node = duration_node
-    self.pos_start = pos_start
-    self.pos_end = pos_end
+    self.source = source
+    self.start = start
+    self.end = end
 
 #######################################
 # PARSE RESULT
@@ -671,6 +762,7 @@ class ParseResult:
 class Parser:
   def __init__(self, tokens):
     self.tokens = tokens
+    self.source = tokens[0].source
     self.tok_idx = -1
     self.advance()
 
@@ -702,7 +794,7 @@ class Parser:
   def statements(self):
     res = ParseResult()
     statements = []
-    pos_start = self.current_tok.pos_start.copy()
+    start = self.current_tok.start
 
     while self.current_tok.type == TT_NEWLINE:
       res.register_advancement()
@@ -733,13 +825,14 @@ class Parser:
 
     return res.success(ListNode(
       statements,
-      pos_start,
-      self.current_tok.pos_end.copy()
+      self.source,
+      start,
+      self.current_tok.end
     ))
 
   def statement(self):
     res = ParseResult()
-    pos_start = self.current_tok.pos_start.copy()
+    start = self.current_tok.start
     
     if self.current_tok.matches(TT_KEYWORD, 'import'):
       import_res = self.import_statement()
@@ -753,33 +846,33 @@ class Parser:
       expr = res.try_register(self.expr())
       if not expr:
         self.reverse(res.to_reverse_count)
-      return res.success(ReturnNode(expr, pos_start, self.current_tok.pos_start.copy()))
+      return res.success(ReturnNode(expr, self.source, start, self.current_tok.start))
 
     if self.current_tok.matches(TT_KEYWORD, 'continue'):
       res.register_advancement()
       self.advance()
-      return res.success(ContinueNode(pos_start, self.current_tok.pos_start.copy()))
+      return res.success(ContinueNode(self.source, start, self.current_tok.start))
 
     if self.current_tok.matches(TT_KEYWORD, 'break'):
       res.register_advancement()
       self.advance()
-      return res.success(BreakNode(pos_start, self.current_tok.pos_start.copy()))
+      return res.success(BreakNode(self.source, start, self.current_tok.start))
 
     expr = res.register(self.expr())
     if res.error:
       return res.failure(InvalidSyntaxError(
         self.current_tok.pos_start, self.current_tok.pos_end,
-        "Expected 'release', 'continue', 'break', 'initiate', 'if', 'for', 'while', 'function', int, float, identifier, '+', '-', '(', '[' or 'not'"
+        "Expected 'release', 'continue', 'break', 'initiate', 'if', 'for', 'while', 'function', int, float, identifier, '+', '-', '(', '[', '{' or 'not'"
       ))
     return res.success(expr)
 
   def import_statement(self):
     res = ParseResult()
-    pos_start = self.current_tok.pos_start.copy()
+    start = self.current_tok.start
 
     if not self.current_tok.matches(TT_KEYWORD, 'import'):
         return res.failure(InvalidSyntaxError(
-            pos_start, self.current_tok.pos_end,
+            self.current_tok.pos_start, self.current_tok.pos_end,
             "Expected 'import' keyword"
         ))
 
@@ -869,7 +962,7 @@ class Parser:
     res.register_advancement()
     self.advance()
 
-    return res.success(ImportNode(imports, module_path, pos_start, self.current_tok.pos_end.copy()))  
+    return res.success(ImportNode(imports, module_path, self.source, start, self.current_tok.end))  
 
   def expr(self):
     res = ParseResult()
@@ -905,7 +998,7 @@ class Parser:
     if res.error:
       return res.failure(InvalidSyntaxError(
         self.current_tok.pos_start, self.current_tok.pos_end,
-        "Expected 'initiate', 'if', 'for', 'while', 'function', int, float, identifier, '+', '-', '(', '[' or 'not'"
+        "Expected 'initiate', 'if', 'for', 'while', 'function', int, float, identifier, '+', '-', '(', '[', '{' or 'not'"
       ))
 
     return res.success(node)
@@ -927,7 +1020,7 @@ class Parser:
     if res.error:
       return res.failure(InvalidSyntaxError(
         self.current_tok.pos_start, self.current_tok.pos_end,
-        "Expected int, float, identifier, '+', '-', '(', '[', 'if', 'for', 'while', 'function' or 'not'"
+        "Expected int, float, identifier, '+', '-', '(', '[', '{', 'if', 'for', 'while', 'function' or 'not'"
       ))
 
     return res.success(node)
@@ -972,7 +1065,7 @@ class Parser:
             if res.error:
                 return res.failure(InvalidSyntaxError(
                     self.current_tok.pos_start, self.current_tok.pos_end,
-                    "Expected ')', 'initiate', 'if', 'for', 'while', 'function', int, float, identifier, '+', '-', '(', '[' or 'not'"
+                    "Expected ')', 'initiate', 'if', 'for', 'while', 'function', int, float, identifier, '+', '-', '(', '[', '{' or 'not'"
                 ))
 
             while self.current_tok.type == TT_COMMA:
@@ -1048,6 +1141,11 @@ class Parser:
       if res.error: return res
       return res.success(list_expr)
 
+    elif tok.type == TT_LBRACE:
+      map_expr = res.register(self.map_expr())
+      if res.error: return res
+      return res.success(map_expr)
+
     elif tok.matches(TT_KEYWORD, 'if'):
       if_expr = res.register(self.if_expr())
       if res.error: return res
@@ -1116,16 +1214,16 @@ class Parser:
         res.register_advancement()
         self.advance()
         
-        return res.success(SleepNode(duration, tok.pos_start, self.current_tok.pos_end))
+        return res.success(SleepNode(duration, self.source, tok.start, self.current_tok.end))
 
     return res.failure(InvalidSyntaxError(
       tok.pos_start, tok.pos_end,
-      "Expected int, float, identifier, '+', '-', '(', '[', if', 'for', 'while', 'function'"
+      "Expected int, float, identifier, '+', '-', '(', '[', '{', if', 'for', 'while', 'function'"
     ))
   
   def try_expr(self):
     res = ParseResult()
-    pos_start = self.current_tok.pos_start.copy()
+    start = self.current_tok.start
 
     if not self.current_tok.matches(TT_KEYWORD, 'fuck_around'):
         return res.failure(InvalidSyntaxError(
@@ -1217,8 +1315,9 @@ class Parser:
                 try_body,
                 catch_var,
                 catch_body,
-                pos_start,
-                self.current_tok.pos_end.copy()
+                self.source,
+                start,
+                self.current_tok.end
             ))
     
     # Single-line version (without THEN)
@@ -1269,14 +1368,15 @@ class Parser:
         try_body,
         catch_var,
         catch_body,
-        pos_start,
-        self.current_tok.pos_end.copy()
+        self.source,
+        start,
+        self.current_tok.end
     ))
 
   def list_expr(self):
     res = ParseResult()
     element_nodes = []
-    pos_start = self.current_tok.pos_start.copy()
+    start = self.current_tok.start
 
     if self.current_tok.type != TT_LSQUARE:
       return res.failure(InvalidSyntaxError(
@@ -1295,7 +1395,7 @@ class Parser:
       if res.error:
         return res.failure(InvalidSyntaxError(
           self.current_tok.pos_start, self.current_tok.pos_end,
-          "Expected ']', 'initiate', 'if', 'for', 'while', 'function', int, float, identifier, '+', '-', '(', '[' or 'not'"
+          "Expected ']', 'initiate', 'if', 'for', 'while', 'function', int, float, identifier, '+', '-', '(', '[', '{' or 'not'"
         ))
 
       while self.current_tok.type == TT_COMMA:
@@ -1316,10 +1416,77 @@ class Parser:
 
     return res.success(ListNode(
       element_nodes,
-      pos_start,
-      self.current_tok.pos_end.copy()
+      self.source,
+      start,
+      self.current_tok.end
     ))
 
+  def map_expr(self):
+    # {key -> value, ...} is a map, {element, ...} a set and {} an empty map
+    res = ParseResult()
+    key_nodes = []
+    value_nodes = []
+    start = self.current_tok.start
+
+    if self.current_tok.type != TT_LBRACE:
+      return res.failure(InvalidSyntaxError(
+        self.current_tok.pos_start, self.current_tok.pos_end,
+        "Expected '{'"
+      ))
+
+    res.register_advancement()
+    self.advance()
+
+    if self.current_tok.type == TT_RBRACE:
+      end = self.current_tok.end
+      res.register_advancement()
+      self.advance()
+      return res.success(MapNode(key_nodes, value_nodes, self.source, start, end))
+
+    key_nodes.append(res.register(self.expr()))
+    if res.error:
+      return res.failure(InvalidSyntaxError(
+        self.current_tok.pos_start, self.current_tok.pos_end,
+        "Expected '}', 'initiate', 'if', 'for', 'while', 'function', int, float, identifier, '+', '-', '(', '[', '{' or 'not'"
+      ))
+    is_map = self.current_tok.type == TT_ARROW
+
+    while True:
+      if is_map:
+        if self.current_tok.type != TT_ARROW:
+          return res.failure(InvalidSyntaxError(
+            self.current_tok.pos_start, self.current_tok.pos_end,
+            "Expected '->'"
+          ))
+
+        res.register_advancement()
+        self.advance()
+
+        value_nodes.append(res.register(self.expr()))
+        if res.error: return res
+
+      if self.current_tok.type != TT_COMMA: break
+
+      res.register_advancement()
+      self.advance()
+
+      key_nodes.append(res.register(self.expr()))
+      if res.error: return res
+
+    if self.current_tok.type != TT_RBRACE:
+      return res.failure(InvalidSyntaxError(
+        self.current_tok.pos_start, self.current_tok.pos_end,
+        "Expected ',' or '}'"
+      ))
+
+    end = self.current_tok.end
+    res.register_advancement()
+    self.advance()
+
+    if is_map:
+      return res.success(MapNode(key_nodes, value_nodes, self.source, start, end))
+    return res.success(SetNode(key_nodes, self.source, start, end))
+
   def if_expr(self):
     res = ParseResult()
     all_cases = res.register(self.if_expr_cases('if'))
@@ -1459,38 +1626,50 @@ class Parser:
     res.register_advancement()
     self.advance()
 
-    if self.current_tok.type != TT_EQ:
-      return res.failure(InvalidSyntaxError(
-        self.current_tok.pos_start, self.current_tok.pos_end,
-        f"Expected '='"
-      ))
+    # `in` is only a keyword here, so it can still be used as a name
+    if self.current_tok.type == TT_IDENTIFIER and self.current_tok.value == 'in':
+      res.register_advancement()
+      self.advance()
 
-    res.register_advancement()
-    self.advance()
+      iterable = res.register(self.expr())
+      if res.error: return res
 
-    start_value = res.register(self.expr())
-    if res.error: return res
+      make_loop = lambda body, should_return_null: ForInNode(var_name, iterable, body, should_return_null)
+    else:
+      if self.current_tok.type != TT_EQ:
+        return res.failure(InvalidSyntaxError(
+          self.current_tok.pos_start, self.current_tok.pos_end,
+          f"Expected '=' or 'in'"
+        ))
 
-    if not self.current_tok.matches(TT_KEYWORD, 'to'):
-      return res.failure(InvalidSyntaxError(
-        self.current_tok.pos_start, self.current_tok.pos_end,
-        f"Expected 'TO'"
-      ))
+      res.register_advancement()
+      self.advance()
 
-    res.register_advancement()
-    self.advance()
+      start_value = res.register(self.expr())
+      if res.error: return res
 
-    end_value = res.register(self.expr())
-    if res.error: return res
+      if not self.current_tok.matches(TT_KEYWORD, 'to'):
+        return res.failure(InvalidSyntaxError(
+          self.current_tok.pos_start, self.current_tok.pos_end,
+          f"Expected 'TO'"
+        ))
 
-    if self.current_tok.matches(TT_KEYWORD, 'step'):
       res.register_advancement()
       self.advance()
 
-      step_value = res.register(self.expr())
+      end_value = res.register(self.expr())
       if res.error: return res
-    else:
-      step_value = None
+
+      if self.current_tok.matches(TT_KEYWORD, 'step'):
+        res.register_advancement()
+        self.advance()
+
+        step_value = res.register(self.expr())
+        if res.error: return res
+      else:
+        step_value = None
+
+      make_loop = lambda body, should_return_null: ForNode(var_name, start_value, end_value, step_value, body, should_return_null)
 
     if not self.current_tok.matches(TT_KEYWORD, 'THEN'):
       return res.failure(InvalidSyntaxError(
@@ -1517,12 +1696,12 @@ class Parser:
       res.register_advancement()
       self.advance()
 
-      return res.success(ForNode(var_name, start_value, end_value, step_value, body, True))
+      return res.success(make_loop(body, True))
 
     body = res.register(self.statement())
     if res.error: return res
 
-    return res.success(ForNode(var_name, start_value, end_value, step_value, body, False))
+    return res.success(make_loop(body, False))
 
   def while_expr(self):
     res = ParseResult()
@@ -1701,69 +1880,39 @@ class Parser:
     return res.success(left)
 
 #######################################
-# RUNTIME RESULT
+# RUNTIME SIGNALS
 #######################################
 
-class RTResult:
-  def __init__(self):
-    self.reset()
+# visit_* methods and BuiltInFunction.execute return values directly.
+# Errors are raised as Error exceptions; release, break and continue unwind
+# to the function call or loop that handles them through these signals.
+# Note: break and continue are not stopped at function boundaries, so they
+# can still continue and break outside the current function.
 
-  def reset(self):
-    self.value = None
-    self.error = None
-    self.func_return_value = None
-    self.loop_should_continue = False
-    self.loop_should_break = False
+class ControlSignal(Exception):
+  pass
 
-  def register(self, res):
-    self.error = res.error
-    self.func_return_value = res.func_return_value
-    self.loop_should_continue = res.loop_should_continue
-    self.loop_should_break = res.loop_should_break
-    return res.value
-
-  def success(self, value):
-    self.reset()
+class ReturnSignal(ControlSignal):
+  def __init__(self, value):
     self.value = value
-    return self
-
-  def success_return(self, value):
-    self.reset()
-    self.func_return_value = value
-    return self
-
-  def success_continue(self):
-    self.reset()
-    self.loop_should_continue = True
-    return self
-
-  def success_break(self):
-    self.reset()
-    self.loop_should_break = True
-    return self
 
-  def failure(self, error):
-    self.reset()
-    self.error = error
-    return self
+class BreakSignal(ControlSignal):
+  pass
 
-  def should_return(self):
-    # Note: this will allow you to continue and break outside the current function
-    return (
-      self.error or
-      self.func_return_value or
-      self.loop_should_continue or
-      self.loop_should_break
-    )
+class ContinueSignal(ControlSignal):
+  pass
 
 #######################################
 # VALUES
 #######################################
 
 class Value:
+  __slots__ = ('pos_start', 'pos_end', 'context')
+
   def __init__(self):
-    self.set_pos()
-    self.set_context()
+    self.pos_start = None
+    self.pos_end = None
+    self.context = None
 
   def set_pos(self, pos_start=None, pos_end=None):
     self.pos_start = pos_start
@@ -1813,11 +1962,11 @@ class Value:
   def ored_by(self, other):
     return None, self.illegal_operation(other)
 
-  def notted(self, other):
-    return None, self.illegal_operation(other)
+  def notted(self):
+    return None, self.illegal_operation()
 
   def execute(self, args):
-    return RTResult().failure(self.illegal_operation())
+    raise self.illegal_operation()
 
   def copy(self):
     raise Exception('No copy method defined')
@@ -1834,25 +1983,53 @@ class Value:
     )
 
 class Number(Value):
+  # shared is set on the instances everything shares (see make_number)
+  __slots__ = ('value', 'shared')
+
   def __init__(self, value):
-    super().__init__()
+    # Every intermediate result is a new Number, so this skips the
+    # Value.__init__ call
     self.value = value
+    self.pos_start = None
+    self.pos_end = None
+    self.context = None
+    self.shared = False
 
-  def added_to(self, other):
+  def set_pos(self, pos_start=None, pos_end=None):
+    # A shared Number is never changed, it hands out a placed copy
+    if self.shared:
+      return Number(self.value).set_context(self.context).set_pos(pos_start, pos_end)
+    self.pos_start = pos_start
+    self.pos_end = pos_end
+    return self
+
+  def set_context(self, context=None):
+    if self.shared:
+      return Number(self.value).set_pos(self.pos_start, self.pos_end).set_context(context)
+    self.context = context
+    return self
+
+  def added_to(self, other):
     if isinstance(other, Number):
       return Number(self.value + other.value).set_context(self.context), None
+    elif isinstance(other, NumArray):
+      return other.combined(operator.add, self, True)
     else:
       return None, Value.illegal_operation(self, other)
 
   def subbed_by(self, other):
     if isinstance(other, Number):
       return Number(self.value - other.value).set_context(self.context), None
+    elif isinstance(other, NumArray):
+      return other.combined(operator.sub, self, True)
     else:
       return None, Value.illegal_operation(self, other)
 
   def multed_by(self, other):
     if isinstance(other, Number):
       return Number(self.value * other.value).set_context(self.context), None
+    elif isinstance(other, NumArray):
+      return other.combined(operator.mul, self, True)
     else:
       return None, Value.illegal_operation(self, other)
 
@@ -1866,6 +2043,8 @@ class Number(Value):
         )
 
       return Number(self.value / other.value).set_context(self.context), None
+    elif isinstance(other, NumArray):
+      return other.combined(operator.truediv, self, True)
     else:
       return None, Value.illegal_operation(self, other)
     
@@ -1886,54 +2065,54 @@ class Number(Value):
 
   def get_comparison_eq(self, other):
     if isinstance(other, Number):
-      return Number(int(self.value == other.value)).set_context(self.context), None
+      return (Number.true if self.value == other.value else Number.false), None
     else:
       return None, Value.illegal_operation(self, other)
 
   def get_comparison_ne(self, other):
     if isinstance(other, Number):
-      return Number(int(self.value != other.value)).set_context(self.context), None
+      return (Number.true if self.value != other.value else Number.false), None
     else:
       return None, Value.illegal_operation(self, other)
 
   def get_comparison_lt(self, other):
     if isinstance(other, Number):
-      return Number(int(self.value < other.value)).set_context(self.context), None
+      return (Number.true if self.value < other.value else Number.false), None
     else:
       return None, Value.illegal_operation(self, other)
 
   def get_comparison_gt(self, other):
     if isinstance(other, Number):
-      return Number(int(self.value > other.value)).set_context(self.context), None
+      return (Number.true if self.value > other.value else Number.false), None
     else:
       return None, Value.illegal_operation(self, other)
 
   def get_comparison_lte(self, other):
     if isinstance(other, Number):
-      return Number(int(self.value <= other.value)).set_context(self.context), None
+      return (Number.true if self.value <= other.value else Number.false), None
     else:
       return None, Value.illegal_operation(self, other)
 
   def get_comparison_gte(self, other):
     if isinstance(other, Number):
-      return Number(int(self.value >= other.value)).set_context(self.context), None
+      return (Number.true if self.value >= other.value else Number.false), None
     else:
       return None, Value.illegal_operation(self, other)
 
   def anded_by(self, other):
     if isinstance(other, Number):
-      return Number(int(self.value and other.value)).set_context(self.context), None
+      return make_number(int(self.value and other.value)), None
     else:
       return None, Value.illegal_operation(self, other)
 
   def ored_by(self, other):
     if isinstance(other, Number):
-      return Number(int(self.value or other.value)).set_context(self.context), None
+      return make_number(int(self.value or other.value)), None
     else:
       return None, Value.illegal_operation(self, other)
 
   def notted(self):
-    return Number(1 if self.value == 0 else 0).set_context(self.context), None
+    return (Number.true if self.value == 0 else Number.false), None
 
   def copy(self):
     copy = Number(self.value)
@@ -1950,12 +2129,56 @@ class Number(Value):
   def __repr__(self):
     return str(self.value)
 
-Number.null = Number(0)
-Number.false = Number(0)
-Number.true = Number(1)
-Number.math_PI = Number(math.pi)
+# Small ints are interned: literals, comparison and arithmetic results
+# and loop counters in this range all reuse one shared Number per value.
+# A shared Number has no position or context of its own; errors get those
+# from the nodes (see Interpreter.locate_operand).
+SMALL_INT_MIN = -5
+SMALL_INT_MAX = 1024
+
+def shared_number(value):
+  number = Number(value)
+  number.shared = True
+  return number
+
+SMALL_INTS = [shared_number(value) for value in range(SMALL_INT_MIN, SMALL_INT_MAX + 1)]
+
+def make_number(value):
+  # The shared Number for a small int, otherwise a new one
+  if type(value) is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+    return SMALL_INTS[value - SMALL_INT_MIN]
+  return Number(value)
+
+Number.null = make_number(0)
+Number.false = make_number(0)
+Number.true = make_number(1)
+Number.math_PI = shared_number(math.pi)
+
+# Number-with-Number operations on the plain int/float values, keyed by
+# operator token type ('and' and 'or' by keyword). Both engines use these
+# instead of binary_operation when both operands are Numbers. They give
+# the same values as the Number methods; on a ZeroDivisionError the
+# operation goes through the methods, which report the error.
+NUMBER_OPERATIONS = {
+  TT_PLUS:  operator.add,
+  TT_MINUS: operator.sub,
+  TT_MUL:   operator.mul,
+  TT_DIV:   operator.truediv,
+  TT_MOD:   operator.mod,
+  TT_POW:   operator.pow,
+  TT_EE:    lambda a, b: int(a == b),
+  TT_NE:    lambda a, b: int(a != b),
+  TT_LT:    lambda a, b: int(a < b),
+  TT_GT:    lambda a, b: int(a > b),
+  TT_LTE:   lambda a, b: int(a <= b),
+  TT_GTE:   lambda a, b: int(a >= b),
+  'and':    lambda a, b: int(a and b),
+  'or':     lambda a, b: int(a or b),
+}
 
 class String(Value):
+  __slots__ = ('value',)
+
   def __init__(self, value):
     super().__init__()
     self.value = value
@@ -1987,21 +2210,85 @@ class String(Value):
     return f'"{self.value}"'
 
 class List(Value):
+  # A list reads the first `length` items of `buffer`. Lists built from
+  # one another by the value operators share one buffer: `+` and `*`
+  # append to its end, which leaves every shorter list reading it as it
+  # was. `shared` marks a buffer another list may read, so changing its
+  # items in place first takes a copy.
+  __slots__ = ('buffer', 'length', 'shared')
+
   def __init__(self, elements):
     super().__init__()
-    self.elements = elements
+    self.buffer = elements
+    self.length = len(elements)
+    self.shared = False
+
+  @property
+  def elements(self):
+    buffer = self.buffer
+    if len(buffer) != self.length:
+      buffer = self.tail()
+    return buffer
+
+  @elements.setter
+  def elements(self, elements):
+    self.buffer = elements
+    self.length = len(elements)
+    self.shared = False
+
+  def tail(self):
+    # A buffer that ends where this list does, so it can grow in place
+    if len(self.buffer) != self.length:
+      self.buffer = self.buffer[:self.length]
+      self.shared = False
+    return self.buffer
+
+  def owned(self):
+    # A buffer no other list reads, so its items can change in place
+    if self.shared or len(self.buffer) != self.length:
+      self.buffer = self.buffer[:self.length]
+      self.shared = False
+    return self.buffer
+
+  def append(self, value):
+    self.tail().append(value)
+    self.length += 1
+
+  def extend(self, values):
+    buffer = self.tail()
+    buffer.extend(values)
+    self.length = len(buffer)
+
+  def set_item(self, index, value):
+    self.owned()[index] = value
+
+  def pop(self, index=-1):
+    element = self.owned().pop(index)
+    self.length -= 1
+    return element
+
+  def clear(self):
+    self.elements = []
+
+  def extended(self, values):
+    buffer = self.tail()
+    buffer.extend(values)
+    new_list = List(buffer)
+    new_list.shared = self.shared = True
+    return new_list.set_pos(self.pos_start, self.pos_end).set_context(self.context)
+
+  def with_elements(self, elements):
+    return List(elements).set_pos(self.pos_start, self.pos_end).set_context(self.context)
 
   def added_to(self, other):
-    new_list = self.copy()
-    new_list.elements.append(other)
-    return new_list, None
+    return self.extended((other,)), None
 
   def subbed_by(self, other):
     if isinstance(other, Number):
-      new_list = self.copy()
+      elements = list(self.elements)
       try:
-        new_list.elements.pop(other.value)
-        return new_list, None
+        elements.pop(other.value)
+        return self.with_elements(elements), None
       except:
         return None, RTError(
           other.pos_start, other.pos_end,
@@ -2013,9 +2300,7 @@ class List(Value):
 
   def multed_by(self, other):
     if isinstance(other, List):
-      new_list = self.copy()
-      new_list.elements.extend(other.elements)
-      return new_list, None
+      return self.extended(other.elements), None
     else:
       return None, Value.illegal_operation(self, other)
 
@@ -2033,7 +2318,9 @@ class List(Value):
       return None, Value.illegal_operation(self, other)
 
   def copy(self):
-    copy = List(self.elements)
+    copy = List(self.buffer)
+    copy.length = self.length
+    copy.shared = self.shared = True
     copy.set_pos(self.pos_start, self.pos_end)
     copy.set_context(self.context)
     return copy
@@ -2044,54 +2331,350 @@ class List(Value):
   def __repr__(self):
     return f'[{", ".join([repr(x) for x in self.elements])}]'
 
+def key_of(value):
+  # The Python value a Map or Set files value under, or None if value
+  # can't be a key. Numbers and strings hash as their plain values.
+  if isinstance(value, (Number, String)):
+    return value.value
+  return None
+
+def hash_key(value):
+  # What unique, contains and count compare values by: the plain value of
+  # a number or string, otherwise the value itself, which hashes by
+  # identity (functions, nested lists, ...)
+  if isinstance(value, (Number, String)):
+    return value.value
+  return value
+
+def require_key(value, origin, context):
+  # key_of(value), or an error at origin (a node or builtin) if it has none
+  key = key_of(value)
+  if key is None:
+    raise RTError(
+      origin.pos_start, origin.pos_end,
+      "Map keys and set elements must be numbers or strings",
+      context
+    )
+  return key
+
+class Map(Value):
+  # key_of(key) -> (key, value), in insertion order
+  __slots__ = ('entries',)
+
+  def __init__(self, entries=None):
+    super().__init__()
+    self.entries = {} if entries is None else entries
+
+  def is_true(self):
+    return len(self.entries) > 0
+
+  def copy(self):
+    copy = Map(dict(self.entries))
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
+
+  def __str__(self):
+    return ", ".join([f'{key} -> {value}' for key, value in self.entries.values()])
+
+  def __repr__(self):
+    return f'{{{", ".join([f"{key!r} -> {value!r}" for key, value in self.entries.values()])}}}'
+
+class Set(Value):
+  # key_of(element) -> element, in insertion order
+  __slots__ = ('items',)
+
+  def __init__(self, items=None):
+    super().__init__()
+    self.items = {} if items is None else items
+
+  def is_true(self):
+    return len(self.items) > 0
+
+  def copy(self):
+    copy = Set(dict(self.items))
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
+
+  def __str__(self):
+    return ", ".join([str(x) for x in self.items.values()])
+
+  def __repr__(self):
+    return f'{{{", ".join([repr(x) for x in self.items.values()])}}}'
+
+# A NumArray holds plain numbers in an array('q') when they are all ints
+# that fit, otherwise in an array('d'), and reaches it through a
+# memoryview so a slice shares the numbers of the array it was cut from.
+# Arrays are never changed in place: arithmetic builds new ones.
+
+def make_array(values):
+  # An array of the int/float values, as ints if they all are
+  if all(type(value) is int for value in values):
+    try:
+      return array('q', values)
+    except OverflowError:
+      pass
+  return array('d', values)
+
+class NumArray(Value):
+  __slots__ = ('data',)
+
+  def __init__(self, data):
+    super().__init__()
+    self.data = data if isinstance(data, memoryview) else memoryview(data)
+
+  def combined(self, operation, other, reflected=False):
+    # self `operation` other elementwise, where other is an array of the
+    # same length or a number applied to every element. reflected puts
+    # other on the left.
+    if isinstance(other, NumArray):
+      if len(other.data) != len(self.data):
+        return None, RTError(
+          other.pos_start, other.pos_end,
+          'Arrays must have the same length',
+          self.context
+        )
+      right = other.data
+      ints = other.data.format == 'q'
+    elif isinstance(other, Number):
+      right = repeat(other.value)
+      ints = type(other.value) is int
+    else:
+      return None, Value.illegal_operation(self, other)
+
+    left = self.data
+    if reflected: left, right = right, left
+    ints = ints and self.data.format == 'q' and operation is not operator.truediv
+
+    try:
+      if ints:
+        try:
+          return NumArray(array('q', map(operation, left, right))).set_context(self.context), None
+        except OverflowError:
+          pass
+      return NumArray(array('d', map(operation, left, right))).set_context(self.context), None
+    except ZeroDivisionError:
+      divisor = self if reflected else other
+      return None, RTError(
+        divisor.pos_start, divisor.pos_end,
+        'Division by zero',
+        self.context
+      )
+
+  def added_to(self, other):
+    return self.combined(operator.add, other)
+
+  def subbed_by(self, other):
+    return self.combined(operator.sub, other)
+
+  def multed_by(self, other):
+    return self.combined(operator.mul, other)
+
+  def dived_by(self, other):
+    return self.combined(operator.truediv, other)
+
+  def is_true(self):
+    return len(self.data) > 0
+
+  def copy(self):
+    copy = NumArray(self.data)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
+
+  def __str__(self):
+    return ", ".join([str(x) for x in self.data.tolist()])
+
+  def __repr__(self):
+    return f'to_array([{", ".join([repr(x) for x in self.data.tolist()])}])'
+
+#######################################
+# VECTORS
+#######################################
+
+# The vec_* builtins take lists of numbers or arrays. With NumPy they run
+# as NumPy calls on the arrays' memory, otherwise through the pure-Python
+# array code NumArray uses. Setting use_numpy to False forces the latter.
+use_numpy = True
+
+def load_numpy():
+  # The numpy module, or None to take the pure-Python path
+  global numpy
+  if not use_numpy: return None
+  if numpy is None:
+    try:
+      import numpy
+    except ImportError:
+      numpy = False
+  return numpy or None
+
+def vector_data(value, origin, context):
+  # The numbers of an array or a list of numbers, as a memoryview
+  if isinstance(value, NumArray):
+    return value.data
+  if isinstance(value, List):
+    elements = value.elements
+    values = [element.value for element in elements if isinstance(element, Number)]
+    if len(values) == len(elements):
+      return memoryview(make_array(values))
+  raise RTError(
+    origin.pos_start, origin.pos_end,
+    "Arguments must be arrays or lists of numbers",
+    context
+  )
+
+def numpy_array(result):
+  # A NumArray sharing the memory of a NumPy result
+  if result.dtype.kind in 'biu':
+    data = memoryview(numpy.ascontiguousarray(result, dtype=numpy.int64))
+    return NumArray(data if data.format == 'q' else data.cast('B').cast('q'))
+  return NumArray(memoryview(numpy.ascontiguousarray(result, dtype=numpy.float64)))
+
+#######################################
+# FILES
+#######################################
+
+# Files are read and written a line or a chunk at a time, so a script can
+# stream a file of any size in constant memory. Text is UTF-8, with bytes
+# that don't decode replaced rather than failing the read.
+FILE_ENCODING = 'utf-8'
+
+# Size of the buffer behind files open for writing; write_lines hands the
+# lines to it in one writelines call instead of a write per line
+WRITE_BUFFER_SIZE = 1 << 20
+
+class File(Value):
+  __slots__ = ('path', 'handle')
+
+  def __init__(self, path, handle):
+    super().__init__()
+    self.path = path
+    self.handle = handle
+
+  def is_true(self):
+    return not self.handle.closed
+
+  def copy(self):
+    copy = File(self.path, self.handle)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
+
+  def __repr__(self):
+    return f'<file "{self.path}">'
+
+def file_lines(handle):
+  # The lines of handle without their line endings, closing it at the end
+  with handle:
+    for line in handle:
+      yield line[:-1] if line.endswith('\n') else line
+
+class LineIterator(Value):
+  # The lines of a file, read one at a time as a `for ... in` loop asks for
+  # them. Like a Python iterator it can be looped over only once.
+  __slots__ = ('path', 'lines')
+
+  def __init__(self, path, lines):
+    super().__init__()
+    self.path = path
+    self.lines = lines
+
+  def copy(self):
+    copy = LineIterator(self.path, self.lines)
+    copy.set_pos(self.pos_start, self.pos_end)
+    copy.set_context(self.context)
+    return copy
+
+  def __repr__(self):
+    return f'<lines of "{self.path}">'
+
+def read_file_lines(lines, origin, context):
+  # A LineIterator's lines as Strings, with read errors raised at origin
+  try:
+    for line in lines:
+      yield String(line)
+  except (OSError, ValueError) as e:
+    raise RTError(
+      origin.pos_start, origin.pos_end,
+      "Failed to read file\n" + str(e),
+      context
+    )
+
+def iterate(value, origin, context):
+  # A Python iterator over the values a `for ... in` loop gives its variable
+  if isinstance(value, List):
+    # Later changes to the list copy its buffer first, so the loop sees
+    # the list as it was when the loop started
+    value.shared = True
+    return islice(value.buffer, value.length)
+  if isinstance(value, String):
+    return map(String, value.value)
+  if isinstance(value, Map):
+    return (key for key, _ in value.entries.values())
+  if isinstance(value, Set):
+    return iter(value.items.values())
+  if isinstance(value, NumArray):
+    return map(make_number, value.data)
+  if isinstance(value, LineIterator):
+    return read_file_lines(value.lines, origin, context)
+  raise RTError(
+    origin.pos_start, origin.pos_end,
+    "Can only loop over a list, string, map, set, array or file lines",
+    context
+  )
+
 class BaseFunction(Value):
+  __slots__ = ('name', 'layout', 'namespace')
+
   def __init__(self, name):
     super().__init__()
     self.name = name or "<anonymous>"
+    self.layout = None
+    self.namespace = None
 
   def generate_new_context(self):
     new_context = Context(self.name, self.context, self.pos_start)
-    new_context.symbol_table = SymbolTable(new_context.parent.symbol_table)
+    new_context.symbol_table = SymbolTable(new_context.parent.symbol_table, self.layout, self.namespace)
     return new_context
 
   def check_args(self, arg_names, args):
-    res = RTResult()
-
     if len(args) > len(arg_names):
-      return res.failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         f"{len(args) - len(arg_names)} too many args passed into {self}",
         self.context
-      ))
+      )
 
     if len(args) < len(arg_names):
-      return res.failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         f"{len(arg_names) - len(args)} too few args passed into {self}",
         self.context
-      ))
-
-    return res.success(None)
+      )
 
   def populate_args(self, arg_names, args, exec_ctx):
+    if self.layout:
+      values = exec_ctx.symbol_table.values
+      for slot, arg in zip(self.layout.arg_slots, args):
+        values[slot] = arg
+      return
+
     for i in range(len(args)):
-      arg_name = arg_names[i]
-      arg_value = args[i]
-      arg_value.set_context(exec_ctx)
-      exec_ctx.symbol_table.set(arg_name, arg_value)
+      exec_ctx.symbol_table.set(arg_names[i], args[i])
 
   def check_and_populate_args(self, arg_names, args, exec_ctx):
-    res = RTResult()
-    res.register(self.check_args(arg_names, args))
-    if res.should_return(): return res
+    self.check_args(arg_names, args)
     self.populate_args(arg_names, args, exec_ctx)
-    return res.success(None)
   
 class ErrorValue(Value):
+  __slots__ = ('error', 'properties')
+  property_names = ("message", "line", "column", "file")
+
   def __init__(self, error):
     super().__init__()
     self.error = error
-    # Add quick-access properties
+    # Add quick-access properties (keep property_names in step)
     self.properties = {
       "message": String(f"{error.error_name}: {error.details}"),
       "line": Number(error.pos_start.ln + 1),
@@ -2128,28 +2711,36 @@ class ErrorValue(Value):
     return f"ErrorValue({self.error.error_name})"
 
 class Function(BaseFunction):
-  def __init__(self, name, body_node, arg_names, should_auto_return):
+  __slots__ = ('body_node', 'arg_names', 'should_auto_return', 'code')
+
+  def __init__(self, name, body_node, arg_names, should_auto_return, code=None, layout=None, namespace=None):
     super().__init__(name)
     self.body_node = body_node
     self.arg_names = arg_names
     self.should_auto_return = should_auto_return
+    # Compiled body, set when the function was defined by the VM
+    self.code = code
+    # Frame slots of the body, set when the definition was resolved
+    self.layout = layout
+    # Table of the module the function was defined in
+    self.namespace = namespace
 
   def execute(self, args):
-    res = RTResult()
-    interpreter = Interpreter()
     exec_ctx = self.generate_new_context()
+    self.check_and_populate_args(self.arg_names, args, exec_ctx)
 
-    res.register(self.check_and_populate_args(self.arg_names, args, exec_ctx))
-    if res.should_return(): return res
-
-    value = res.register(interpreter.visit(self.body_node, exec_ctx))
-    if res.should_return() and res.func_return_value == None: return res
+    try:
+      if self.code:
+        value = VM().run(self.code, exec_ctx)
+      else:
+        value = Interpreter().visit(self.body_node, exec_ctx)
+    except ReturnSignal as signal:
+      return signal.value
 
-    ret_value = (value if self.should_auto_return else None) or res.func_return_value or Number.null
-    return res.success(ret_value)
+    return (value if self.should_auto_return else None) or Number.null
 
   def copy(self):
-    copy = Function(self.name, self.body_node, self.arg_names, self.should_auto_return)
+    copy = Function(self.name, self.body_node, self.arg_names, self.should_auto_return, self.code, self.layout, self.namespace)
     copy.set_context(self.context)
     copy.set_pos(self.pos_start, self.pos_end)
     return copy
@@ -2158,25 +2749,26 @@ class Function(BaseFunction):
     return f"<function {self.name}>"
 
 class AsyncFunction(BaseFunction):
-  def __init__(self, name, body_node, arg_names, should_auto_return):
+  __slots__ = ('body_node', 'arg_names', 'should_auto_return', 'code')
+
+  def __init__(self, name, body_node, arg_names, should_auto_return, code=None, layout=None, namespace=None):
     super().__init__(name)
     self.body_node = body_node
     self.arg_names = arg_names
     self.should_auto_return = should_auto_return
+    self.code = code
+    self.layout = layout
+    self.namespace = namespace
       
   def execute(self, args):
-    res = RTResult()
-    interpreter = Interpreter()
     exec_ctx = self.generate_new_context()
-    
-    res.register(self.check_and_populate_args(self.arg_names, args, exec_ctx))
-    if res.should_return(): return res
+    self.check_and_populate_args(self.arg_names, args, exec_ctx)
     
     # Return a coroutine instead of executing immediately
-    return res.success(AsyncCoroutine(self, exec_ctx))
+    return AsyncCoroutine(self, exec_ctx)
       
   def copy(self):
-    copy = AsyncFunction(self.name, self.body_node, self.arg_names, self.should_auto_return)
+    copy = AsyncFunction(self.name, self.body_node, self.arg_names, self.should_auto_return, self.code, self.layout, self.namespace)
     copy.set_context(self.context)
     copy.set_pos(self.pos_start, self.pos_end)
     return copy
@@ -2185,102 +2777,365 @@ class AsyncFunction(BaseFunction):
     return f"<async function {self.name}>"
 
 class AsyncCoroutine(Value):
-    def __init__(self, coro):
+    # One call of an async function. It starts running as an event loop
+    # task the first time it is awaited or passed to run_async, and every
+    # later await waits on that same task
+    __slots__ = ('func', 'exec_ctx', 'task')
+
+    def __init__(self, func, exec_ctx):
         super().__init__()
-        self.coro = coro
-        
+        self.func = func
+        self.exec_ctx = exec_ctx
+        self.task = None
+
+    def start(self):
+        if self.task is None:
+            self.task = event_loop.loop.create_task(self.execute_async())
+            event_loop.started.append(self.task)
+        return self.task
+
+    def finished(self):
+        # Waits for the task without tying it to the waiter: cancelling
+        # a waiter (race, with_timeout) leaves the awaited task running
+        return asyncio.wait({self.start()})
+
+    def outcome(self, node, context):
+        # The finished task's value; raises its error if it failed
+        if self.task.cancelled():
+            raise RTError(
+                node.pos_start, node.pos_end,
+                f"{self!r} was cancelled",
+                context
+            )
+        return self.task.result()
+
     async def execute_async(self):
-        return await self.coro
-        
-    def execute(self):
-        # Run the coroutine in the event loop
-        future = asyncio.run_coroutine_threadsafe(self.execute_async(), event_loop.loop)
-        return future.result()
-        
+        # The body suspends by yielding an awaitable (a sleep or another
+        # task); whatever that resolves to, or raises, is passed back in
+        steps = AsyncInterpreter().run_body(self.func, self.exec_ctx)
+        value = None
+        error = None
+
+        while True:
+            try:
+                awaitable = steps.send(value) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            except ControlSignal:
+                return Number.null
+
+            try:
+                value = await awaitable
+                error = None
+            except Error as caught:
+                value = None
+                error = caught
+
     def copy(self):
-        copy = AsyncCoroutine(self.coro)
-        copy.set_context(self.context)
-        copy.set_pos(self.pos_start, self.pos_end)
-        return copy
-      
+        # Copies share the task, so awaiting either one waits for the same run
+        return self
+
     def __repr__(self):
       return f"<coroutine {self.func.name}>"
 
+class AsyncOperation(AsyncCoroutine):
+    # A coroutine made by a builtin (gather, race, with_timeout) that runs
+    # a Python coroutine instead of a function body
+    __slots__ = ('name', 'operation')
+
+    def __init__(self, name, operation):
+        Value.__init__(self)
+        self.name = name
+        self.operation = operation
+        self.task = None
+
+    async def execute_async(self):
+        return await self.operation()
+
+    def __repr__(self):
+      return f"<coroutine {self.name}>"
+
 class EventLoop:
+    # Tasks run on the calling thread, one at a time, whenever the program
+    # waits: on a top-level await or sleep, and when run() finishes, which
+    # keeps the loop going until every task started so far is done
     def __init__(self):
-        self.loop = asyncio.new_event_loop()
-        self.thread = threading.Thread(target=self.run_loop, daemon=True)
-        
-    def start(self):
-        self.thread.start()
-        
-    def run_loop(self):
-        asyncio.set_event_loop(self.loop)
-        self.loop.run_forever()
-        
+        self.asyncio_loop = None
+        # run_async tasks, whose errors nobody else will see
+        self.pending = []
+        # Every coroutine task, including ones nobody waits for any more
+        self.started = []
+
+    @property
+    def loop(self):
+        # Scripts without async code never pay for asyncio or its loop
+        global asyncio
+        if self.asyncio_loop is None:
+            import asyncio
+            self.asyncio_loop = asyncio.new_event_loop()
+            atexit.register(self.stop)
+        return self.asyncio_loop
+
+    def is_running(self):
+        return self.asyncio_loop is not None and self.asyncio_loop.is_running()
+
     def stop(self):
-        self.loop.call_soon_threadsafe(self.loop.stop)
-        
-    def submit(self, coroutine, callback=None):
+        if self.asyncio_loop is not None:
+            self.asyncio_loop.close()
+
+    def submit(self, coroutine, callback, node, context):
         async def run_and_callback():
-            result = await coroutine.execute_async()
+            await coroutine.finished()
+            result = coroutine.outcome(node, context)
             if callback:
                 callback(result)
             return result
-                
-        asyncio.run_coroutine_threadsafe(run_and_callback(), self.loop)
 
-event_loop = EventLoop()
-event_loop.start()
+        self.pending.append(self.loop.create_task(run_and_callback()))
 
-# Add cleanup handler
-import atexit
-atexit.register(event_loop.stop)
+    def wait(self, coroutine, node, context):
+        if self.is_running():
+            # Plain code inside a task has no way to give the loop back
+            raise RTError(
+                node.pos_start, node.pos_end,
+                "Cannot await here while tasks are running, only inside an async function",
+                context
+            )
+        self.loop.run_until_complete(coroutine.finished())
+        return coroutine.outcome(node, context)
+
+    def sleep(self, seconds):
+        if self.asyncio_loop is None or self.asyncio_loop.is_running():
+            # Nothing else to run, or plain code inside a task, which
+            # blocks every task while it sleeps
+            time.sleep(seconds)
+        else:
+            self.asyncio_loop.run_until_complete(asyncio.sleep(seconds))
+
+    def cancel_pending(self):
+        # Drops the tasks a program left behind, such as those of one that
+        # failed before run_pending could finish them
+        tasks = self.pending + self.started
+        self.pending, self.started = [], []
+        if not tasks or self.is_running(): return
+
+        for task in tasks:
+            task.cancel()
+        self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+
+    def run_pending(self):
+        # Nested runs (awake, imports) inside a task leave this to the
+        # outermost one
+        if self.is_running(): return
+
+        while self.pending or self.started:
+            pending, self.pending = self.pending, []
+            started, self.started = self.started, []
+            self.loop.run_until_complete(self.join(pending, started))
+
+    async def join(self, pending, started):
+        first_error = None
+        for task in pending:
+            try:
+                await task
+            except Error as error:
+                first_error = first_error or error
+
+        # Tasks left behind (race losers) get to finish; their errors were
+        # either seen by whoever awaited them or are of no interest
+        unfinished = [task for task in started if not task.done()]
+        if unfinished:
+            await asyncio.wait(unfinished)
+        for task in started:
+            if not task.cancelled(): task.exception()
+
+        if first_error: raise first_error
+
+event_loop = EventLoop()
 
 class BuiltInFunction(BaseFunction):
+  __slots__ = ()
+
   def __init__(self, name):
     super().__init__(name)
 
   def execute(self, args):
-    res = RTResult()
     exec_ctx = self.generate_new_context()
 
     method_name = f'execute_{self.name}'
     method = getattr(self, method_name, self.no_visit_method)
 
-    res.register(self.check_and_populate_args(method.arg_names, args, exec_ctx))
-    if res.should_return(): return res
-
-    return_value = res.register(method(exec_ctx))
-    if res.should_return(): return res
-    return res.success(return_value)
+    self.check_and_populate_args(method.arg_names, args, exec_ctx)
+    return method(exec_ctx)
   
   def execute_run_async(self, exec_ctx):
     coroutine = exec_ctx.symbol_table.get("coroutine")
     callback = exec_ctx.symbol_table.get("callback")
     
     if not isinstance(coroutine, AsyncCoroutine):
-        return RTResult().failure(RTError(
+        raise RTError(
             self.pos_start, self.pos_end,
             "First argument must be a coroutine",
             exec_ctx
-        ))
+        )
         
     if callback and not isinstance(callback, BaseFunction):
-        return RTResult().failure(RTError(
+        raise RTError(
             self.pos_start, self.pos_end,
             "Second argument must be a function",
             exec_ctx
-        ))
+        )
     
     def cb(result):
         if callback:
             callback.execute([result])
     
-    event_loop.submit(coroutine, cb if callback else None)
-    return RTResult().success(Number.null)
+    event_loop.submit(coroutine, cb if callback else None, self, exec_ctx)
+    return Number.null
   execute_run_async.arg_names = ["coroutine", "callback"]
 
+  def coroutine_list(self, exec_ctx):
+    tasks = exec_ctx.symbol_table.get("tasks")
+
+    if not isinstance(tasks, List):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "Argument must be a list of coroutines",
+        exec_ctx
+      )
+
+    for task in tasks.elements:
+      if not isinstance(task, AsyncCoroutine):
+        raise RTError(
+          self.pos_start, self.pos_end,
+          f"Expected coroutines, got {task!r}",
+          exec_ctx
+        )
+
+    return list(tasks.elements)
+
+  def execute_gather(self, exec_ctx):
+    coroutines = self.coroutine_list(exec_ctx)
+
+    # Results in list order; the first task to fail fails the whole gather
+    async def gather():
+      if coroutines:
+        await asyncio.wait([coroutine.start() for coroutine in coroutines], return_when=asyncio.FIRST_EXCEPTION)
+
+      for coroutine in coroutines:
+        if coroutine.task.done() and not coroutine.task.cancelled() and coroutine.task.exception():
+          raise coroutine.task.exception()
+
+      return List([coroutine.outcome(self, exec_ctx) for coroutine in coroutines]).set_context(exec_ctx)
+
+    return AsyncOperation("gather", gather)
+  execute_gather.arg_names = ["tasks"]
+
+  def execute_race(self, exec_ctx):
+    coroutines = self.coroutine_list(exec_ctx)
+
+    if not coroutines:
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "Cannot race an empty list",
+        exec_ctx
+      )
+
+    # The outcome of whichever task finishes first; the others keep running
+    async def race():
+      done, _ = await asyncio.wait([coroutine.start() for coroutine in coroutines], return_when=asyncio.FIRST_COMPLETED)
+
+      for coroutine in coroutines:
+        if coroutine.task in done:
+          return coroutine.outcome(self, exec_ctx)
+
+    return AsyncOperation("race", race)
+  execute_race.arg_names = ["tasks"]
+
+  def execute_with_timeout(self, exec_ctx):
+    coroutine = exec_ctx.symbol_table.get("task")
+    seconds = exec_ctx.symbol_table.get("seconds")
+
+    if not isinstance(coroutine, AsyncCoroutine):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "First argument must be a coroutine",
+        exec_ctx
+      )
+
+    if not isinstance(seconds, Number):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "Second argument must be a number",
+        exec_ctx
+      )
+
+    # The task's outcome, or an error once the time is up, which also
+    # cancels the task
+    async def with_timeout():
+      task = coroutine.start()
+      done, _ = await asyncio.wait({task}, timeout=seconds.value)
+
+      if not done:
+        task.cancel()
+        raise RTError(
+          self.pos_start, self.pos_end,
+          f"{coroutine!r} timed out after {seconds.value} seconds",
+          exec_ctx
+        )
+
+      return coroutine.outcome(self, exec_ctx)
+
+    return AsyncOperation("with_timeout", with_timeout)
+  execute_with_timeout.arg_names = ["task", "seconds"]
+
+  def execute_parallel_map(self, exec_ctx):
+    func = exec_ctx.symbol_table.get("fn")
+    list_ = exec_ctx.symbol_table.get("list")
+    workers = exec_ctx.symbol_table.get("workers")
+
+    if not isinstance(func, Function):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "First argument must be a function",
+        exec_ctx
+      )
+
+    if not isinstance(list_, List):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "Second argument must be list",
+        exec_ctx
+      )
+
+    if not isinstance(workers, Number) or workers.value < 0:
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "Third argument must be a worker count (0 for one per CPU)",
+        exec_ctx
+      )
+
+    elements = [to_plain(element) for element in list_.elements]
+    if any(element is None for element in elements):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "parallel_map can only send numbers, strings, lists and functions to workers",
+        exec_ctx
+      )
+
+    results, error = parallel_map(func, elements, int(workers.value) or os.cpu_count() or 1)
+
+    if error:
+      index, message = error
+      raise RTError(
+        self.pos_start, self.pos_end,
+        ("parallel_map failed" if index is None else f"{func} failed on element {index}") + "\n" + message,
+        exec_ctx
+      )
+
+    return List([result.set_context(exec_ctx) for result in results]).set_context(exec_ctx)
+  execute_parallel_map.arg_names = ["fn", "list", "workers"]
+
   def no_visit_method(self, node, context):
     raise Exception(f'No execute_{self.name} method defined')
 
@@ -2303,16 +3158,16 @@ class BuiltInFunction(BaseFunction):
 
   def execute_print(self, exec_ctx):
     print(str(exec_ctx.symbol_table.get('value')))
-    return RTResult().success(Number.null)
+    return Number.null
   execute_print.arg_names = ['value']
 
   def execute_print_ret(self, exec_ctx):
-    return RTResult().success(String(str(exec_ctx.symbol_table.get('value'))))
+    return String(str(exec_ctx.symbol_table.get('value')))
   execute_print_ret.arg_names = ['value']
 
   def execute_input(self, exec_ctx):
     text = input()
-    return RTResult().success(String(text))
+    return String(text)
   execute_input.arg_names = []
 
   def execute_input_int(self, exec_ctx):
@@ -2323,32 +3178,32 @@ class BuiltInFunction(BaseFunction):
         break
       except ValueError:
         print(f"'{text}' must be an integer. Try again!")
-    return RTResult().success(Number(number))
+    return Number(number)
   execute_input_int.arg_names = []
 
   def execute_clear(self, exec_ctx):
     os.system('cls' if os.name == 'nt' else 'cls')
-    return RTResult().success(Number.null)
+    return Number.null
   execute_clear.arg_names = []
 
   def execute_is_number(self, exec_ctx):
     is_number = isinstance(exec_ctx.symbol_table.get("value"), Number)
-    return RTResult().success(Number.true if is_number else Number.false)
+    return Number.true if is_number else Number.false
   execute_is_number.arg_names = ["value"]
 
   def execute_is_string(self, exec_ctx):
     is_number = isinstance(exec_ctx.symbol_table.get("value"), String)
-    return RTResult().success(Number.true if is_number else Number.false)
+    return Number.true if is_number else Number.false
   execute_is_string.arg_names = ["value"]
 
   def execute_is_list(self, exec_ctx):
     is_number = isinstance(exec_ctx.symbol_table.get("value"), List)
-    return RTResult().success(Number.true if is_number else Number.false)
+    return Number.true if is_number else Number.false
   execute_is_list.arg_names = ["value"]
 
   def execute_is_function(self, exec_ctx):
     is_number = isinstance(exec_ctx.symbol_table.get("value"), BaseFunction)
-    return RTResult().success(Number.true if is_number else Number.false)
+    return Number.true if is_number else Number.false
   execute_is_function.arg_names = ["value"]
 
   def execute_append(self, exec_ctx):
@@ -2356,14 +3211,14 @@ class BuiltInFunction(BaseFunction):
     value = exec_ctx.symbol_table.get("value")
 
     if not isinstance(list_, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "First argument must be list",
         exec_ctx
-      ))
+      )
 
-    list_.elements.append(value)
-    return RTResult().success(Number.null)
+    list_.append(value)
+    return Number.null
   execute_append.arg_names = ["list", "value"]
 
   def execute_pop(self, exec_ctx):
@@ -2371,28 +3226,28 @@ class BuiltInFunction(BaseFunction):
     index = exec_ctx.symbol_table.get("index")
 
     if not isinstance(list_, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "First argument must be list",
         exec_ctx
-      ))
+      )
 
     if not isinstance(index, Number):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Second argument must be number",
         exec_ctx
-      ))
+      )
 
     try:
-      element = list_.elements.pop(index.value)
+      element = list_.pop(index.value)
     except:
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         'Element at this index could not be removed from list because index is out of bounds',
         exec_ctx
-      ))
-    return RTResult().success(element)
+      )
+    return element
   execute_pop.arg_names = ["list", "index"]
 
   def execute_extend(self, exec_ctx):
@@ -2400,45 +3255,45 @@ class BuiltInFunction(BaseFunction):
     listB = exec_ctx.symbol_table.get("listB")
 
     if not isinstance(listA, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "First argument must be list",
         exec_ctx
-      ))
+      )
 
     if not isinstance(listB, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Second argument must be list",
         exec_ctx
-      ))
+      )
 
-    listA.elements.extend(listB.elements)
-    return RTResult().success(Number.null)
+    listA.extend(listB.elements)
+    return Number.null
   execute_extend.arg_names = ["listA", "listB"]
 
   def execute_len(self, exec_ctx):
     list_ = exec_ctx.symbol_table.get("list")
 
     if not isinstance(list_, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Argument must be list",
         exec_ctx
-      ))
+      )
 
-    return RTResult().success(Number(len(list_.elements)))
+    return Number(len(list_.elements))
   execute_len.arg_names = ["list"]
 
   def execute_run(self, exec_ctx):
     fn = exec_ctx.symbol_table.get("fn")
 
     if not isinstance(fn, String):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Second argument must be string",
         exec_ctx
-      ))
+      )
 
     fn = fn.value
 
@@ -2446,23 +3301,33 @@ class BuiltInFunction(BaseFunction):
       with open(fn, "r") as f:
         script = f.read()
     except Exception as e:
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         f"Failed to load script \"{fn}\"\n" + str(e),
         exec_ctx
-      ))
+      )
 
-    _, error = run(fn, script)
+    # The script runs the way the calling program does, and anything it
+    # queues with run_async waits for the end of that program
+    use_vm, optimize = program_options
+    node, error = parse_cache.parse(fn, script, optimize)
+    if not error:
+      try:
+        execute_program(node, use_vm)
+      except Error as e:
+        error = e
+      except ControlSignal:
+        pass
 
     if error:
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         f"Failed to finish executing script \"{fn}\"\n" +
         error.as_string(),
         exec_ctx
-      ))
+      )
 
-    return RTResult().success(Number.null)
+    return Number.null
   execute_run.arg_names = ["fn"]
 
   # *************************************************************
@@ -2476,36 +3341,34 @@ class BuiltInFunction(BaseFunction):
     listB = exec_ctx.symbol_table.get("listB")
 
     if not isinstance(listA, List) or not isinstance(listB, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Both arguments must be lists",
         exec_ctx
-      ))
+      )
 
-    new_list = listA.copy()
-    new_list.elements.extend(listB.elements)
-    return RTResult().success(new_list)
+    return listA.extended(listB.elements)
   execute_merge.arg_names = ["listA", "listB"]
 
   def execute_pop(self, exec_ctx):
     list_ = exec_ctx.symbol_table.get("list")
 
     if not isinstance(list_, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Argument must be list",
         exec_ctx
-      ))
+      )
 
     if len(list_.elements) == 0:
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Cannot pop from empty list",
         exec_ctx
-      ))
+      )
 
-    list_.elements.pop()
-    return RTResult().success(Number.null)
+    list_.pop()
+    return Number.null
   execute_pop.arg_names = ["list"]
 
   def execute_remove(self, exec_ctx):
@@ -2513,28 +3376,28 @@ class BuiltInFunction(BaseFunction):
     index = exec_ctx.symbol_table.get("index")
 
     if not isinstance(list_, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "First argument must be list",
         exec_ctx
-      ))
+      )
 
     if not isinstance(index, Number):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Second argument must be number",
         exec_ctx
-      ))
+      )
 
     try:
-        list_.elements.pop(index.value)
+      list_.pop(index.value)
     except IndexError:
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Index out of bounds",
         exec_ctx
-      ))
-    return RTResult().success(Number.null)
+      )
+    return Number.null
   execute_remove.arg_names = ["list", "index"]
 
   def execute_update(self, exec_ctx):
@@ -2543,55 +3406,61 @@ class BuiltInFunction(BaseFunction):
     value = exec_ctx.symbol_table.get("value")
 
     if not isinstance(list_, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "First argument must be list",
         exec_ctx
-      ))
+      )
 
     if not isinstance(index, Number):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Second argument must be number",
         exec_ctx
-      ))
+      )
 
     try:
-      list_.elements[index.value] = value
+      list_.set_item(index.value, value)
     except IndexError:
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Index out of bounds",
         exec_ctx
-      ))
-    return RTResult().success(Number.null)
+      )
+    return Number.null
   execute_update.arg_names = ["list", "index", "value"]
 
   def execute_len(self, exec_ctx):
     list_ = exec_ctx.symbol_table.get("list")
 
+    if isinstance(list_, Map):
+      return Number(len(list_.entries))
+    if isinstance(list_, Set):
+      return Number(len(list_.items))
+    if isinstance(list_, NumArray):
+      return Number(len(list_.data))
     if not isinstance(list_, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
-        "Argument must be list",
+        "Argument must be list, array, map or set",
         exec_ctx
-      ))
+      )
 
-    return RTResult().success(Number(len(list_.elements)))
+    return Number(len(list_.elements))
   execute_len.arg_names = ["list"]
 
   def execute_wipe(self, exec_ctx):
     list_ = exec_ctx.symbol_table.get("list")
 
     if not isinstance(list_, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Argument must be list",
         exec_ctx
-      ))
+      )
 
-    list_.elements = []
-    return RTResult().success(Number.null)
+    list_.clear()
+    return Number.null
   execute_wipe.arg_names = ["list"]
 
   def execute_contains(self, exec_ctx):
@@ -2599,189 +3468,195 @@ class BuiltInFunction(BaseFunction):
     element = exec_ctx.symbol_table.get("element")
 
     if not isinstance(list_, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "First argument must be list",
         exec_ctx
-      ))
+      )
 
-    found = any(
-      element.value == el.value if isinstance(el, (Number, String)) else element == el
-      for el in list_.elements
-    )
-    return RTResult().success(Number.true if found else Number.false)
+    found = hash_key(element) in map(hash_key, list_.elements)
+    return Number.true if found else Number.false
   execute_contains.arg_names = ["list", "element"]
 
   def execute_reverse(self, exec_ctx):
     list_ = exec_ctx.symbol_table.get("list")
 
     if not isinstance(list_, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Argument must be list",
         exec_ctx
-      ))
+      )
 
-    reversed_list = list_.copy()
-    reversed_list.elements = reversed_list.elements[::-1]
-    return RTResult().success(reversed_list)
+    return list_.with_elements(list_.elements[::-1])
   execute_reverse.arg_names = ["list"]
   
-  def execute_sleep(self, exec_ctx):
-    duration = exec_ctx.symbol_table.get("duration")
-    if not isinstance(duration, Number):
-        return RTResult().failure(RTError(
-            exec_ctx.pos_start, exec_ctx.pos_end,
-            "Sleep duration must be a number",
-            exec_ctx
-        ))
-    
-    # Return a coroutine that will sleep asynchronously
-    async def sleep_coroutine():
-        await asyncio.sleep(duration.value)
-        return Number.null
-        
-    return RTResult().success(AsyncCoroutine(sleep_coroutine))
-  execute_sleep.arg_names = ["duration"]
-
   def execute_sort(self, exec_ctx):
     list_ = exec_ctx.symbol_table.get("list")
 
     if not isinstance(list_, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Argument must be list",
         exec_ctx
-      ))
+      )
 
     try:
-      sorted_list = list_.copy()
-      sorted_list.elements = sorted(
-        sorted_list.elements,
+      return list_.with_elements(sorted(
+        list_.elements,
         key=lambda x: x.value if isinstance(x, (Number, String)) else str(x)
-      )
-      return RTResult().success(sorted_list)
+      ))
     except TypeError:
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Cannot sort list with mixed types",
         exec_ctx
-      ))
+      )
   execute_sort.arg_names = ["list"]
 
   def execute_sum(self, exec_ctx):
     list_ = exec_ctx.symbol_table.get("list")
 
+    if isinstance(list_, NumArray):
+      return Number(sum(list_.data))
+
     if not isinstance(list_, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Argument must be list",
         exec_ctx
-      ))
+      )
 
     total = 0
     for element in list_.elements:
       if not isinstance(element, Number):
-        return RTResult().failure(RTError(
+        raise RTError(
           self.pos_start, self.pos_end,
           "All elements must be numbers",
           exec_ctx
-        ))
+        )
       total += element.value
 
-    return RTResult().success(Number(total))
+    return Number(total)
   execute_sum.arg_names = ["list"]
 
   def execute_average(self, exec_ctx):
     list_ = exec_ctx.symbol_table.get("list")
 
+    if isinstance(list_, NumArray):
+      if len(list_.data) == 0:
+        raise RTError(
+          self.pos_start, self.pos_end,
+          "Cannot calculate average of empty array",
+          exec_ctx
+        )
+      return Number(sum(list_.data) / len(list_.data))
+
     if not isinstance(list_, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Argument must be list",
         exec_ctx
-      ))
+      )
 
     if len(list_.elements) == 0:
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Cannot calculate average of empty list",
         exec_ctx
-      ))
+      )
 
     total = 0
     for element in list_.elements:
       if not isinstance(element, Number):
-        return RTResult().failure(RTError(
+        raise RTError(
           self.pos_start, self.pos_end,
           "All elements must be numbers",
           exec_ctx
-        ))
+        )
       total += element.value
 
-    return RTResult().success(Number(total / len(list_.elements)))
+    return Number(total / len(list_.elements))
   execute_average.arg_names = ["list"]
 
   def execute_min(self, exec_ctx):
     list_ = exec_ctx.symbol_table.get("list")
 
+    if isinstance(list_, NumArray):
+      if len(list_.data) == 0:
+        raise RTError(
+          self.pos_start, self.pos_end,
+          "Cannot find min of empty array",
+          exec_ctx
+        )
+      return Number(min(list_.data))
+
     if not isinstance(list_, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Argument must be list",
         exec_ctx
-      ))
+      )
 
     if len(list_.elements) == 0:
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Cannot find min of empty list",
         exec_ctx
-      ))
+      )
 
     min_val = None
     for element in list_.elements:
       if not isinstance(element, Number):
-        return RTResult().failure(RTError(
+        raise RTError(
           self.pos_start, self.pos_end,
           "All elements must be numbers",
           exec_ctx
-        ))
+        )
       if min_val is None or element.value < min_val:
         min_val = element.value
 
-    return RTResult().success(Number(min_val))
+    return Number(min_val)
   execute_min.arg_names = ["list"]
 
   def execute_max(self, exec_ctx):
     list_ = exec_ctx.symbol_table.get("list")
 
+    if isinstance(list_, NumArray):
+      if len(list_.data) == 0:
+        raise RTError(
+          self.pos_start, self.pos_end,
+          "Cannot find max of empty array",
+          exec_ctx
+        )
+      return Number(max(list_.data))
+
     if not isinstance(list_, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Argument must be list",
         exec_ctx
-      ))
+      )
 
     if len(list_.elements) == 0:
-      return RTResult().failure(RTError(
+      raise RTError(
           self.pos_start, self.pos_end,
           "Cannot find max of empty list",
           exec_ctx
-      ))
+      )
 
     max_val = None
     for element in list_.elements:
         if not isinstance(element, Number):
-            return RTResult().failure(RTError(
+            raise RTError(
                 self.pos_start, self.pos_end,
                 "All elements must be numbers",
                 exec_ctx
-            ))
+            )
         if max_val is None or element.value > max_val:
             max_val = element.value
 
-    return RTResult().success(Number(max_val))
+    return Number(max_val)
   execute_max.arg_names = ["list"]
 
   def execute_count(self, exec_ctx):
@@ -2789,21 +3664,13 @@ class BuiltInFunction(BaseFunction):
       element = exec_ctx.symbol_table.get("element")
 
       if not isinstance(list_, List):
-          return RTResult().failure(RTError(
+          raise RTError(
               self.pos_start, self.pos_end,
               "First argument must be list",
               exec_ctx
-          ))
+          )
 
-      count = 0
-      for el in list_.elements:
-          if isinstance(element, (Number, String)) and isinstance(el, (Number, String)):
-              if element.value == el.value:
-                  count += 1
-          elif element == el:
-              count += 1
-
-      return RTResult().success(Number(count))
+      return Number(operator.countOf(map(hash_key, list_.elements), hash_key(element)))
   execute_count.arg_names = ["list", "element"]
 
   def execute_push(self, exec_ctx):
@@ -2811,14 +3678,14 @@ class BuiltInFunction(BaseFunction):
       value = exec_ctx.symbol_table.get("value")
 
       if not isinstance(list_, List):
-          return RTResult().failure(RTError(
+          raise RTError(
               self.pos_start, self.pos_end,
               "First argument must be list",
               exec_ctx
-          ))
+          )
 
-      list_.elements.append(value)
-      return RTResult().success(Number.null)
+      list_.append(value)
+      return Number.null
   execute_push.arg_names = ["list", "value"]
 
   #####################################
@@ -2829,72 +3696,72 @@ class BuiltInFunction(BaseFunction):
       x = exec_ctx.symbol_table.get("x")
 
       if not isinstance(x, Number):
-          return RTResult().failure(RTError(
+          raise RTError(
               self.pos_start, self.pos_end,
               "Argument must be number",
               exec_ctx
-          ))
+          )
 
-      return RTResult().success(Number(abs(x.value)))
+      return Number(abs(x.value))
   execute_abs.arg_names = ["x"]
 
   def execute_round(self, exec_ctx):
       x = exec_ctx.symbol_table.get("x")
 
       if not isinstance(x, Number):
-          return RTResult().failure(RTError(
+          raise RTError(
               self.pos_start, self.pos_end,
               "Argument must be number",
               exec_ctx
-          ))
+          )
 
-      return RTResult().success(Number(round(x.value)))
+      return Number(round(x.value))
   execute_round.arg_names = ["x"]
 
   def execute_ceil(self, exec_ctx):
       x = exec_ctx.symbol_table.get("x")
 
       if not isinstance(x, Number):
-          return RTResult().failure(RTError(
+          raise RTError(
               self.pos_start, self.pos_end,
               "Argument must be number",
               exec_ctx
-          ))
+          )
 
-      return RTResult().success(Number(math.ceil(x.value)))
+      return Number(math.ceil(x.value))
   execute_ceil.arg_names = ["x"]
 
   def execute_floor(self, exec_ctx):
       x = exec_ctx.symbol_table.get("x")
 
       if not isinstance(x, Number):
-          return RTResult().failure(RTError(
+          raise RTError(
               self.pos_start, self.pos_end,
               "Argument must be number",
               exec_ctx
-          ))
+          )
 
-      return RTResult().success(Number(math.floor(x.value)))
+      return Number(math.floor(x.value))
   execute_floor.arg_names = ["x"]
 
   def execute_sqrt(self, exec_ctx):
       x = exec_ctx.symbol_table.get("x")
 
       if not isinstance(x, Number):
-          return RTResult().failure(RTError(
+          raise RTError(
               self.pos_start, self.pos_end,
               "Argument must be number",
               exec_ctx
-          ))
+          )
 
       if x.value < 0:
-          return RTResult().failure(RTError(
+          raise RTError(
               self.pos_start, self.pos_end,
               "Cannot take square root of negative number",
               exec_ctx
-          ))
+          )
 
-      return RTResult().success(Number(math.sqrt(x.value)))
+      return Number(math.sqrt(x.value))
   execute_sqrt.arg_names = ["x"]
 
   def execute_power(self, exec_ctx):
@@ -2902,13 +3769,13 @@ class BuiltInFunction(BaseFunction):
       y = exec_ctx.symbol_table.get("y")
 
       if not isinstance(x, Number) or not isinstance(y, Number):
-          return RTResult().failure(RTError(
+          raise RTError(
               self.pos_start, self.pos_end,
               "Both arguments must be numbers",
               exec_ctx
-          ))
+          )
 
-      return RTResult().success(Number(x.value ** y.value))
+      return Number(x.value ** y.value)
   execute_power.arg_names = ["x", "y"]
 
   #####################################
@@ -2924,6 +3791,16 @@ class BuiltInFunction(BaseFunction):
           type_name = "string"
       elif isinstance(value, List):
           type_name = "list"
+      elif isinstance(value, Map):
+          type_name = "map"
+      elif isinstance(value, Set):
+          type_name = "set"
+      elif isinstance(value, NumArray):
+          type_name = "array"
+      elif isinstance(value, File):
+          type_name = "file"
+      elif isinstance(value, LineIterator):
+          type_name = "lines"
       elif isinstance(value, BaseFunction):
           type_name = "function"
       elif isinstance(value, ErrorValue):
@@ -2931,12 +3808,12 @@ class BuiltInFunction(BaseFunction):
       else:
           type_name = "null"
           
-      return RTResult().success(String(type_name))
+      return String(type_name)
   execute_type_of.arg_names = ["value"]
 
   def execute_str(self, exec_ctx):
       value = exec_ctx.symbol_table.get("value")
-      return RTResult().success(String(str(value)))
+      return String(str(value))
   execute_str.arg_names = ["value"]
 
   def execute_int(self, exec_ctx):
@@ -2945,21 +3822,21 @@ class BuiltInFunction(BaseFunction):
       if isinstance(value, String):
           try:
               num = int(value.value)
-              return RTResult().success(Number(num))
+              return Number(num)
           except ValueError:
-              return RTResult().failure(RTError(
+              raise RTError(
                   self.pos_start, self.pos_end,
                   "Could not convert string to integer",
                   exec_ctx
-              ))
+              )
       elif isinstance(value, Number):
-          return RTResult().success(Number(int(value.value)))
+          return Number(int(value.value))
       else:
-          return RTResult().failure(RTError(
+          raise RTError(
               self.pos_start, self.pos_end,
               "Cannot convert to integer",
               exec_ctx
-          ))
+          )
   execute_int.arg_names = ["value"]
 
   def execute_float(self, exec_ctx):
@@ -2968,21 +3845,21 @@ class BuiltInFunction(BaseFunction):
       if isinstance(value, String):
           try:
               num = float(value.value)
-              return RTResult().success(Number(num))
+              return Number(num)
           except ValueError:
-              return RTResult().failure(RTError(
+              raise RTError(
                   self.pos_start, self.pos_end,
                   "Could not convert string to float",
                   exec_ctx
-              ))
+              )
       elif isinstance(value, Number):
-          return RTResult().success(Number(float(value.value)))
+          return Number(float(value.value))
       else:
-          return RTResult().failure(RTError(
+          raise RTError(
               self.pos_start, self.pos_end,
               "Cannot convert to float",
               exec_ctx
-          ))
+          )
   execute_float.arg_names = ["value"]
 
   #####################################
@@ -2993,65 +3870,65 @@ class BuiltInFunction(BaseFunction):
       string = exec_ctx.symbol_table.get("string")
 
       if not isinstance(string, String):
-          return RTResult().failure(RTError(
+          raise RTError(
               self.pos_start, self.pos_end,
               "Argument must be string",
               exec_ctx
-          ))
+          )
 
-      return RTResult().success(String(string.value.upper()))
+      return String(string.value.upper())
   execute_upper.arg_names = ["string"]
 
   def execute_lower(self, exec_ctx):
       string = exec_ctx.symbol_table.get("string")
 
       if not isinstance(string, String):
-          return RTResult().failure(RTError(
+          raise RTError(
               self.pos_start, self.pos_end,
               "Argument must be string",
               exec_ctx
-          ))
+          )
 
-      return RTResult().success(String(string.value.lower()))
+      return String(string.value.lower())
   execute_lower.arg_names = ["string"]
 
   def execute_strip(self, exec_ctx):
       string = exec_ctx.symbol_table.get("string")
 
       if not isinstance(string, String):
-          return RTResult().failure(RTError(
+          raise RTError(
               self.pos_start, self.pos_end,
               "Argument must be string",
               exec_ctx
-          ))
+          )
 
-      return RTResult().success(String(string.value.strip()))
+      return String(string.value.strip())
   execute_strip.arg_names = ["string"]
 
   def execute_reverse_str(self, exec_ctx):
       string = exec_ctx.symbol_table.get("string")
 
       if not isinstance(string, String):
-          return RTResult().failure(RTError(
+          raise RTError(
               self.pos_start, self.pos_end,
               "Argument must be string",
               exec_ctx
-          ))
+          )
 
-      return RTResult().success(String(string.value[::-1]))
+      return String(string.value[::-1])
   execute_reverse_str.arg_names = ["string"]
 
   def execute_len_str(self, exec_ctx):
       string = exec_ctx.symbol_table.get("string")
 
       if not isinstance(string, String):
-          return RTResult().failure(RTError(
+          raise RTError(
               self.pos_start, self.pos_end,
               "Argument must be string",
               exec_ctx
-          ))
+          )
 
-      return RTResult().success(Number(len(string.value)))
+      return Number(len(string.value))
   execute_len_str.arg_names = ["string"]
 
   #####################################
@@ -3062,566 +3939,3104 @@ class BuiltInFunction(BaseFunction):
     n = exec_ctx.symbol_table.get("n")
 
     if not isinstance(n, Number):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Argument must be number",
         exec_ctx
-      ))
+      )
 
     if n.value <= 1:
-      return RTResult().success(Number.false)
+      return Number.false
     if n.value <= 3:
-      return RTResult().success(Number.true)
+      return Number.true
     if n.value % 2 == 0 or n.value % 3 == 0:
-      return RTResult().success(Number.false)
+      return Number.false
 
     i = 5
     while i * i <= n.value:
       if n.value % i == 0 or n.value % (i + 2) == 0:
-        return RTResult().success(Number.false)
+        return Number.false
       i += 6
 
-    return RTResult().success(Number.true)
+    return Number.true
   execute_is_prime.arg_names = ["n"]
 
   def execute_unique(self, exec_ctx):
     list_ = exec_ctx.symbol_table.get("list")
 
     if not isinstance(list_, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Argument must be list",
         exec_ctx
-      ))
+      )
 
-    seen = []
-    unique_elements = []
+    # The first element for each key, in order
+    first = {}
     for element in list_.elements:
-      if isinstance(element, (Number, String)):
-        if element.value not in seen:
-          seen.append(element.value)
-          unique_elements.append(element)
-      elif element not in seen:
-        seen.append(element)
-        unique_elements.append(element)
-
-    new_list = List(unique_elements)
-    return RTResult().success(new_list)
+      first.setdefault(hash_key(element), element)
+
+    return List(list(first.values()))
   execute_unique.arg_names = ["list"]
 
   def execute_shuffle(self, exec_ctx):
     list_ = exec_ctx.symbol_table.get("list")
 
     if not isinstance(list_, List):
-      return RTResult().failure(RTError(
+      raise RTError(
         self.pos_start, self.pos_end,
         "Argument must be list",
         exec_ctx
-      ))
+      )
 
-    shuffled = list_.copy()
-    random.shuffle(shuffled.elements)
-    return RTResult().success(shuffled)
+    elements = list(list_.elements)
+    random.shuffle(elements)
+    return list_.with_elements(elements)
   execute_shuffle.arg_names = ["list"]
 
+  #####################################
+  # MAP AND SET METHODS
+  #####################################
 
-#####################################
-# EXTRA CUSTOM IN-BUILT FUNCTIONS *************************
-#####################################
-
-BuiltInFunction.print       = BuiltInFunction("print")
-BuiltInFunction.print_ret   = BuiltInFunction("print_ret")
-BuiltInFunction.input       = BuiltInFunction("input")
-BuiltInFunction.input_int   = BuiltInFunction("input_int")
-BuiltInFunction.clear       = BuiltInFunction("clear")
-BuiltInFunction.is_number   = BuiltInFunction("is_number")
-BuiltInFunction.is_string   = BuiltInFunction("is_string")
-BuiltInFunction.is_list     = BuiltInFunction("is_list")
-BuiltInFunction.is_function = BuiltInFunction("is_function")
-BuiltInFunction.append      = BuiltInFunction("append")
-BuiltInFunction.pop         = BuiltInFunction("pop")
-BuiltInFunction.extend      = BuiltInFunction("extend")
-BuiltInFunction.len					= BuiltInFunction("len")
-BuiltInFunction.run					= BuiltInFunction("run")
+  def execute_get(self, exec_ctx):
+    map_ = exec_ctx.symbol_table.get("map")
+    key = exec_ctx.symbol_table.get("key")
 
-#####################################
-# CUSTOM IN-BUILT FUNCTIONS *********************************
-#####################################
+    if not isinstance(map_, Map):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "First argument must be map",
+        exec_ctx
+      )
 
-BuiltInFunction.merge       = BuiltInFunction("merge")
-BuiltInFunction.pop         = BuiltInFunction("pop")
-BuiltInFunction.remove      = BuiltInFunction("remove")
-BuiltInFunction.update      = BuiltInFunction("update")
-BuiltInFunction.len         = BuiltInFunction("len")
-BuiltInFunction.wipe        = BuiltInFunction("wipe")
-BuiltInFunction.contains    = BuiltInFunction("contains")
-BuiltInFunction.reverse     = BuiltInFunction("reverse")
-BuiltInFunction.sort        = BuiltInFunction("sort")
-BuiltInFunction.sum         = BuiltInFunction("sum")
-BuiltInFunction.average     = BuiltInFunction("average")
-BuiltInFunction.min         = BuiltInFunction("min")
-BuiltInFunction.max         = BuiltInFunction("max")
-BuiltInFunction.count       = BuiltInFunction("count")
-BuiltInFunction.push        = BuiltInFunction("push")
-BuiltInFunction.abs         = BuiltInFunction("abs")
-BuiltInFunction.round       = BuiltInFunction("round")
-BuiltInFunction.ceil        = BuiltInFunction("ceil")
-BuiltInFunction.floor       = BuiltInFunction("floor")
-BuiltInFunction.sqrt        = BuiltInFunction("sqrt")
-BuiltInFunction.power       = BuiltInFunction("power")
-BuiltInFunction.type_of     = BuiltInFunction("type_of")
-BuiltInFunction.str         = BuiltInFunction("str")
-BuiltInFunction.int         = BuiltInFunction("int")
-BuiltInFunction.float       = BuiltInFunction("float")
-BuiltInFunction.upper       = BuiltInFunction("upper")
-BuiltInFunction.lower       = BuiltInFunction("lower")
-BuiltInFunction.strip       = BuiltInFunction("strip")
-BuiltInFunction.reverse_str = BuiltInFunction("reverse_str")
-BuiltInFunction.len_str     = BuiltInFunction("len_str")
-BuiltInFunction.is_prime    = BuiltInFunction("is_prime")
-BuiltInFunction.unique      = BuiltInFunction("unique")
-BuiltInFunction.shuffle     = BuiltInFunction("shuffle")
+    entry = map_.entries.get(require_key(key, self, exec_ctx))
+    if entry is None:
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "Key not found in map",
+        exec_ctx
+      )
+    return entry[1]
+  execute_get.arg_names = ["map", "key"]
 
-#######################################
-# CONTEXT
-#######################################
+  def execute_set(self, exec_ctx):
+    map_ = exec_ctx.symbol_table.get("map")
+    key = exec_ctx.symbol_table.get("key")
+    value = exec_ctx.symbol_table.get("value")
 
-class Context:
-  def __init__(self, display_name, parent=None, parent_entry_pos=None):
-    self.display_name = display_name
-    self.parent = parent
-    self.parent_entry_pos = parent_entry_pos
-    self.symbol_table = None
+    if not isinstance(map_, Map):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "First argument must be map",
+        exec_ctx
+      )
 
-#######################################
-# SYMBOL TABLE
-#######################################
+    map_.entries[require_key(key, self, exec_ctx)] = (key, value)
+    return Number.null
+  execute_set.arg_names = ["map", "key", "value"]
 
-class SymbolTable:
-  def __init__(self, parent=None):
-    self.symbols = {}
-    self.parent = parent
+  def execute_add(self, exec_ctx):
+    set_ = exec_ctx.symbol_table.get("set")
+    value = exec_ctx.symbol_table.get("value")
 
-  def get(self, name):
-    value = self.symbols.get(name, None)
-    if value == None and self.parent:
-      return self.parent.get(name)
-    return value
+    if not isinstance(set_, Set):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "First argument must be set",
+        exec_ctx
+      )
 
-  def set(self, name, value):
-    self.symbols[name] = value
+    set_.items.setdefault(require_key(value, self, exec_ctx), value)
+    return Number.null
+  execute_add.arg_names = ["set", "value"]
 
-  def remove(self, name):
-    del self.symbols[name]
+  def execute_has(self, exec_ctx):
+    collection = exec_ctx.symbol_table.get("collection")
+    key = exec_ctx.symbol_table.get("key")
 
-#######################################
-# INTERPRETER
-#######################################
+    if isinstance(collection, Map):
+      table = collection.entries
+    elif isinstance(collection, Set):
+      table = collection.items
+    else:
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "First argument must be map or set",
+        exec_ctx
+      )
 
-class Interpreter:
-  def visit(self, node, context):
-    method_name = f'visit_{type(node).__name__}'
-    method = getattr(self, method_name, self.no_visit_method)
-    return method(node, context)
+    return Number.true if require_key(key, self, exec_ctx) in table else Number.false
+  execute_has.arg_names = ["collection", "key"]
 
-  def no_visit_method(self, node, context):
-    raise Exception(f'No visit_{type(node).__name__} method defined')
+  def execute_delete(self, exec_ctx):
+    collection = exec_ctx.symbol_table.get("collection")
+    key = exec_ctx.symbol_table.get("key")
 
-  ###################################
+    if isinstance(collection, Map):
+      table = collection.entries
+    elif isinstance(collection, Set):
+      table = collection.items
+    else:
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "First argument must be map or set",
+        exec_ctx
+      )
 
-  def visit_NumberNode(self, node, context):
-    return RTResult().success(
-      Number(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end)
+    try:
+      del table[require_key(key, self, exec_ctx)]
+    except KeyError:
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "Key not found",
+        exec_ctx
+      )
+    return Number.null
+  execute_delete.arg_names = ["collection", "key"]
+
+  def execute_keys(self, exec_ctx):
+    collection = exec_ctx.symbol_table.get("collection")
+
+    if isinstance(collection, Map):
+      return List([key for key, _ in collection.entries.values()])
+    elif isinstance(collection, Set):
+      return List(list(collection.items.values()))
+    raise RTError(
+      self.pos_start, self.pos_end,
+      "Argument must be map or set",
+      exec_ctx
     )
+  execute_keys.arg_names = ["collection"]
 
-  def visit_StringNode(self, node, context):
-    return RTResult().success(
-      String(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end)
-    )
-  
-  def visit_TryNode(self, node, context):
-    res = RTResult()
-    
-    # Execute try block
-    try_value = res.register(self.visit(node.try_body, context))
-    
-    # Only execute catch block if there was an error
-    if res.error:
-        error_value = ErrorValue(res.error).set_context(context)
-        
-        # Store the error object and its properties
-        context.symbol_table.set(node.catch_var.value, error_value)
-        for prop_name, prop_value in error_value.properties.items():
-            context.symbol_table.set(f"{node.catch_var.value}_{prop_name}", prop_value)
-        
-        # Clear the error so we can execute the catch block
-        res.error = None
-        catch_value = res.register(self.visit(node.catch_body, context))
-        if res.error: return res
-        
-        # Return the catch block's result
-        return res.success(catch_value)
-    
-    # Return the try block's result if no error occurred
-    return res.success(try_value)
-  
-  def visit_ListNode(self, node, context):
-    res = RTResult()
-    elements = []
+  def execute_values(self, exec_ctx):
+    map_ = exec_ctx.symbol_table.get("map")
 
-    for element_node in node.element_nodes:
-      elements.append(res.register(self.visit(element_node, context)))
-      if res.should_return(): return res
+    if not isinstance(map_, Map):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "Argument must be map",
+        exec_ctx
+      )
 
-    return res.success(
-      List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
-    )
+    return List([value for _, value in map_.entries.values()])
+  execute_values.arg_names = ["map"]
 
-  def visit_VarAccessNode(self, node, context):
-    res = RTResult()
-    var_name = node.var_name_tok.value
-    value = context.symbol_table.get(var_name)
+  def execute_to_set(self, exec_ctx):
+    list_ = exec_ctx.symbol_table.get("list")
 
-    if not value:
-      return res.failure(RTError(
-        node.pos_start, node.pos_end,
-        f"'{var_name}' is not defined",
-        context
-      ))
+    if not isinstance(list_, List):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "Argument must be list",
+        exec_ctx
+      )
 
-    value = value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
-    return res.success(value)
+    items = {}
+    for element in list_.elements:
+      items.setdefault(require_key(element, self, exec_ctx), element)
+    return Set(items)
+  execute_to_set.arg_names = ["list"]
 
-  def visit_VarAssignNode(self, node, context):
-    res = RTResult()
-    var_name = node.var_name_tok.value
-    value = res.register(self.visit(node.value_node, context))
-    if res.should_return(): return res
+  #####################################
+  # ARRAY METHODS
+  #####################################
 
-    context.symbol_table.set(var_name, value)
-    return res.success(value)
+  def execute_to_array(self, exec_ctx):
+    list_ = exec_ctx.symbol_table.get("list")
+
+    if not isinstance(list_, List):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "Argument must be list",
+        exec_ctx
+      )
+
+    values = []
+    for element in list_.elements:
+      if not isinstance(element, Number):
+        raise RTError(
+          self.pos_start, self.pos_end,
+          "All elements must be numbers",
+          exec_ctx
+        )
+      values.append(element.value)
+
+    return NumArray(make_array(values))
+  execute_to_array.arg_names = ["list"]
+
+  def execute_to_list(self, exec_ctx):
+    array_ = exec_ctx.symbol_table.get("array")
+
+    if not isinstance(array_, NumArray):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "Argument must be array",
+        exec_ctx
+      )
+
+    return List([make_number(value) for value in array_.data.tolist()])
+  execute_to_list.arg_names = ["array"]
+
+  def execute_slice(self, exec_ctx):
+    array_ = exec_ctx.symbol_table.get("array")
+    start = exec_ctx.symbol_table.get("start")
+    end = exec_ctx.symbol_table.get("end")
+
+    if not isinstance(array_, NumArray):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "First argument must be array",
+        exec_ctx
+      )
+
+    if not isinstance(start, Number) or not isinstance(end, Number):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "Start and end must be numbers",
+        exec_ctx
+      )
+
+    # A view of the same numbers, not a copy
+    return NumArray(array_.data[int(start.value):int(end.value)])
+  execute_slice.arg_names = ["array", "start", "end"]
+
+  #####################################
+  # VECTOR METHODS
+  #####################################
+
+  def vector_arguments(self, exec_ctx, numbers=True):
+    # The numbers of a and of b, a memoryview each, except that b can be
+    # a plain number if numbers is set
+    a = vector_data(exec_ctx.symbol_table.get("a"), self, exec_ctx)
+    b = exec_ctx.symbol_table.get("b")
+    if numbers and isinstance(b, Number):
+      return a, b.value
+
+    b = vector_data(b, self, exec_ctx)
+    if len(b) != len(a):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "Arrays must have the same length",
+        exec_ctx
+      )
+    return a, b
+
+  def vector_operation(self, exec_ctx, operation, numpy_operation):
+    a, b = self.vector_arguments(exec_ctx)
+    np = load_numpy()
+
+    if np is None:
+      other = NumArray(b) if isinstance(b, memoryview) else Number(b)
+      other.set_pos(self.pos_start, self.pos_end).set_context(exec_ctx)
+      result, error = NumArray(a).set_context(exec_ctx).combined(operation, other)
+      if error: raise error
+      return result
+
+    if isinstance(b, memoryview): b = np.asarray(b)
+    if operation is operator.truediv and not np.all(b):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        'Division by zero',
+        exec_ctx
+      )
+    return numpy_array(getattr(np, numpy_operation)(np.asarray(a), b))
+
+  def vector_reduction(self, exec_ctx, reduce_, numpy_reduce, allow_empty=False):
+    a = vector_data(exec_ctx.symbol_table.get("a"), self, exec_ctx)
+    if len(a) == 0 and not allow_empty:
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "Cannot reduce an empty array",
+        exec_ctx
+      )
+
+    np = load_numpy()
+    if np is None:
+      return Number(reduce_(a))
+    return Number(getattr(np, numpy_reduce)(np.asarray(a)).item())
+
+  def execute_vec_add(self, exec_ctx):
+    return self.vector_operation(exec_ctx, operator.add, 'add')
+  execute_vec_add.arg_names = ["a", "b"]
+
+  def execute_vec_sub(self, exec_ctx):
+    return self.vector_operation(exec_ctx, operator.sub, 'subtract')
+  execute_vec_sub.arg_names = ["a", "b"]
+
+  def execute_vec_mul(self, exec_ctx):
+    return self.vector_operation(exec_ctx, operator.mul, 'multiply')
+  execute_vec_mul.arg_names = ["a", "b"]
+
+  def execute_vec_div(self, exec_ctx):
+    return self.vector_operation(exec_ctx, operator.truediv, 'true_divide')
+  execute_vec_div.arg_names = ["a", "b"]
+
+  def execute_vec_dot(self, exec_ctx):
+    a, b = self.vector_arguments(exec_ctx, False)
+
+    np = load_numpy()
+    if np is None:
+      return Number(sum(map(operator.mul, a, b)))
+    return Number(np.dot(np.asarray(a), np.asarray(b)).item())
+  execute_vec_dot.arg_names = ["a", "b"]
+
+  def execute_vec_sum(self, exec_ctx):
+    return self.vector_reduction(exec_ctx, sum, 'sum', True)
+  execute_vec_sum.arg_names = ["a"]
+
+  def execute_vec_mean(self, exec_ctx):
+    return self.vector_reduction(exec_ctx, lambda data: sum(data) / len(data), 'mean')
+  execute_vec_mean.arg_names = ["a"]
+
+  def execute_vec_min(self, exec_ctx):
+    return self.vector_reduction(exec_ctx, min, 'min')
+  execute_vec_min.arg_names = ["a"]
+
+  def execute_vec_max(self, exec_ctx):
+    return self.vector_reduction(exec_ctx, max, 'max')
+  execute_vec_max.arg_names = ["a"]
+
+  def execute_vec_sort(self, exec_ctx):
+    a = vector_data(exec_ctx.symbol_table.get("a"), self, exec_ctx)
+
+    np = load_numpy()
+    if np is None:
+      return NumArray(array(a.format, sorted(a)))
+    return numpy_array(np.sort(np.asarray(a)))
+  execute_vec_sort.arg_names = ["a"]
+
+  def execute_vec_cumsum(self, exec_ctx):
+    a = vector_data(exec_ctx.symbol_table.get("a"), self, exec_ctx)
+
+    np = load_numpy()
+    if np is None:
+      if a.format == 'q':
+        try:
+          return NumArray(array('q', accumulate(a)))
+        except OverflowError:
+          pass
+      return NumArray(array('d', accumulate(a)))
+    return numpy_array(np.cumsum(np.asarray(a)))
+  execute_vec_cumsum.arg_names = ["a"]
+
+  #####################################
+  # FILE METHODS
+  #####################################
+
+  def open_file(self, exec_ctx, path, mode):
+    # path opened in mode ('r' or 'w'), with OS errors as RTErrors
+    if not isinstance(path, String):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "Path must be a string",
+        exec_ctx
+      )
+
+    try:
+      if mode == 'w':
+        return open(path.value, mode, encoding=FILE_ENCODING, errors='replace', buffering=WRITE_BUFFER_SIZE)
+      return open(path.value, mode, encoding=FILE_ENCODING, errors='replace')
+    except OSError as e:
+      raise RTError(
+        self.pos_start, self.pos_end,
+        f"Failed to open file \"{path.value}\"\n" + str(e),
+        exec_ctx
+      )
+
+  def require_file(self, exec_ctx, file):
+    if not isinstance(file, File):
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "First argument must be a file",
+        exec_ctx
+      )
+    return file
+
+  def execute_open_read(self, exec_ctx):
+    path = exec_ctx.symbol_table.get("path")
+    handle = self.open_file(exec_ctx, path, 'r')
+    return File(path.value, handle)
+  execute_open_read.arg_names = ["path"]
+
+  def execute_open_write(self, exec_ctx):
+    path = exec_ctx.symbol_table.get("path")
+    handle = self.open_file(exec_ctx, path, 'w')
+    return File(path.value, handle)
+  execute_open_write.arg_names = ["path"]
+
+  def execute_read_lines(self, exec_ctx):
+    # Nothing is read until the lines are looped over, and then only a
+    # line at a time. A path is opened now, so a missing file fails here.
+    source = exec_ctx.symbol_table.get("file")
+
+    if isinstance(source, File):
+      return LineIterator(source.path, file_lines(source.handle))
+    handle = self.open_file(exec_ctx, source, 'r')
+    return LineIterator(source.value, file_lines(handle))
+  execute_read_lines.arg_names = ["file"]
+
+  def execute_read_chunk(self, exec_ctx):
+    # Up to n characters from the file, or "" at the end of it
+    file = self.require_file(exec_ctx, exec_ctx.symbol_table.get("file"))
+    n = exec_ctx.symbol_table.get("n")
+
+    if not isinstance(n, Number) or n.value < 0:
+      raise RTError(
+        self.pos_start, self.pos_end,
+        "Second argument must be a non-negative number",
+        exec_ctx
+      )
+
+    try:
+      return String(file.handle.read(int(n.value)))
+    except (OSError, ValueError) as e:
+      raise RTError(
+        self.pos_start, self.pos_end,
+        f"Failed to read file \"{file.path}\"\n" + str(e),
+        exec_ctx
+      )
+  execute_read_chunk.arg_names = ["file", "n"]
+
+  def execute_write_lines(self, exec_ctx):
+    # Writes each value of lines (anything a `for ... in` loop takes) and
+    # a newline after it. A path is opened, written and closed; an open
+    # file stays open for more writes. Returns the number of lines.
+    target = exec_ctx.symbol_table.get("file")
+    lines = exec_ctx.symbol_table.get("lines")
+
+    if isinstance(target, File):
+      path, handle = target.path, target.handle
+    else:
+      handle = self.open_file(exec_ctx, target, 'w')
+      path = target.value
+
+    count = 0
+    def terminated():
+      nonlocal count
+      for line in iterate(lines, self, exec_ctx):
+        count += 1
+        yield f"{line}\n"
+
+    try:
+      handle.writelines(terminated())
+    except (OSError, ValueError) as e:
+      raise RTError(
+        self.pos_start, self.pos_end,
+        f"Failed to write file \"{path}\"\n" + str(e),
+        exec_ctx
+      )
+    finally:
+      if not isinstance(target, File):
+        handle.close()
+
+    return Number(count)
+  execute_write_lines.arg_names = ["file", "lines"]
+
+  def execute_close(self, exec_ctx):
+    # Flushes what is buffered and closes the file
+    file = self.require_file(exec_ctx, exec_ctx.symbol_table.get("file"))
+
+    try:
+      file.handle.close()
+    except OSError as e:
+      raise RTError(
+        self.pos_start, self.pos_end,
+        f"Failed to close file \"{file.path}\"\n" + str(e),
+        exec_ctx
+      )
+    return Number.null
+  execute_close.arg_names = ["file"]
+
+
+#####################################
+# EXTRA CUSTOM IN-BUILT FUNCTIONS *************************
+#####################################
+
+BuiltInFunction.print       = BuiltInFunction("print")
+BuiltInFunction.print_ret   = BuiltInFunction("print_ret")
+BuiltInFunction.input       = BuiltInFunction("input")
+BuiltInFunction.input_int   = BuiltInFunction("input_int")
+BuiltInFunction.clear       = BuiltInFunction("clear")
+BuiltInFunction.is_number   = BuiltInFunction("is_number")
+BuiltInFunction.is_string   = BuiltInFunction("is_string")
+BuiltInFunction.is_list     = BuiltInFunction("is_list")
+BuiltInFunction.is_function = BuiltInFunction("is_function")
+BuiltInFunction.append      = BuiltInFunction("append")
+BuiltInFunction.pop         = BuiltInFunction("pop")
+BuiltInFunction.extend      = BuiltInFunction("extend")
+BuiltInFunction.len					= BuiltInFunction("len")
+BuiltInFunction.run					= BuiltInFunction("run")
+
+#####################################
+# CUSTOM IN-BUILT FUNCTIONS *********************************
+#####################################
+
+BuiltInFunction.merge       = BuiltInFunction("merge")
+BuiltInFunction.pop         = BuiltInFunction("pop")
+BuiltInFunction.remove      = BuiltInFunction("remove")
+BuiltInFunction.update      = BuiltInFunction("update")
+BuiltInFunction.len         = BuiltInFunction("len")
+BuiltInFunction.wipe        = BuiltInFunction("wipe")
+BuiltInFunction.contains    = BuiltInFunction("contains")
+BuiltInFunction.reverse     = BuiltInFunction("reverse")
+BuiltInFunction.sort        = BuiltInFunction("sort")
+BuiltInFunction.sum         = BuiltInFunction("sum")
+BuiltInFunction.average     = BuiltInFunction("average")
+BuiltInFunction.min         = BuiltInFunction("min")
+BuiltInFunction.max         = BuiltInFunction("max")
+BuiltInFunction.count       = BuiltInFunction("count")
+BuiltInFunction.push        = BuiltInFunction("push")
+BuiltInFunction.abs         = BuiltInFunction("abs")
+BuiltInFunction.round       = BuiltInFunction("round")
+BuiltInFunction.ceil        = BuiltInFunction("ceil")
+BuiltInFunction.floor       = BuiltInFunction("floor")
+BuiltInFunction.sqrt        = BuiltInFunction("sqrt")
+BuiltInFunction.power       = BuiltInFunction("power")
+BuiltInFunction.type_of     = BuiltInFunction("type_of")
+BuiltInFunction.str         = BuiltInFunction("str")
+BuiltInFunction.int         = BuiltInFunction("int")
+BuiltInFunction.float       = BuiltInFunction("float")
+BuiltInFunction.upper       = BuiltInFunction("upper")
+BuiltInFunction.lower       = BuiltInFunction("lower")
+BuiltInFunction.strip       = BuiltInFunction("strip")
+BuiltInFunction.reverse_str = BuiltInFunction("reverse_str")
+BuiltInFunction.len_str     = BuiltInFunction("len_str")
+BuiltInFunction.is_prime    = BuiltInFunction("is_prime")
+BuiltInFunction.unique      = BuiltInFunction("unique")
+BuiltInFunction.shuffle     = BuiltInFunction("shuffle")
+BuiltInFunction.get         = BuiltInFunction("get")
+BuiltInFunction.set         = BuiltInFunction("set")
+BuiltInFunction.add         = BuiltInFunction("add")
+BuiltInFunction.has         = BuiltInFunction("has")
+BuiltInFunction.delete      = BuiltInFunction("delete")
+BuiltInFunction.keys        = BuiltInFunction("keys")
+BuiltInFunction.values      = BuiltInFunction("values")
+BuiltInFunction.to_set      = BuiltInFunction("to_set")
+BuiltInFunction.to_array    = BuiltInFunction("to_array")
+BuiltInFunction.to_list     = BuiltInFunction("to_list")
+BuiltInFunction.slice       = BuiltInFunction("slice")
+BuiltInFunction.vec_add     = BuiltInFunction("vec_add")
+BuiltInFunction.vec_sub     = BuiltInFunction("vec_sub")
+BuiltInFunction.vec_mul     = BuiltInFunction("vec_mul")
+BuiltInFunction.vec_div     = BuiltInFunction("vec_div")
+BuiltInFunction.vec_dot     = BuiltInFunction("vec_dot")
+BuiltInFunction.vec_sum     = BuiltInFunction("vec_sum")
+BuiltInFunction.vec_mean    = BuiltInFunction("vec_mean")
+BuiltInFunction.vec_min     = BuiltInFunction("vec_min")
+BuiltInFunction.vec_max     = BuiltInFunction("vec_max")
+BuiltInFunction.vec_sort    = BuiltInFunction("vec_sort")
+BuiltInFunction.vec_cumsum  = BuiltInFunction("vec_cumsum")
+BuiltInFunction.open_read   = BuiltInFunction("open_read")
+BuiltInFunction.open_write  = BuiltInFunction("open_write")
+BuiltInFunction.read_lines  = BuiltInFunction("read_lines")
+BuiltInFunction.read_chunk  = BuiltInFunction("read_chunk")
+BuiltInFunction.write_lines = BuiltInFunction("write_lines")
+BuiltInFunction.close       = BuiltInFunction("close")
+
+#######################################
+# CONTEXT
+#######################################
+
+class Context:
+  def __init__(self, display_name, parent=None, parent_entry_pos=None):
+    self.display_name = display_name
+    self.parent = parent
+    self.parent_entry_pos = parent_entry_pos
+    self.symbol_table = None
+
+#######################################
+# SYMBOL TABLE
+#######################################
+
+# Every name a resolved function frame can bind. Scoping is dynamic, so a
+# lookup walks the frames of the whole call chain; names outside this set
+# can only live in the tables below those frames and skip straight to them.
+frame_names = set()
+
+class FrameLayout:
+  __slots__ = ('slots', 'arg_slots')
+
+  def __init__(self, slots, arg_names):
+    self.slots = slots
+    self.arg_slots = [slots[arg_name] for arg_name in arg_names]
+
+class SymbolTable:
+  __slots__ = ('symbols', 'parent', 'slots', 'values', 'globals', 'namespace')
+
+  def __init__(self, parent=None, layout=None, namespace=None):
+    self.symbols = {}
+    self.parent = parent
+
+    # A resolved function frame keeps its locals in values, indexed by the
+    # slots the Resolver gave each name, and points past itself to the
+    # nearest table that holds anything else. Names the whole call chain
+    # lacks are looked up last in the namespace the function was defined
+    # in, except that a module's namespace comes before its callers (see
+    # get_in_module).
+    if layout:
+      self.slots = layout.slots
+      self.values = [None] * len(layout.slots)
+      self.globals = parent.globals
+      self.namespace = namespace
+    else:
+      self.slots = None
+      self.values = None
+      self.globals = self
+      self.namespace = self
+
+  def get(self, name):
+    namespace = self.namespace
+    if namespace is not self and namespace is not None and namespace.parent is not None:
+      return self.get_in_module(name)
+
+    table = self
+
+    if name not in frame_names:
+      while table:
+        table = table.globals
+        value = table.symbols.get(name)
+        if value is not None:
+          return value
+        table = table.parent
+      return self.get_from_namespace(name)
+
+    while table:
+      slot = table.slots.get(name) if table.slots else None
+      value = table.symbols.get(name) if slot is None else table.values[slot]
+      if value is not None:
+        return value
+      table = table.parent
+    return self.get_from_namespace(name)
+
+  def get_in_module(self, name):
+    # A frame of a function defined in a module: the module's own frames
+    # and names come before anything of whoever called into the module
+    namespace = self.namespace
+    table = self
+    while table and table.slots is not None and table.namespace is namespace:
+      slot = table.slots.get(name)
+      value = table.symbols.get(name) if slot is None else table.values[slot]
+      if value is not None:
+        return value
+      table = table.parent
+
+    value = namespace.get(name)
+    if value is not None or table is None:
+      return value
+    return table.get(name)
+
+  def get_from_namespace(self, name):
+    namespace = self.namespace
+    if namespace is None or namespace is self:
+      return None
+    return namespace.get(name)
+
+  def set(self, name, value):
+    slot = self.slots.get(name) if self.slots else None
+    if slot is None:
+      self.symbols[name] = value
+    else:
+      self.values[slot] = value
+
+  def remove(self, name):
+    slot = self.slots.get(name) if self.slots else None
+    if slot is None:
+      del self.symbols[name]
+    else:
+      self.values[slot] = None
+
+#######################################
+# OPTIMIZER
+#######################################
+
+# Optional pass between parsing and the Resolver. It folds operations on
+# literals (arithmetic, string concatenation, comparisons), drops if/elif
+# cases whose condition is a constant and statements that follow a
+# release, break or continue in the same block. An operation is only
+# folded when doing it now succeeds, so anything that fails at runtime
+# still fails there, at its own position. True, False, Null and MATH_PI
+# count as constants unless the program binds them itself.
+
+CONSTANT_NAMES = ('True', 'False', 'Null', 'MATH_PI')
+
+# Folded strings past this length stay as expressions
+MAX_FOLDED_STRING = 4096
+# Nor are int powers whose result could take more bits than this
+MAX_FOLDED_BITS = 4096
+
+class Optimizer:
+  def optimize(self, node):
+    bound = set()
+    self.collect_bound_names(node, bound)
+    self.constants = {
+      name: global_symbol_table.symbols[name]
+      for name in CONSTANT_NAMES if name not in bound
+    }
+    self.interpreter = Interpreter()
+    return self.visit(node)
+
+  def collect_bound_names(self, value, bound):
+    if isinstance(value, (list, tuple)):
+      for item in value:
+        self.collect_bound_names(item, bound)
+      return
+    if not isinstance(value, Node): return
+
+    if isinstance(value, (VarAssignNode, ForNode, ForInNode, FuncDefNode)) and value.var_name_tok:
+      bound.add(value.var_name_tok.value)
+    if isinstance(value, FuncDefNode):
+      bound.update(arg_name.value for arg_name in value.arg_name_toks)
+    if isinstance(value, TryNode):
+      bound.add(value.catch_var.value)
+    if isinstance(value, ImportNode):
+      bound.update(alias for _, alias in value.imports)
+
+    for child in value.fields():
+      self.collect_bound_names(child, bound)
+
+  def visit(self, node):
+    method = getattr(self, f'optimize_{type(node).__name__}', None)
+    return method(node) if method else node
+
+  def constant(self, node):
+    # The value node always evaluates to, or None
+    if isinstance(node, NumberNode):
+      return Number(node.tok.value)
+    if isinstance(node, StringNode):
+      return String(node.tok.value)
+    if isinstance(node, VarAccessNode):
+      return self.constants.get(node.var_name_tok.value)
+    return None
+
+  def literal(self, value, node):
+    # A literal for value spanning node, or None if value has none
+    if isinstance(value, Number) and type(value.value) in (int, float):
+      type_ = TT_INT if isinstance(value.value, int) else TT_FLOAT
+      return NumberNode(Token(type_, value.value, node.source, node.start, node.end))
+    if isinstance(value, String) and len(value.value) <= MAX_FOLDED_STRING:
+      return StringNode(Token(TT_STRING, value.value, node.source, node.start, node.end))
+    return None
+
+  ###################################
+
+  def optimize_ListNode(self, node):
+    elements = []
+    for element_node in node.element_nodes:
+      elements.append(self.visit(element_node))
+
+      # Nothing after these in a block can run. List literals can't hold
+      # them, so this only ever trims statement lists
+      if isinstance(elements[-1], (ReturnNode, BreakNode, ContinueNode)):
+        break
+
+    node.element_nodes = elements
+    return node
+
+  def optimize_MapNode(self, node):
+    node.key_nodes = [self.visit(key_node) for key_node in node.key_nodes]
+    node.value_nodes = [self.visit(value_node) for value_node in node.value_nodes]
+    return node
+
+  def optimize_SetNode(self, node):
+    node.element_nodes = [self.visit(element_node) for element_node in node.element_nodes]
+    return node
+
+  def optimize_VarAssignNode(self, node):
+    node.value_node = self.visit(node.value_node)
+    return node
+
+  def optimize_BinOpNode(self, node):
+    node.left_node = self.visit(node.left_node)
+    node.right_node = self.visit(node.right_node)
+
+    left = self.constant(node.left_node)
+    right = self.constant(node.right_node)
+    if left is None or right is None: return node
+
+    if self.too_large_to_fold(node.op_tok.type, left, right): return node
+
+    try:
+      result, error = self.interpreter.binary_operation(node.op_tok, left, right)
+    except Exception:
+      return node
+    if error: return node
+
+    return self.literal(result, node) or node
+
+  def too_large_to_fold(self, op, left, right):
+    # Whether left op right would pass the caps, judged before building it
+    if op == TT_POW:
+      # b^e takes at most e times as many bits as b. Float powers overflow
+      # rather than grow, and negative exponents give floats.
+      if isinstance(left, Number) and isinstance(right, Number):
+        if type(left.value) is int and type(right.value) is int:
+          return right.value * left.value.bit_length() > MAX_FOLDED_BITS
+      return False
+    if isinstance(left, String):
+      if op == TT_MUL and isinstance(right, Number):
+        return len(left.value) * right.value > MAX_FOLDED_STRING
+      if op == TT_PLUS:
+        return len(left.value) + len(str(right)) > MAX_FOLDED_STRING
+    return False
+
+  def optimize_UnaryOpNode(self, node):
+    node.node = self.visit(node.node)
+
+    value = self.constant(node.node)
+    if value is None: return node
+
+    try:
+      result, error = self.interpreter.unary_operation(node.op_tok, value)
+    except Exception:
+      return node
+    if error: return node
+
+    return self.literal(result, node) or node
+
+  def optimize_IfNode(self, node):
+    cases = []
+    for condition, expr, should_return_null in node.cases:
+      condition = self.visit(condition)
+      expr = self.visit(expr)
+      value = self.constant(condition)
+
+      if value is None:
+        cases.append((condition, expr, should_return_null))
+      elif value.is_true():
+        # Later cases and the else can never run
+        if not cases and not should_return_null:
+          return expr
+        cases.append((condition, expr, should_return_null))
+        node.cases = cases
+        node.else_case = None
+        return node
+
+    else_case = None
+    if node.else_case:
+      expr, should_return_null = node.else_case
+      else_case = (self.visit(expr), should_return_null)
+
+    if cases:
+      node.cases = cases
+      node.else_case = else_case
+      return node
+
+    # Every condition was constant and false
+    if else_case:
+      expr, should_return_null = else_case
+      if not should_return_null: return expr
+      node.cases = [(self.literal(Number.true, expr), expr, True)]
+      node.else_case = None
+      return node
+    return self.literal(Number.null, node)
+
+  def optimize_ForNode(self, node):
+    node.start_value_node = self.visit(node.start_value_node)
+    node.end_value_node = self.visit(node.end_value_node)
+    if node.step_value_node:
+      node.step_value_node = self.visit(node.step_value_node)
+    node.body_node = self.visit(node.body_node)
+    return node
+
+  def optimize_ForInNode(self, node):
+    node.iterable_node = self.visit(node.iterable_node)
+    node.body_node = self.visit(node.body_node)
+    return node
+
+  def optimize_WhileNode(self, node):
+    node.condition_node = self.visit(node.condition_node)
+    node.body_node = self.visit(node.body_node)
+    return node
+
+  def optimize_TryNode(self, node):
+    node.try_body = self.visit(node.try_body)
+    node.catch_body = self.visit(node.catch_body)
+    return node
+
+  def optimize_FuncDefNode(self, node):
+    node.body_node = self.visit(node.body_node)
+    return node
+
+  def optimize_CallNode(self, node):
+    node.node_to_call = self.visit(node.node_to_call)
+    node.arg_nodes = [self.visit(arg_node) for arg_node in node.arg_nodes]
+    return node
+
+  def optimize_ReturnNode(self, node):
+    if node.node_to_return:
+      node.node_to_return = self.visit(node.node_to_return)
+    return node
+
+  def optimize_AsyncNode(self, node):
+    node.node = self.visit(node.node)
+    return node
+
+  def optimize_AwaitNode(self, node):
+    node.node = self.visit(node.node)
+    return node
+
+  def optimize_SleepNode(self, node):
+    node.duration_node = self.visit(node.duration_node)
+    return node
+
+#######################################
+# RESOLVER
+#######################################
+
+# Runs between parsing and execution. Every name a function body binds
+# (arguments, assignments, loop and catch variables, nested definitions
+# and imports) gets a slot in that function's frame, and the reads and
+# writes of those names are tagged with it. Anything else stays a lookup
+# by name: top-level code, and names the function reads from its caller.
+
+class Resolver:
+  def resolve(self, node):
+    self.slots = None
+    self.uses = None
+    # Names this tree's functions bind, already added to frame_names
+    self.frame_names = set()
+    self.visit(node)
+    return node
+
+  def visit(self, node):
+    method_name = f'resolve_{type(node).__name__}'
+    method = getattr(self, method_name, self.no_resolve_method)
+    method(node)
+
+  def no_resolve_method(self, node):
+    raise Exception(f'No resolve_{type(node).__name__} method defined')
+
+  def declare(self, name):
+    if self.slots is not None and name not in self.slots:
+      self.slots[name] = len(self.slots)
+      self.frame_names.add(name)
+      frame_names.add(name)
+
+  def use(self, node):
+    if self.uses is not None:
+      self.uses.append(node)
+
+  ###################################
+
+  def resolve_NumberNode(self, node):
+    pass
+
+  def resolve_StringNode(self, node):
+    pass
+
+  def resolve_ListNode(self, node):
+    for element_node in node.element_nodes:
+      self.visit(element_node)
+
+  def resolve_MapNode(self, node):
+    for key_node, value_node in zip(node.key_nodes, node.value_nodes):
+      self.visit(key_node)
+      self.visit(value_node)
+
+  def resolve_SetNode(self, node):
+    for element_node in node.element_nodes:
+      self.visit(element_node)
+
+  def resolve_VarAccessNode(self, node):
+    self.use(node)
+
+  def resolve_VarAssignNode(self, node):
+    self.visit(node.value_node)
+    self.declare(node.var_name_tok.value)
+    self.use(node)
+
+  def resolve_BinOpNode(self, node):
+    self.visit(node.left_node)
+    self.visit(node.right_node)
+
+  def resolve_UnaryOpNode(self, node):
+    self.visit(node.node)
+
+  def resolve_IfNode(self, node):
+    for condition, expr, _ in node.cases:
+      self.visit(condition)
+      self.visit(expr)
+
+    if node.else_case:
+      self.visit(node.else_case[0])
+
+  def resolve_ForNode(self, node):
+    self.visit(node.start_value_node)
+    self.visit(node.end_value_node)
+    if node.step_value_node:
+      self.visit(node.step_value_node)
+    self.declare(node.var_name_tok.value)
+    self.use(node)
+    self.visit(node.body_node)
+
+  def resolve_ForInNode(self, node):
+    self.visit(node.iterable_node)
+    self.declare(node.var_name_tok.value)
+    self.use(node)
+    self.visit(node.body_node)
+
+  def resolve_WhileNode(self, node):
+    self.visit(node.condition_node)
+    self.visit(node.body_node)
+
+  def resolve_TryNode(self, node):
+    self.visit(node.try_body)
+    catch_name = node.catch_var.value
+    self.declare(catch_name)
+    for prop_name in ErrorValue.property_names:
+      self.declare(f"{catch_name}_{prop_name}")
+    self.visit(node.catch_body)
+
+  def resolve_FuncDefNode(self, node):
+    if node.var_name_tok:
+      self.declare(node.var_name_tok.value)
+
+    outer = self.slots, self.uses
+    self.slots, self.uses = {}, []
+
+    arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+    for arg_name in arg_names:
+      self.declare(arg_name)
+    self.visit(node.body_node)
+
+    for use in self.uses:
+      use.slot = self.slots.get(use.var_name_tok.value)
+    node.layout = FrameLayout(self.slots, arg_names)
+
+    self.slots, self.uses = outer
+
+  def resolve_CallNode(self, node):
+    self.visit(node.node_to_call)
+    for arg_node in node.arg_nodes:
+      self.visit(arg_node)
+
+  def resolve_ReturnNode(self, node):
+    if node.node_to_return:
+      self.visit(node.node_to_return)
+
+  def resolve_ContinueNode(self, node):
+    pass
+
+  def resolve_BreakNode(self, node):
+    pass
+
+  def resolve_ImportNode(self, node):
+    for _, alias in node.imports:
+      self.declare(alias)
+
+  def resolve_AsyncNode(self, node):
+    self.visit(node.node)
+
+  def resolve_AwaitNode(self, node):
+    self.visit(node.node)
+
+  def resolve_SleepNode(self, node):
+    self.visit(node.duration_node)
+
+#######################################
+# INTERPRETER
+#######################################
+
+class Interpreter:
+  # Node class -> unbound visit_* method, filled in the first time each
+  # node class is seen so visit() never has to build a method name again
+  dispatch = {}
+
+  def visit(self, node, context):
+    method = self.dispatch.get(type(node))
+    if method is None:
+      method = self.resolve_visit_method(type(node))
+    return method(self, node, context)
+
+  @classmethod
+  def resolve_visit_method(cls, node_class):
+    method = getattr(cls, f'visit_{node_class.__name__}', cls.no_visit_method)
+    cls.dispatch[node_class] = method
+    return method
+
+  def no_visit_method(self, node, context):
+    raise Exception(f'No visit_{type(node).__name__} method defined')
+
+  ###################################
+
+  def visit_NumberNode(self, node, context):
+    value = node.tok.value
+    if type(value) is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+      return SMALL_INTS[value - SMALL_INT_MIN]
+
+    number = Number(value)
+    number.context = context
+    number.pos_start = node.pos_start
+    number.pos_end = node.pos_end
+    return number
+
+  def visit_StringNode(self, node, context):
+    return String(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end)
+  
+  def visit_TryNode(self, node, context):
+    # Execute try block
+    try:
+      return self.visit(node.try_body, context)
+
+    # Only execute catch block if there was an error
+    except Error as error:
+      error_value = ErrorValue(error).set_context(context)
+
+      # Store the error object and its properties
+      context.symbol_table.set(node.catch_var.value, error_value)
+      for prop_name, prop_value in error_value.properties.items():
+          context.symbol_table.set(f"{node.catch_var.value}_{prop_name}", prop_value)
+
+    # Return the catch block's result
+    return self.visit(node.catch_body, context)
+  
+  def visit_ListNode(self, node, context):
+    elements = [self.visit(element_node, context) for element_node in node.element_nodes]
+    return List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+
+  def visit_MapNode(self, node, context):
+    entries = {}
+    for key_node, value_node in zip(node.key_nodes, node.value_nodes):
+      key = self.visit(key_node, context)
+      entries[require_key(key, key_node, context)] = (key, self.visit(value_node, context))
+    return Map(entries).set_context(context).set_pos(node.pos_start, node.pos_end)
+
+  def visit_SetNode(self, node, context):
+    items = {}
+    for element_node in node.element_nodes:
+      element = self.visit(element_node, context)
+      items.setdefault(require_key(element, element_node, context), element)
+    return Set(items).set_context(context).set_pos(node.pos_start, node.pos_end)
+
+  def visit_VarAccessNode(self, node, context):
+    var_name = node.var_name_tok.value
+    value = None
+
+    # A local read before its first assignment falls back to the callers
+    if node.slot is not None:
+      value = context.symbol_table.values[node.slot]
+    if value is None:
+      value = context.symbol_table.get(var_name)
+
+    if not value:
+      raise RTError(
+        node.pos_start, node.pos_end,
+        f"'{var_name}' is not defined",
+        context
+      )
+
+    # Values are shared, not copied: positions and context for error
+    # reporting come from the nodes (see locate_operand)
+    return value
+
+  def visit_VarAssignNode(self, node, context):
+    var_name = node.var_name_tok.value
+    value_node = node.value_node
+    value = (self.dispatch.get(type(value_node)) or self.resolve_visit_method(type(value_node)))(self, value_node, context)
+
+    if node.slot is None:
+      context.symbol_table.set(var_name, value)
+    else:
+      context.symbol_table.values[node.slot] = value
+
+    return value
+
+  def visit_BinOpNode(self, node, context):
+    # The operands' visit methods are called straight from the dispatch
+    # table, saving a visit() call per operand
+    dispatch = self.dispatch
+    left_node = node.left_node
+    right_node = node.right_node
+    left = (dispatch.get(type(left_node)) or self.resolve_visit_method(type(left_node)))(self, left_node, context)
+
+    # A number literal on the right of a Number is used as it is, without
+    # building a Number for it
+    right = None
+    if type(left) is not Number or type(right_node) is not NumberNode:
+      right = (dispatch.get(type(right_node)) or self.resolve_visit_method(type(right_node)))(self, right_node, context)
+
+    if type(left) is Number and (right is None or type(right) is Number):
+      op_tok = node.op_tok
+      try:
+        value = NUMBER_OPERATIONS[op_tok.value if op_tok.type == TT_KEYWORD else op_tok.type](
+          left.value, right_node.tok.value if right is None else right.value
+        )
+      except ZeroDivisionError:
+        pass
+      else:
+        if type(value) is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+          return SMALL_INTS[value - SMALL_INT_MIN]
+
+        result = Number(value)
+        result.context = left.context
+        result.pos_start = node.pos_start
+        result.pos_end = node.pos_end
+        return result
+
+    if right is None:
+      right = self.visit(right_node, context)
+
+    result, error = self.binary_operation(node.op_tok, left, right)
+    if error:
+      left = self.locate_operand(left, node.left_node, context)
+      right = self.locate_operand(right, node.right_node, context)
+      _, error = self.binary_operation(node.op_tok, left, right)
+      raise error
+
+    return result.set_pos(node.pos_start, node.pos_end)
+
+  def binary_operation(self, op_tok, left, right):
+    if op_tok.type == TT_PLUS:
+      return left.added_to(right)
+      
+    elif op_tok.type == TT_MINUS:
+      return left.subbed_by(right)
+      
+    elif op_tok.type == TT_MUL:
+      return left.multed_by(right)
+      
+    elif op_tok.type == TT_DIV:
+      return left.dived_by(right)
+      
+    elif op_tok.type == TT_MOD:
+      return left.moded_by(right)
+
+    elif op_tok.type == TT_POW:
+      return left.powed_by(right)
+      
+    elif op_tok.type == TT_EE:
+      return left.get_comparison_eq(right)
+      
+    elif op_tok.type == TT_NE:
+      return left.get_comparison_ne(right)
+      
+    elif op_tok.type == TT_LT:
+      return left.get_comparison_lt(right)
+      
+    elif op_tok.type == TT_GT:
+      return left.get_comparison_gt(right)
+      
+    elif op_tok.type == TT_LTE:
+      return left.get_comparison_lte(right)
+      
+    elif op_tok.type == TT_GTE:
+      return left.get_comparison_gte(right)
+      
+    elif op_tok.matches(TT_KEYWORD, 'and'):
+      return left.anded_by(right)
+      
+    elif op_tok.matches(TT_KEYWORD, 'or'):
+      return left.ored_by(right)
+
+  def visit_UnaryOpNode(self, node, context):
+    value = self.visit(node.node, context)
+
+    number, error = self.unary_operation(node.op_tok, value)
+    if error:
+      value = self.locate_operand(value, node.node, context)
+      _, error = self.unary_operation(node.op_tok, value)
+      raise error
+
+    return number.set_pos(node.pos_start, node.pos_end)
+
+  def unary_operation(self, op_tok, number):
+    if op_tok.type == TT_MINUS:
+      return number.multed_by(Number(-1))
+    elif op_tok.matches(TT_KEYWORD, 'not'):
+      return number.notted()
+    return number, None
+
+  def locate_operand(self, value, node, context):
+    # Operations build their errors from their operands' positions and
+    # context. Variable reads hand out the stored value itself, so on the
+    # error path only, retry the operation on a copy placed at the operand
+    return value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
+
+  def visit_IfNode(self, node, context):
+    for condition, expr, should_return_null in node.cases:
+      condition_value = self.visit(condition, context)
+
+      if condition_value.is_true():
+        expr_value = self.visit(expr, context)
+        return Number.null if should_return_null else expr_value
+
+    if node.else_case:
+      expr, should_return_null = node.else_case
+      expr_value = self.visit(expr, context)
+      return Number.null if should_return_null else expr_value
+
+    return Number.null
+
+  def visit_ForNode(self, node, context):
+    elements = []
+
+    start_value = self.visit(node.start_value_node, context)
+    end_value = self.visit(node.end_value_node, context)
+
+    if node.step_value_node:
+      step_value = self.visit(node.step_value_node, context)
+    else:
+      step_value = Number(1)
+
+    i = start_value.value
+    end = end_value.value
+    step = step_value.value
+    ascending = step >= 0
+
+    symbol_table = context.symbol_table
+    var_name = node.var_name_tok.value
+    slot = node.slot
+
+    # A loop used as a statement throws its body's values away, so a block
+    # body runs statement by statement instead of building a List each time
+    body_node = node.body_node
+    statements = None
+    if node.should_return_null and type(body_node) is ListNode:
+      statements = body_node.element_nodes
+
+    dispatch = self.dispatch
+
+    while i < end if ascending else i > end:
+      if slot is None:
+        symbol_table.set(var_name, make_number(i))
+      else:
+        symbol_table.values[slot] = make_number(i)
+      i += step
+
+      try:
+        if statements is None:
+          elements.append(self.visit(body_node, context))
+        else:
+          for statement in statements:
+            (dispatch.get(type(statement)) or self.resolve_visit_method(type(statement)))(self, statement, context)
+      except ContinueSignal:
+        continue
+      except BreakSignal:
+        break
+
+    return (
+      Number.null if node.should_return_null else
+      List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+    )
+
+  def visit_ForInNode(self, node, context):
+    elements = []
+
+    iterable = self.visit(node.iterable_node, context)
+    values = iterate(iterable, node.iterable_node, context)
+
+    symbol_table = context.symbol_table
+    var_name = node.var_name_tok.value
+    slot = node.slot
+
+    body_node = node.body_node
+    statements = None
+    if node.should_return_null and type(body_node) is ListNode:
+      statements = body_node.element_nodes
+
+    dispatch = self.dispatch
+
+    for value in values:
+      if slot is None:
+        symbol_table.set(var_name, value)
+      else:
+        symbol_table.values[slot] = value
+
+      try:
+        if statements is None:
+          elements.append(self.visit(body_node, context))
+        else:
+          for statement in statements:
+            (dispatch.get(type(statement)) or self.resolve_visit_method(type(statement)))(self, statement, context)
+      except ContinueSignal:
+        continue
+      except BreakSignal:
+        break
 
-  def visit_BinOpNode(self, node, context):
-    res = RTResult()
-    left = res.register(self.visit(node.left_node, context))
-    if res.should_return(): return res
-    right = res.register(self.visit(node.right_node, context))
-    if res.should_return(): return res
-
-    if node.op_tok.type == TT_PLUS:
-      result, error = left.added_to(right)
+    return (
+      Number.null if node.should_return_null else
+      List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+    )
+
+  def visit_WhileNode(self, node, context):
+    elements = []
+
+    while True:
+      condition = self.visit(node.condition_node, context)
+
+      if not condition.is_true():
+        break
+
+      try:
+        value = self.visit(node.body_node, context)
+      except ContinueSignal:
+        continue
+      except BreakSignal:
+        break
+
+      elements.append(value)
+
+    return (
+      Number.null if node.should_return_null else
+      List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+    )
+
+  def visit_FuncDefNode(self, node, context):
+    func_name = node.var_name_tok.value if node.var_name_tok else None
+    body_node = node.body_node
+    arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+    func_value = Function(func_name, body_node, arg_names, node.should_auto_return, layout=node.layout, namespace=context.symbol_table.namespace).set_context(context).set_pos(node.pos_start, node.pos_end)
+
+    if node.var_name_tok:
+      context.symbol_table.set(func_name, func_value)
+
+    return func_value
+
+  def visit_CallNode(self, node, context):
+    value_to_call = self.visit(node.node_to_call, context)
+    args = [self.visit(arg_node, context) for arg_node in node.arg_nodes]
+    return self.call_value(node, value_to_call, args, context)
+
+  def call_value(self, node, value_to_call, args, context):
+    # Handle list indexing
+    if isinstance(value_to_call, (List, String, NumArray)) and len(args) == 1 and isinstance(args[0], Number):
+        try:
+            index = args[0].value
+            if isinstance(value_to_call, List):
+                return value_to_call.elements[index]
+            elif isinstance(value_to_call, NumArray):
+                return make_number(value_to_call.data[index])
+            else:  # String
+                return String(value_to_call.value[index])
+        except IndexError:
+            raise RTError(
+                node.pos_start, node.pos_end,
+                f"Index {index} out of bounds",
+                context
+            )
+    
+    # Normal function call
+    value_to_call = value_to_call.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
+    return value_to_call.execute(args)
+
+  def visit_ReturnNode(self, node, context):
+    if node.node_to_return:
+      value = self.visit(node.node_to_return, context)
+    else:
+      value = Number.null
+
+    raise ReturnSignal(value)
+
+  def visit_ContinueNode(self, node, context):
+    raise ContinueSignal()
+
+  def visit_BreakNode(self, node, context):
+    raise BreakSignal()
+
+  def visit_ImportNode(self, node, context):
+    return self.import_module(node, context)
+
+  def import_module(self, node, context, use_vm=False):
+    # The VM imports through here too, running modules on its own engine
+    module_path = node.module_path
+    
+    try:
+        # Runs the module the first time it is imported
+        module = module_registry.load(module_path, use_vm)
+        if module is None:
+            raise RTError(
+                node.pos_start, node.pos_end,
+                f"Module '{module_path}' not found",
+                context
+            )
+        
+        # Import the specified symbols into current context
+        for name, alias in node.imports:
+            value = module.context.symbol_table.symbols.get(name)
+            if not value:
+                raise RTError(
+                    node.pos_start, node.pos_end,
+                    f"Cannot import '{name}' - not found in module",
+                    context
+                )
+            context.symbol_table.set(alias, value)
+        
+        return Number.null
+    
+    except Error:
+        raise
+    except Exception as e:
+        raise RTError(
+            node.pos_start, node.pos_end,
+            f"Failed to import module: {str(e)}",
+            context
+        )
+
+  def visit_AsyncNode(self, node, context):
+    value = self.visit(node.node, context)
+    
+    if isinstance(value, Function):
+        async_func = AsyncFunction(value.name, value.body_node, value.arg_names, value.should_auto_return, layout=value.layout, namespace=value.namespace)
+        async_func.set_context(value.context)
+        async_func.set_pos(value.pos_start, value.pos_end)
+
+        # `async function name()` replaces the plain function it defined
+        if isinstance(node.node, FuncDefNode) and node.node.var_name_tok:
+            context.symbol_table.set(value.name, async_func)
+        return async_func
+    
+    raise RTError(
+        node.pos_start, node.pos_end,
+        "Async can only be used with functions",
+        context
+    )
+
+  def visit_AwaitNode(self, node, context):
+      # `await sleep(n)` is the same as `sleep(n)`
+      if isinstance(node.node, SleepNode):
+          return self.visit(node.node, context)
+
+      value = self.visit(node.node, context)
+      
+      if not isinstance(value, AsyncCoroutine):
+          raise RTError(
+              node.pos_start, node.pos_end,
+              "Can only await a coroutine",
+              context
+          )
       
-    elif node.op_tok.type == TT_MINUS:
-      result, error = left.subbed_by(right)
+      # Outside async functions, run the event loop until it finishes
+      return event_loop.wait(value, node, context)
+
+  def visit_SleepNode(self, node, context):
+      duration = self.visit(node.duration_node, context)
       
-    elif node.op_tok.type == TT_MUL:
-      result, error = left.multed_by(right)
+      if not isinstance(duration, Number):
+          raise RTError(
+              node.pos_start, node.pos_end,
+              "Sleep duration must be a number",
+              context
+          )
       
-    elif node.op_tok.type == TT_DIV:
-      result, error = left.dived_by(right)
+      # Other tasks keep running while the program sleeps
+      event_loop.sleep(duration.value)
       
-    elif node.op_tok.type == TT_MOD:
-      result, error = left.moded_by(right)
+      return Number.null
+
+#######################################
+# ASYNC INTERPRETER
+#######################################
+
+# Async function bodies run as generators so a task can stop at `await`
+# and `sleep` and let the event loop run other tasks in the meantime. Only
+# nodes with an await or sleep below them (not counting nested function
+# bodies, which suspend on their own) are walked here; any other subtree
+# goes to the ordinary visit methods. Each yield hands the task an asyncio
+# awaitable, and the task sends back what it resolved to.
+
+def suspends(node):
+  try:
+    return node.suspends
+  except AttributeError:
+    pass
+
+  if isinstance(node, (AwaitNode, SleepNode)):
+    result = True
+  elif isinstance(node, FuncDefNode):
+    result = False
+  else:
+    result = any(map(contains_suspend, node.fields()))
+
+  node.suspends = result
+  return result
+
+def contains_suspend(value):
+  if isinstance(value, Node):
+    return suspends(value)
+  if isinstance(value, (list, tuple)):
+    return any(map(contains_suspend, value))
+  return False
+
+class AsyncInterpreter(Interpreter):
+  # Node class -> unbound async_visit_* method, or None to use visit()
+  async_dispatch = {}
+
+  def run_body(self, func, exec_ctx):
+    try:
+      value = yield from self.visit_async(func.body_node, exec_ctx)
+    except ReturnSignal as signal:
+      return signal.value
+
+    return (value if func.should_auto_return else None) or Number.null
+
+  def visit_async(self, node, context):
+    method = None
+    if suspends(node):
+      method = self.async_dispatch.get(type(node), False)
+      if method is False:
+        method = getattr(type(self), f'async_visit_{type(node).__name__}', None)
+        self.async_dispatch[type(node)] = method
+
+    if method is None:
+      return self.visit(node, context)
+    return (yield from method(self, node, context))
+
+  ###################################
+
+  def async_visit_ListNode(self, node, context):
+    elements = []
+    for element_node in node.element_nodes:
+      elements.append((yield from self.visit_async(element_node, context)))
+    return List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+
+  def async_visit_MapNode(self, node, context):
+    entries = {}
+    for key_node, value_node in zip(node.key_nodes, node.value_nodes):
+      key = yield from self.visit_async(key_node, context)
+      entries[require_key(key, key_node, context)] = (key, (yield from self.visit_async(value_node, context)))
+    return Map(entries).set_context(context).set_pos(node.pos_start, node.pos_end)
+
+  def async_visit_SetNode(self, node, context):
+    items = {}
+    for element_node in node.element_nodes:
+      element = yield from self.visit_async(element_node, context)
+      items.setdefault(require_key(element, element_node, context), element)
+    return Set(items).set_context(context).set_pos(node.pos_start, node.pos_end)
+
+  def async_visit_VarAssignNode(self, node, context):
+    value = yield from self.visit_async(node.value_node, context)
+
+    if node.slot is None:
+      context.symbol_table.set(node.var_name_tok.value, value)
+    else:
+      context.symbol_table.values[node.slot] = value
+
+    return value
+
+  def async_visit_BinOpNode(self, node, context):
+    left = yield from self.visit_async(node.left_node, context)
+    right = yield from self.visit_async(node.right_node, context)
+
+    result, error = self.binary_operation(node.op_tok, left, right)
+    if error:
+      left = self.locate_operand(left, node.left_node, context)
+      right = self.locate_operand(right, node.right_node, context)
+      _, error = self.binary_operation(node.op_tok, left, right)
+      raise error
+
+    return result.set_pos(node.pos_start, node.pos_end)
+
+  def async_visit_UnaryOpNode(self, node, context):
+    value = yield from self.visit_async(node.node, context)
+
+    number, error = self.unary_operation(node.op_tok, value)
+    if error:
+      value = self.locate_operand(value, node.node, context)
+      _, error = self.unary_operation(node.op_tok, value)
+      raise error
+
+    return number.set_pos(node.pos_start, node.pos_end)
+
+  def async_visit_IfNode(self, node, context):
+    for condition, expr, should_return_null in node.cases:
+      condition_value = yield from self.visit_async(condition, context)
+
+      if condition_value.is_true():
+        expr_value = yield from self.visit_async(expr, context)
+        return Number.null if should_return_null else expr_value
+
+    if node.else_case:
+      expr, should_return_null = node.else_case
+      expr_value = yield from self.visit_async(expr, context)
+      return Number.null if should_return_null else expr_value
+
+    return Number.null
+
+  def async_visit_ForNode(self, node, context):
+    elements = []
+
+    start_value = yield from self.visit_async(node.start_value_node, context)
+    end_value = yield from self.visit_async(node.end_value_node, context)
+
+    if node.step_value_node:
+      step_value = yield from self.visit_async(node.step_value_node, context)
+    else:
+      step_value = Number(1)
+
+    i = start_value.value
+
+    if step_value.value >= 0:
+      condition = lambda: i < end_value.value
+    else:
+      condition = lambda: i > end_value.value
+
+    symbol_table = context.symbol_table
+
+    while condition():
+      if node.slot is None:
+        symbol_table.set(node.var_name_tok.value, make_number(i))
+      else:
+        symbol_table.values[node.slot] = make_number(i)
+      i += step_value.value
+
+      try:
+        value = yield from self.visit_async(node.body_node, context)
+      except ContinueSignal:
+        continue
+      except BreakSignal:
+        break
+
+      elements.append(value)
+
+    return (
+      Number.null if node.should_return_null else
+      List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+    )
+
+  def async_visit_ForInNode(self, node, context):
+    elements = []
+
+    iterable = yield from self.visit_async(node.iterable_node, context)
+    symbol_table = context.symbol_table
+
+    for item in iterate(iterable, node.iterable_node, context):
+      if node.slot is None:
+        symbol_table.set(node.var_name_tok.value, item)
+      else:
+        symbol_table.values[node.slot] = item
+
+      try:
+        value = yield from self.visit_async(node.body_node, context)
+      except ContinueSignal:
+        continue
+      except BreakSignal:
+        break
+
+      elements.append(value)
+
+    return (
+      Number.null if node.should_return_null else
+      List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+    )
+
+  def async_visit_WhileNode(self, node, context):
+    elements = []
+
+    while True:
+      condition = yield from self.visit_async(node.condition_node, context)
+
+      if not condition.is_true():
+        break
+
+      try:
+        value = yield from self.visit_async(node.body_node, context)
+      except ContinueSignal:
+        continue
+      except BreakSignal:
+        break
+
+      elements.append(value)
+
+    return (
+      Number.null if node.should_return_null else
+      List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+    )
+
+  def async_visit_TryNode(self, node, context):
+    try:
+      return (yield from self.visit_async(node.try_body, context))
+
+    except Error as error:
+      error_value = ErrorValue(error).set_context(context)
+
+      context.symbol_table.set(node.catch_var.value, error_value)
+      for prop_name, prop_value in error_value.properties.items():
+          context.symbol_table.set(f"{node.catch_var.value}_{prop_name}", prop_value)
+
+    return (yield from self.visit_async(node.catch_body, context))
+
+  def async_visit_CallNode(self, node, context):
+    value_to_call = yield from self.visit_async(node.node_to_call, context)
+
+    args = []
+    for arg_node in node.arg_nodes:
+      args.append((yield from self.visit_async(arg_node, context)))
+
+    return self.call_value(node, value_to_call, args, context)
+
+  def async_visit_ReturnNode(self, node, context):
+    value = yield from self.visit_async(node.node_to_return, context)
+    raise ReturnSignal(value)
+
+  def async_visit_AwaitNode(self, node, context):
+    if isinstance(node.node, SleepNode):
+      return (yield from self.visit_async(node.node, context))
+
+    value = yield from self.visit_async(node.node, context)
+
+    if not isinstance(value, AsyncCoroutine):
+      raise RTError(
+        node.pos_start, node.pos_end,
+        "Can only await a coroutine",
+        context
+      )
+
+    yield value.finished()
+    return value.outcome(node, context)
+
+  def async_visit_SleepNode(self, node, context):
+    duration = yield from self.visit_async(node.duration_node, context)
+
+    if not isinstance(duration, Number):
+      raise RTError(
+        node.pos_start, node.pos_end,
+        "Sleep duration must be a number",
+        context
+      )
+
+    yield asyncio.sleep(duration.value)
+    return Number.null
+
+#######################################
+# BYTECODE
+#######################################
+
+# Every instruction is an (opcode, argument) pair stored flat in Code.ops.
+# Most arguments index Code.consts, which holds the AST node the
+# instruction was compiled from so runtime errors keep the same positions
+# as the tree-walking interpreter. Jump arguments are absolute offsets,
+# STORE_FAST takes the frame slot itself. BINARY_OP consts are (node,
+# operation) pairs, operation being the node's entry in
+# NUMBER_OPERATIONS. BINARY_CONST is a BINARY_OP whose right operand is a
+# number literal, which is never turned into a Number when the left
+# operand is one; its consts also carry the literal's value.
+
+OP_LOAD_NUMBER      = 0
+OP_LOAD_STRING      = 1
+OP_LOAD_NULL        = 2
+OP_LOAD_NAME        = 3
+OP_STORE_NAME       = 4
+OP_BUILD_LIST       = 5
+OP_BINARY_OP        = 6
+OP_UNARY_OP         = 7
+OP_POP_TOP          = 8
+OP_JUMP             = 9
+OP_POP_JUMP_IF_FALSE = 10
+OP_LOAD_STEP        = 11
+OP_FOR_PREP         = 12
+OP_WHILE_PREP       = 13
+OP_SETUP_LOOP       = 14
+OP_FOR_ITER         = 15
+OP_LOOP_APPEND      = 16
+OP_END_LOOP         = 17
+OP_BREAK            = 18
+OP_CONTINUE         = 19
+OP_RETURN_VALUE     = 20
+OP_MAKE_FUNCTION    = 21
+OP_CALL             = 22
+OP_SETUP_TRY        = 23
+OP_POP_BLOCK        = 24
+OP_CATCH            = 25
+OP_IMPORT           = 26
+OP_MAKE_ASYNC       = 27
+OP_AWAIT            = 28
+OP_SLEEP            = 29
+OP_RETURN_END       = 30
+OP_LOAD_FAST        = 31
+OP_STORE_FAST       = 32
+OP_BINARY_CONST     = 33
+OP_BUILD_MAP        = 34
+OP_BUILD_SET        = 35
+OP_FOR_IN_PREP      = 36
+OP_FOR_IN_ITER      = 37
+
+OP_NAMES = {value: name for name, value in globals().items() if name.startswith('OP_') and name != 'OP_NAMES'}
+
+BINARY_METHODS = {
+  TT_PLUS:  'added_to',
+  TT_MINUS: 'subbed_by',
+  TT_MUL:   'multed_by',
+  TT_DIV:   'dived_by',
+  TT_MOD:   'moded_by',
+  TT_POW:   'powed_by',
+  TT_EE:    'get_comparison_eq',
+  TT_NE:    'get_comparison_ne',
+  TT_LT:    'get_comparison_lt',
+  TT_GT:    'get_comparison_gt',
+  TT_LTE:   'get_comparison_lte',
+  TT_GTE:   'get_comparison_gte',
+  'and':    'anded_by',
+  'or':     'ored_by',
+}
+
+class Code:
+  def __init__(self, name):
+    self.name = name
+    self.ops = []
+    self.consts = []
+
+  def add_const(self, value):
+    self.consts.append(value)
+    return len(self.consts) - 1
+
+  def disassemble(self):
+    lines = []
+    for ip in range(0, len(self.ops), 2):
+      op, arg = self.ops[ip], self.ops[ip + 1]
+      lines.append(f'{ip:>5} {OP_NAMES[op]:<22} {arg}')
+    return '\n'.join(lines)
+
+  def __repr__(self):
+    return f'<code {self.name}>'
+
+#######################################
+# COMPILER
+#######################################
+
+class Compiler:
+  def compile(self, node, name='<program>'):
+    self.code = Code(name)
+    self.visit(node)
+    self.emit(OP_RETURN_END)
+    return self.code
+
+  def emit(self, op, arg=0):
+    self.code.ops.append(op)
+    self.code.ops.append(arg)
+    return len(self.code.ops) - 1
+
+  def emit_node(self, op, node):
+    return self.emit(op, self.code.add_const(node))
+
+  def patch(self, arg_idx, target=None):
+    self.code.ops[arg_idx] = len(self.code.ops) if target is None else target
+
+  def visit(self, node):
+    method_name = f'compile_{type(node).__name__}'
+    method = getattr(self, method_name, self.no_compile_method)
+    method(node)
+
+  def no_compile_method(self, node):
+    raise Exception(f'No compile_{type(node).__name__} method defined')
+
+  ###################################
+
+  def compile_NumberNode(self, node):
+    self.emit_node(OP_LOAD_NUMBER, node)
+
+  def compile_StringNode(self, node):
+    self.emit_node(OP_LOAD_STRING, node)
+
+  def compile_ListNode(self, node):
+    for element_node in node.element_nodes:
+      self.visit(element_node)
+    self.emit_node(OP_BUILD_LIST, node)
 
-    elif node.op_tok.type == TT_POW:
-      result, error = left.powed_by(right)
-      
-    elif node.op_tok.type == TT_EE:
-      result, error = left.get_comparison_eq(right)
-      
-    elif node.op_tok.type == TT_NE:
-      result, error = left.get_comparison_ne(right)
-      
-    elif node.op_tok.type == TT_LT:
-      result, error = left.get_comparison_lt(right)
-      
-    elif node.op_tok.type == TT_GT:
-      result, error = left.get_comparison_gt(right)
-      
-    elif node.op_tok.type == TT_LTE:
-      result, error = left.get_comparison_lte(right)
-      
-    elif node.op_tok.type == TT_GTE:
-      result, error = left.get_comparison_gte(right)
-      
-    elif node.op_tok.matches(TT_KEYWORD, 'AND'):
-      result, error = left.anded_by(right)
-      
-    elif node.op_tok.matches(TT_KEYWORD, 'OR'):
-      result, error = left.ored_by(right)
-      
+  def compile_MapNode(self, node):
+    for key_node, value_node in zip(node.key_nodes, node.value_nodes):
+      self.visit(key_node)
+      self.visit(value_node)
+    self.emit_node(OP_BUILD_MAP, node)
 
-    if error:
-      return res.failure(error)
-    else:
-      return res.success(result.set_pos(node.pos_start, node.pos_end))
+  def compile_SetNode(self, node):
+    for element_node in node.element_nodes:
+      self.visit(element_node)
+    self.emit_node(OP_BUILD_SET, node)
 
-  def visit_UnaryOpNode(self, node, context):
-    res = RTResult()
-    number = res.register(self.visit(node.node, context))
-    if res.should_return(): return res
+  def compile_VarAccessNode(self, node):
+    self.emit_node(OP_LOAD_NAME if node.slot is None else OP_LOAD_FAST, node)
 
-    error = None
+  def compile_VarAssignNode(self, node):
+    self.visit(node.value_node)
+    if node.slot is None:
+      self.emit_node(OP_STORE_NAME, node.var_name_tok.value)
+    else:
+      self.emit(OP_STORE_FAST, node.slot)
 
-    if node.op_tok.type == TT_MINUS:
-      number, error = number.multed_by(Number(-1))
-    elif node.op_tok.matches(TT_KEYWORD, 'NOT'):
-      number, error = number.notted()
+  def compile_BinOpNode(self, node):
+    op_tok = node.op_tok
+    operation = NUMBER_OPERATIONS.get(op_tok.value if op_tok.type == TT_KEYWORD else op_tok.type)
 
-    if error:
-      return res.failure(error)
+    self.visit(node.left_node)
+    if isinstance(node.right_node, NumberNode):
+      self.emit_node(OP_BINARY_CONST, (node, operation, node.right_node.tok.value))
     else:
-      return res.success(number.set_pos(node.pos_start, node.pos_end))
+      self.visit(node.right_node)
+      self.emit_node(OP_BINARY_OP, (node, operation))
 
-  def visit_IfNode(self, node, context):
-    res = RTResult()
+  def compile_UnaryOpNode(self, node):
+    self.visit(node.node)
+    self.emit_node(OP_UNARY_OP, node)
 
-    for condition, expr, should_return_null in node.cases:
-      condition_value = res.register(self.visit(condition, context))
-      if res.should_return(): return res
+  def compile_IfNode(self, node):
+    end_jumps = []
 
-      if condition_value.is_true():
-        expr_value = res.register(self.visit(expr, context))
-        if res.should_return(): return res
-        return res.success(Number.null if should_return_null else expr_value)
+    for condition, expr, should_return_null in node.cases:
+      self.visit(condition)
+      next_case = self.emit(OP_POP_JUMP_IF_FALSE)
+      self.visit(expr)
+      if should_return_null:
+        self.emit(OP_POP_TOP)
+        self.emit(OP_LOAD_NULL)
+      end_jumps.append(self.emit(OP_JUMP))
+      self.patch(next_case)
 
     if node.else_case:
       expr, should_return_null = node.else_case
-      expr_value = res.register(self.visit(expr, context))
-      if res.should_return(): return res
-      return res.success(Number.null if should_return_null else expr_value)
-
-    return res.success(Number.null)
-
-  def visit_ForNode(self, node, context):
-    res = RTResult()
-    elements = []
-
-    start_value = res.register(self.visit(node.start_value_node, context))
-    if res.should_return(): return res
+      self.visit(expr)
+      if should_return_null:
+        self.emit(OP_POP_TOP)
+        self.emit(OP_LOAD_NULL)
+    else:
+      self.emit(OP_LOAD_NULL)
 
-    end_value = res.register(self.visit(node.end_value_node, context))
-    if res.should_return(): return res
+    for jump in end_jumps:
+      self.patch(jump)
 
+  def compile_ForNode(self, node):
+    self.visit(node.start_value_node)
+    self.visit(node.end_value_node)
     if node.step_value_node:
-      step_value = res.register(self.visit(node.step_value_node, context))
-      if res.should_return(): return res
+      self.visit(node.step_value_node)
     else:
-      step_value = Number(1)
+      self.emit(OP_LOAD_STEP)
+
+    self.emit_node(OP_FOR_PREP, node)
+    loop_exit = self.emit(OP_SETUP_LOOP)
+    loop_start = len(self.code.ops)
+    iter_exit = self.emit(OP_FOR_ITER)
+    self.compile_loop_body(node)
+    self.emit(OP_JUMP, loop_start)
+    self.patch(loop_exit)
+    self.patch(iter_exit)
+    self.emit_node(OP_END_LOOP, node)
+
+  def compile_ForInNode(self, node):
+    self.visit(node.iterable_node)
+    self.emit_node(OP_FOR_IN_PREP, node)
+    loop_exit = self.emit(OP_SETUP_LOOP)
+    loop_start = len(self.code.ops)
+    iter_exit = self.emit(OP_FOR_IN_ITER)
+    self.compile_loop_body(node)
+    self.emit(OP_JUMP, loop_start)
+    self.patch(loop_exit)
+    self.patch(iter_exit)
+    self.emit_node(OP_END_LOOP, node)
+
+  def compile_WhileNode(self, node):
+    self.emit_node(OP_WHILE_PREP, node)
+    loop_exit = self.emit(OP_SETUP_LOOP)
+    loop_start = len(self.code.ops)
+    self.visit(node.condition_node)
+    cond_exit = self.emit(OP_POP_JUMP_IF_FALSE)
+    self.compile_loop_body(node)
+    self.emit(OP_JUMP, loop_start)
+    self.patch(loop_exit)
+    self.patch(cond_exit)
+    self.emit_node(OP_END_LOOP, node)
+
+  def compile_loop_body(self, node):
+    # A loop used as a statement throws its body's values away, so a block
+    # body's statements are popped one by one instead of built into a List
+    body_node = node.body_node
+    if node.should_return_null and isinstance(body_node, ListNode):
+      for element_node in body_node.element_nodes:
+        self.visit(element_node)
+        self.emit(OP_POP_TOP)
+    else:
+      self.visit(body_node)
+      self.emit(OP_LOOP_APPEND)
 
-    i = start_value.value
+  def compile_FuncDefNode(self, node):
+    func_name = node.var_name_tok.value if node.var_name_tok else '<anonymous>'
+    body_code = Compiler().compile(node.body_node, func_name)
+    self.emit_node(OP_MAKE_FUNCTION, (node, body_code))
 
-    if step_value.value >= 0:
-      condition = lambda: i < end_value.value
+  def compile_CallNode(self, node):
+    self.visit(node.node_to_call)
+    for arg_node in node.arg_nodes:
+      self.visit(arg_node)
+    self.emit_node(OP_CALL, node)
+
+  def compile_ReturnNode(self, node):
+    if node.node_to_return:
+      self.visit(node.node_to_return)
     else:
-      condition = lambda: i > end_value.value
+      self.emit(OP_LOAD_NULL)
+    self.emit(OP_RETURN_VALUE)
 
-    while condition():
-      context.symbol_table.set(node.var_name_tok.value, Number(i))
-      i += step_value.value
+  def compile_ContinueNode(self, node):
+    self.emit(OP_CONTINUE)
 
-      value = res.register(self.visit(node.body_node, context))
-      if res.should_return() and res.loop_should_continue == False and res.loop_should_break == False: return res
+  def compile_BreakNode(self, node):
+    self.emit(OP_BREAK)
 
-      if res.loop_should_continue:
-        continue
+  def compile_TryNode(self, node):
+    handler = self.emit(OP_SETUP_TRY)
+    self.visit(node.try_body)
+    self.emit(OP_POP_BLOCK)
+    end = self.emit(OP_JUMP)
+    self.patch(handler)
+    self.emit_node(OP_CATCH, node)
+    self.visit(node.catch_body)
+    self.patch(end)
 
-      if res.loop_should_break:
-        break
+  def compile_ImportNode(self, node):
+    self.emit_node(OP_IMPORT, node)
 
-      elements.append(value)
+  def compile_AsyncNode(self, node):
+    self.visit(node.node)
+    self.emit_node(OP_MAKE_ASYNC, node)
 
-    return res.success(
-      Number.null if node.should_return_null else
-      List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
-    )
+  def compile_AwaitNode(self, node):
+    # `await sleep(n)` is the same as `sleep(n)`
+    if isinstance(node.node, SleepNode):
+      self.visit(node.node)
+      return
 
-  def visit_WhileNode(self, node, context):
-    res = RTResult()
-    elements = []
+    self.visit(node.node)
+    self.emit_node(OP_AWAIT, node)
 
-    while True:
-      condition = res.register(self.visit(node.condition_node, context))
-      if res.should_return(): return res
+  def compile_SleepNode(self, node):
+    self.visit(node.duration_node)
+    self.emit_node(OP_SLEEP, node)
 
-      if not condition.is_true():
-        break
+#######################################
+# VIRTUAL MACHINE
+#######################################
 
-      value = res.register(self.visit(node.body_node, context))
-      if res.should_return() and res.loop_should_continue == False and res.loop_should_break == False: return res
+BLOCK_LOOP = 0
+BLOCK_TRY  = 1
+
+class LoopState:
+  def __init__(self, var_name=None, i=0, end=0, step=1, slot=None, iterator=None):
+    self.var_name = var_name
+    self.slot = slot
+    self.i = i
+    self.end = end
+    self.step = step
+    self.iterator = iterator
+    self.elements = []
+
+class VM:
+  def run(self, code, context):
+    self.stack = []
+    self.blocks = []
+    self.caught_error = None
+    ip = 0
+
+    # Errors and loop signals raised while executing, including from
+    # called functions, unwind the block stack and resume at a handler
+    while True:
+      try:
+        return self.execute(code, context, ip)
+      except Error as error:
+        ip = self.unwind(error)
+      except (BreakSignal, ContinueSignal) as signal:
+        ip = self.unwind(signal)
+
+  def execute(self, code, context, ip):
+    ops = code.ops
+    consts = code.consts
+    stack = self.stack
+    blocks = self.blocks
+    push = stack.append
+    pop = stack.pop
 
-      if res.loop_should_continue:
-        continue
+    while True:
+      op = ops[ip]
+      arg = ops[ip + 1]
+      ip += 2
 
-      if res.loop_should_break:
-        break
+      # Branches are ordered by how often a loop body runs them
+      if op == OP_LOAD_FAST:
+        node = consts[arg]
+        value = context.symbol_table.values[node.slot]
 
-      elements.append(value)
+        if value is None:
+          value = self.load_name(node, context)
 
-    return res.success(
-      Number.null if node.should_return_null else
-      List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
-    )
+        push(value)
 
-  def visit_FuncDefNode(self, node, context):
-    res = RTResult()
+      elif op == OP_LOAD_NAME:
+        # A table that isn't a function frame holds its own names, so a
+        # hit there is what get would return
+        node = consts[arg]
+        table = context.symbol_table
+        value = table.symbols.get(node.var_name_tok.value) if table.namespace is table else None
 
-    func_name = node.var_name_tok.value if node.var_name_tok else None
-    body_node = node.body_node
-    arg_names = [arg_name.value for arg_name in node.arg_name_toks]
-    func_value = Function(func_name, body_node, arg_names, node.should_auto_return).set_context(context).set_pos(node.pos_start, node.pos_end)
+        if value is None:
+          value = self.load_name(node, context)
 
-    if node.var_name_tok:
-      context.symbol_table.set(func_name, func_value)
+        push(value)
 
-    return res.success(func_value)
+      elif op == OP_BINARY_CONST:
+        node, operation, right_value = consts[arg]
+        left = stack[-1]
 
-  def visit_CallNode(self, node, context):
-    res = RTResult()
-    args = []
+        if type(left) is Number:
+          try:
+            value = operation(left.value, right_value)
+          except ZeroDivisionError:
+            pass
+          else:
+            if type(value) is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+              stack[-1] = SMALL_INTS[value - SMALL_INT_MIN]
+              continue
+
+            result = Number(value)
+            result.context = left.context
+            result.pos_start = node.pos_start
+            result.pos_end = node.pos_end
+            stack[-1] = result
+            continue
+
+        right_node = node.right_node
+        right = Number(right_value).set_context(context).set_pos(right_node.pos_start, right_node.pos_end)
+        stack[-1] = self.binary_operation(node, left, right, context)
+
+      elif op == OP_BINARY_OP:
+        node, operation = consts[arg]
+        right = pop()
+        left = stack[-1]
+
+        if type(left) is Number and type(right) is Number:
+          try:
+            value = operation(left.value, right.value)
+          except ZeroDivisionError:
+            pass
+          else:
+            if type(value) is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+              stack[-1] = SMALL_INTS[value - SMALL_INT_MIN]
+              continue
+
+            result = Number(value)
+            result.context = left.context
+            result.pos_start = node.pos_start
+            result.pos_end = node.pos_end
+            stack[-1] = result
+            continue
+
+        stack[-1] = self.binary_operation(node, left, right, context)
+
+      elif op == OP_STORE_FAST:
+        context.symbol_table.values[arg] = stack[-1]
+
+      elif op == OP_STORE_NAME:
+        table = context.symbol_table
+        if table.slots is None:
+          table.symbols[consts[arg]] = stack[-1]
+        else:
+          table.set(consts[arg], stack[-1])
+
+      elif op == OP_POP_TOP:
+        pop()
+
+      elif op == OP_FOR_ITER:
+        state = stack[-1]
+        i = state.i
+        if (i < state.end) if state.step >= 0 else (i > state.end):
+          if type(i) is int and SMALL_INT_MIN <= i <= SMALL_INT_MAX:
+            number = SMALL_INTS[i - SMALL_INT_MIN]
+          else:
+            number = Number(i)
+          if state.slot is None:
+            context.symbol_table.set(state.var_name, number)
+          else:
+            context.symbol_table.values[state.slot] = number
+          state.i = i + state.step
+        else:
+          ip = arg
+
+      elif op == OP_JUMP:
+        ip = arg
+
+      elif op == OP_LOAD_NUMBER:
+        node = consts[arg]
+        value = node.tok.value
+        if type(value) is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+          push(SMALL_INTS[value - SMALL_INT_MIN])
+          continue
+
+        number = Number(value)
+        number.context = context
+        number.pos_start = node.pos_start
+        number.pos_end = node.pos_end
+        push(number)
+
+      elif op == OP_POP_JUMP_IF_FALSE:
+        if not pop().is_true():
+          ip = arg
+
+      elif op == OP_FOR_IN_ITER:
+        state = stack[-1]
+        value = next(state.iterator, None)
+        if value is not None:
+          if state.slot is None:
+            context.symbol_table.set(state.var_name, value)
+          else:
+            context.symbol_table.values[state.slot] = value
+        else:
+          ip = arg
 
-    value_to_call = res.register(self.visit(node.node_to_call, context))
-    if res.should_return(): return res
-    value_to_call = value_to_call.copy().set_pos(node.pos_start, node.pos_end)
+      elif op == OP_LOOP_APPEND:
+        value = pop()
+        stack[-1].elements.append(value)
 
-    for arg_node in node.arg_nodes:
-        args.append(res.register(self.visit(arg_node, context)))
-        if res.should_return(): return res
+      elif op == OP_CALL:
+        node = consts[arg]
+        argc = len(node.arg_nodes)
+        args = stack[len(stack) - argc:]
+        del stack[len(stack) - argc:]
+        value_to_call = pop()
 
-    # Handle list indexing
-    if isinstance(value_to_call, (List, String)) and len(args) == 1 and isinstance(args[0], Number):
-        try:
+        # Handle list indexing
+        if isinstance(value_to_call, (List, String, NumArray)) and len(args) == 1 and isinstance(args[0], Number):
+          try:
             index = args[0].value
             if isinstance(value_to_call, List):
-                return res.success(value_to_call.elements[index])
+              push(value_to_call.elements[index])
+            elif isinstance(value_to_call, NumArray):
+              push(make_number(value_to_call.data[index]))
             else:  # String
-                return res.success(String(value_to_call.value[index]))
-        except IndexError:
-            return res.failure(RTError(
-                node.pos_start, node.pos_end,
-                f"Index {index} out of bounds",
-                context
-            ))
-    
-    # Normal function call
-    return_value = res.register(value_to_call.execute(args))
-    if res.should_return(): return res
-    return_value = return_value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
-    return res.success(return_value)
+              push(String(value_to_call.value[index]))
+          except IndexError:
+            raise RTError(
+              node.pos_start, node.pos_end,
+              f"Index {index} out of bounds",
+              context
+            )
+          continue
+
+        value_to_call = value_to_call.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
+        push(value_to_call.execute(args))
+
+      elif op == OP_LOAD_STRING:
+        node = consts[arg]
+        push(String(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end))
+
+      elif op == OP_LOAD_NULL:
+        push(Number.null)
+
+      elif op == OP_BUILD_LIST:
+        node = consts[arg]
+        count = len(node.element_nodes)
+        elements = stack[len(stack) - count:]
+        del stack[len(stack) - count:]
+        push(List(elements).set_context(context).set_pos(node.pos_start, node.pos_end))
+
+      elif op == OP_BUILD_MAP:
+        node = consts[arg]
+        count = 2 * len(node.key_nodes)
+        pairs = stack[len(stack) - count:]
+        del stack[len(stack) - count:]
+        entries = {}
+        for i, key_node in enumerate(node.key_nodes):
+          key = pairs[2 * i]
+          entries[require_key(key, key_node, context)] = (key, pairs[2 * i + 1])
+        push(Map(entries).set_context(context).set_pos(node.pos_start, node.pos_end))
+
+      elif op == OP_BUILD_SET:
+        node = consts[arg]
+        count = len(node.element_nodes)
+        elements = stack[len(stack) - count:]
+        del stack[len(stack) - count:]
+        items = {}
+        for element, element_node in zip(elements, node.element_nodes):
+          items.setdefault(require_key(element, element_node, context), element)
+        push(Set(items).set_context(context).set_pos(node.pos_start, node.pos_end))
+
+      elif op == OP_UNARY_OP:
+        node = consts[arg]
+        interpreter = Interpreter()
+        value = pop()
+        number, error = interpreter.unary_operation(node.op_tok, value)
 
-  def visit_ReturnNode(self, node, context):
-    res = RTResult()
+        if error:
+          value = interpreter.locate_operand(value, node.node, context)
+          _, error = interpreter.unary_operation(node.op_tok, value)
+          raise error
+
+        push(number.set_pos(node.pos_start, node.pos_end))
+
+      elif op == OP_LOAD_STEP:
+        push(Number(1))
+
+      elif op == OP_FOR_PREP:
+        node = consts[arg]
+        step_value = pop()
+        end_value = pop()
+        start_value = pop()
+        push(LoopState(node.var_name_tok.value, start_value.value, end_value.value, step_value.value, node.slot))
+
+      elif op == OP_FOR_IN_PREP:
+        node = consts[arg]
+        values = iterate(pop(), node.iterable_node, context)
+        push(LoopState(node.var_name_tok.value, slot=node.slot, iterator=values))
+
+      elif op == OP_WHILE_PREP:
+        push(LoopState())
+
+      elif op == OP_SETUP_LOOP:
+        blocks.append((BLOCK_LOOP, arg, ip, len(stack)))
+
+      elif op == OP_END_LOOP:
+        node = consts[arg]
+        blocks.pop()
+        state = pop()
+        push(
+          Number.null if node.should_return_null else
+          List(state.elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+        )
 
-    if node.node_to_return:
-      value = res.register(self.visit(node.node_to_return, context))
-      if res.should_return(): return res
-    else:
-      value = Number.null
+      elif op == OP_BREAK:
+        ip = self.unwind(BreakSignal())
 
-    return res.success_return(value)
+      elif op == OP_CONTINUE:
+        ip = self.unwind(ContinueSignal())
 
-  def visit_ContinueNode(self, node, context):
-    return RTResult().success_continue()
+      elif op == OP_RETURN_VALUE:
+        raise ReturnSignal(pop())
 
-  def visit_BreakNode(self, node, context):
-    return RTResult().success_break()
+      elif op == OP_MAKE_FUNCTION:
+        node, body_code = consts[arg]
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        func_value = Function(func_name, node.body_node, arg_names, node.should_auto_return, body_code, node.layout, context.symbol_table.namespace).set_context(context).set_pos(node.pos_start, node.pos_end)
 
-  def visit_ImportNode(self, node, context):
-    res = RTResult()
-    module_path = node.module_path
-    
-    try:
-        # Try to load the module
-        with open(module_path + ".txt", "r") as f:  # Assuming .txt extension for modules
-            module_code = f.read()
-        
-        # Run the module in a new context
-        module_context = Context(f"<module {module_path}>", parent=context)
-        module_context.symbol_table = SymbolTable(global_symbol_table)
-        
-        # Execute module code
-        _, error = run(module_path, module_code)
-        if error:
-            return res.failure(error)
-        
-        # Import the specified symbols into current context
-        for name, alias in node.imports:
-            value = module_context.symbol_table.get(name)
-            if not value:
-                return res.failure(RTError(
-                    node.pos_start, node.pos_end,
-                    f"Cannot import '{name}' - not found in module",
-                    context
-                ))
-            context.symbol_table.set(alias, value)
-        
-        return res.success(Number.null)
-    
-    except FileNotFoundError:
-        return res.failure(RTError(
-            node.pos_start, node.pos_end,
-            f"Module '{module_path}' not found",
-            context
-        ))
-    except Exception as e:
-        return res.failure(RTError(
+        if node.var_name_tok:
+          context.symbol_table.set(func_name, func_value)
+
+        push(func_value)
+
+      elif op == OP_SETUP_TRY:
+        blocks.append((BLOCK_TRY, arg, ip, len(stack)))
+
+      elif op == OP_POP_BLOCK:
+        blocks.pop()
+
+      elif op == OP_CATCH:
+        node = consts[arg]
+        error_value = ErrorValue(self.caught_error).set_context(context)
+
+        context.symbol_table.set(node.catch_var.value, error_value)
+        for prop_name, prop_value in error_value.properties.items():
+          context.symbol_table.set(f"{node.catch_var.value}_{prop_name}", prop_value)
+
+      elif op == OP_IMPORT:
+        push(Interpreter().import_module(consts[arg], context, use_vm=True))
+
+      elif op == OP_MAKE_ASYNC:
+        node = consts[arg]
+        value = pop()
+
+        if not isinstance(value, Function):
+          raise RTError(
             node.pos_start, node.pos_end,
-            f"Failed to import module: {str(e)}",
+            "Async can only be used with functions",
             context
-        ))
+          )
 
-  def visit_AsyncNode(self, node, context):
-    res = RTResult()
-    value = res.register(self.visit(node.node, context))
-    if res.error: return res
-    
-    if isinstance(value, Function):
-        async_func = AsyncFunction(value.name, value.body_node, value.arg_names, value.should_auto_return)
+        async_func = AsyncFunction(value.name, value.body_node, value.arg_names, value.should_auto_return, value.code, value.layout, value.namespace)
         async_func.set_context(value.context)
         async_func.set_pos(value.pos_start, value.pos_end)
-        return res.success(async_func)
-    
-    return res.failure(RTError(
+
+        if isinstance(node.node, FuncDefNode) and node.node.var_name_tok:
+          context.symbol_table.set(value.name, async_func)
+        push(async_func)
+
+      elif op == OP_AWAIT:
+        node = consts[arg]
+        value = pop()
+
+        if not isinstance(value, AsyncCoroutine):
+          raise RTError(
+            node.pos_start, node.pos_end,
+            "Can only await a coroutine",
+            context
+          )
+
+        push(event_loop.wait(value, node, context))
+
+      elif op == OP_SLEEP:
+        node = consts[arg]
+        duration = pop()
+
+        if not isinstance(duration, Number):
+          raise RTError(
+            node.pos_start, node.pos_end,
+            "Sleep duration must be a number",
+            context
+          )
+
+        event_loop.sleep(duration.value)
+        push(Number.null)
+
+      elif op == OP_RETURN_END:
+        return pop()
+
+      else:
+        raise Exception(f'Unknown opcode {op}')
+
+  def binary_operation(self, node, left, right, context):
+    op_tok = node.op_tok
+    method_name = BINARY_METHODS[op_tok.value if op_tok.type == TT_KEYWORD else op_tok.type]
+    result, error = getattr(left, method_name)(right)
+
+    if error:
+      left = left.copy().set_pos(node.left_node.pos_start, node.left_node.pos_end).set_context(context)
+      right = right.copy().set_pos(node.right_node.pos_start, node.right_node.pos_end).set_context(context)
+      _, error = getattr(left, method_name)(right)
+      raise error
+
+    return result.set_pos(node.pos_start, node.pos_end)
+
+  def load_name(self, node, context):
+    var_name = node.var_name_tok.value
+    value = context.symbol_table.get(var_name)
+
+    if not value:
+      raise RTError(
         node.pos_start, node.pos_end,
-        "Async can only be used with functions",
+        f"'{var_name}' is not defined",
         context
-    ))
+      )
 
-  def visit_AwaitNode(self, node, context):
-      res = RTResult()
-      value = res.register(self.visit(node.node, context))
-      if res.error: return res
-      
-      if not isinstance(value, AsyncCoroutine):
-          return res.failure(RTError(
-              node.pos_start, node.pos_end,
-              "Can only await a coroutine",
-              context
-          ))
-      
-      # Execute the coroutine synchronously (for now)
-      result = value.execute()
-      if result.error: return result
-      return res.success(result.value)
+    return value
 
-  def visit_SleepNode(self, node, context):
-      res = RTResult()
-      duration = res.register(self.visit(node.duration_node, context))
-      if res.error: return res
-      
-      if not isinstance(duration, Number):
-          return res.failure(RTError(
-              node.pos_start, node.pos_end,
-              "Sleep duration must be a number",
-              context
-          ))
-      
-      # Simple synchronous sleep for now
-      # In a real async implementation, this would be non-blocking
-      import time
-      time.sleep(duration.value)
-      
-      return res.success(Number.null)
+  def unwind(self, signal):
+    # Pops blocks until one handles the signal: errors run to the nearest
+    # try block, break/continue to the nearest loop. Returns the ip to
+    # resume at, or re-raises the signal to this frame's caller.
+    stack = self.stack
+    blocks = self.blocks
+    is_error = isinstance(signal, Error)
+
+    while blocks:
+      kind, target, resume, depth = blocks[-1]
+
+      if kind == BLOCK_TRY:
+        blocks.pop()
+        if is_error:
+          del stack[depth:]
+          self.caught_error = signal
+          return target
+        continue
+
+      if isinstance(signal, BreakSignal):
+        del stack[depth:]
+        return target
+
+      if isinstance(signal, ContinueSignal):
+        del stack[depth:]
+        return resume
+
+      blocks.pop()
+
+    raise signal
+
+#######################################
+# PARSE CACHE
+#######################################
+
+# Parsed and resolved ASTs keyed by a hash of the file name and source
+# text, so running the same text again (awake, imports, the REPL) skips
+# lexing and parsing. The AST is never changed by running it, so one tree
+# can be shared by every run. Entries live in memory with LRU eviction,
+# and are also pickled to a directory when one is set (the
+# JHAYSCRIPT_CACHE_DIR environment variable). Only successful parses are
+# cached. A tree loaded from disk was resolved in another process, so its
+# entry also records the names its functions bind (see frame_names).
+#
+# Unpickling can run arbitrary code, so a pickled tree (here or in a
+# .jhayc, see COMPILED SCRIPTS) is only loaded from a file, and a cache
+# directory, that belong to the current user and that nobody else can
+# write to. Anything else is treated as a miss. Files are created without
+# group or other write permission for the same reason.
+# Optimized trees (see Optimizer) are cached under their own keys.
+
+PARSE_CACHE_VERSION = 2
+
+class ParsedSource:
+  def __init__(self, node, frame_names):
+    self.node = node
+    self.frame_names = frame_names
+
+def owned_by_user(stat):
+  # Group or other write permission would let someone else swap in their
+  # own pickle. Windows has no uids to compare, so there the file system's
+  # own permissions are all there is.
+  if not hasattr(os, 'getuid'): return True
+  return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
+
+def create_private(path):
+  # Opens a new file for writing without group or other write permission,
+  # whatever the umask
+  return os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644), 'wb')
+
+def load_tree(f):
+  # Unpickling a tree allocates enough objects to set off the collector
+  # many times over without ever freeing anything, so pause it
+  enabled = gc.isenabled()
+  gc.disable()
+  try:
+    return pickle.load(f)
+  finally:
+    if enabled: gc.enable()
+
+class ParseCache:
+  def __init__(self, max_entries=128, directory=None):
+    self.entries = OrderedDict()
+    self.max_entries = max_entries
+    self.directory = directory
+    self.hits = 0
+    self.misses = 0
+
+  def key(self, fn, text, optimize=False):
+    digest = hashlib.sha256()
+    digest.update(f'{PARSE_CACHE_VERSION}:{int(optimize)}:{fn}\0'.encode('utf-8', 'surrogatepass'))
+    digest.update(text.encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+  def parse(self, fn, text, optimize=False):
+    entry, error = self.parse_source(fn, text, optimize)
+    if error: return None, error
+    return entry.node, None
+
+  def parse_source(self, fn, text, optimize=False):
+    key = self.key(fn, text, optimize)
+
+    entry = self.entries.get(key)
+    if entry is None:
+      entry = self.load(key)
+      if entry is not None:
+        frame_names.update(entry.frame_names)
+    else:
+      self.entries.move_to_end(key)
+
+    if entry is not None:
+      self.hits += 1
+      self.remember(key, entry)
+      return entry, None
+
+    self.misses += 1
+    tokens, error = Lexer(fn, text).make_tokens()
+    if error: return None, error
+
+    ast = Parser(tokens).parse()
+    if ast.error: return None, ast.error
+
+    node = ast.node
+    if optimize:
+      node = Optimizer().optimize(node)
+
+    # Assign frame slots to function locals
+    resolver = Resolver()
+    entry = ParsedSource(resolver.resolve(node), resolver.frame_names)
+    self.remember(key, entry)
+    self.store(key, entry)
+    return entry, None
+
+  def remember(self, key, entry):
+    self.entries[key] = entry
+    while len(self.entries) > self.max_entries:
+      self.entries.popitem(last=False)
+
+  def path(self, key):
+    return os.path.join(self.directory, key + '.ast')
+
+  def trusted_directory(self):
+    try:
+      return owned_by_user(os.stat(self.directory))
+    except OSError:
+      return False
+
+  def load(self, key):
+    if not self.directory or not self.trusted_directory(): return None
+
+    try:
+      with open(self.path(key), 'rb') as f:
+        if not owned_by_user(os.fstat(f.fileno())): return None
+        return load_tree(f)
+    except Exception:
+      # Missing, stale or unreadable entries are just misses
+      return None
+
+  def store(self, key, entry):
+    if not self.directory: return
+
+    path = self.path(key)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+      os.makedirs(self.directory, 0o700, exist_ok=True)
+      # Nothing would load from a directory others can write to
+      if not self.trusted_directory(): return
+      with create_private(temp_path) as f:
+        pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+      os.replace(temp_path, path)
+    except Exception:
+      # The disk cache is best effort: deep trees can exceed the pickle
+      # recursion limit and the directory may not be writable
+      try: os.remove(temp_path)
+      except OSError: pass
+
+  def clear(self):
+    self.entries.clear()
+
+parse_cache = ParseCache(directory=os.environ.get('JHAYSCRIPT_CACHE_DIR'))
+
+#######################################
+# COMPILED SCRIPTS
+#######################################
+
+# A script's parsed tree is saved next to it as <script>c (main.jhay ->
+# main.jhayc), so starting the same script again skips reading, lexing and
+# parsing it. The header holds the format version, whether the tree was
+# optimized and the size and mtime the source had when it was read; the
+# file is only used while all four still match, and only when it belongs
+# to the current user and nobody else can write to it (see owned_by_user).
+# The tree keeps the source text for error messages.
+
+COMPILED_MAGIC = b'JHAYC'
+COMPILED_HEADER = struct.Struct('<5sI?qQ')
+
+def compiled_path(fn):
+  return fn + 'c'
+
+def load_compiled(fn, optimize=False):
+  try:
+    stat = os.stat(fn)
+    with open(compiled_path(fn), 'rb') as f:
+      if not owned_by_user(os.fstat(f.fileno())): return None
+      header = f.read(COMPILED_HEADER.size)
+      if header != COMPILED_HEADER.pack(
+        COMPILED_MAGIC, PARSE_CACHE_VERSION, optimize, stat.st_mtime_ns, stat.st_size
+      ):
+        return None
+      entry = load_tree(f)
+  except Exception:
+    # Missing, stale or unreadable files mean the script is parsed again
+    return None
+
+  frame_names.update(entry.frame_names)
+  return entry
+
+def write_compiled(fn, stat, entry, optimize=False):
+  path = compiled_path(fn)
+  temp_path = f'{path}.{os.getpid()}.tmp'
+  try:
+    with create_private(temp_path) as f:
+      f.write(COMPILED_HEADER.pack(
+        COMPILED_MAGIC, PARSE_CACHE_VERSION, optimize, stat.st_mtime_ns, stat.st_size
+      ))
+      pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+  except Exception:
+    # Best effort, like the parse cache: the directory may be read-only
+    try: os.remove(temp_path)
+    except OSError: pass
+
+def compile_file(fn, optimize=False):
+  entry = load_compiled(fn, optimize)
+  if entry is not None: return entry, None
+
+  # Stat before reading so an edit made while parsing leaves a stale header
+  stat = os.stat(fn)
+  with open(fn, 'r') as f:
+    text = f.read()
+
+  entry, error = parse_cache.parse_source(fn, text, optimize)
+  if error: return None, error
+
+  write_compiled(fn, stat, entry, optimize)
+  return entry, None
+
+#######################################
+# MODULES
+#######################################
+
+# Every imported module runs once per process, in a table of its own whose
+# parent is the global table, and later imports of the same file share
+# that table. Modules are keyed by their real path, so different spellings
+# of one file are still one module. A module is registered before it runs,
+# so an import cycle sees the names defined so far instead of looping.
+# Set optimize to run imported modules through the Optimizer as well.
+
+MODULE_EXTENSION = '.txt'
+
+def find_module_path(module_name):
+  # Modules shipped with the interpreter first
+  builtin_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modules', module_name + MODULE_EXTENSION)
+  if os.path.exists(builtin_path):
+    return builtin_path
+
+  # Then the stdlib directory
+  stdlib_path = os.path.join('stdlib', module_name + MODULE_EXTENSION)
+  if os.path.exists(stdlib_path):
+    return stdlib_path
+
+  # Then the current directory
+  local_path = module_name + MODULE_EXTENSION
+  if os.path.exists(local_path):
+    return local_path
+
+  return None
+
+class Module:
+  def __init__(self, name, path):
+    self.name = name
+    self.path = path
+    self.context = Context(f'<module {name}>')
+    self.context.symbol_table = SymbolTable(global_symbol_table)
+
+class ModuleRegistry:
+  def __init__(self):
+    self.modules = {}
+    self.optimize = False
+
+  def load(self, module_name, use_vm=False):
+    # Returns the module, or None when no file on the search path matches.
+    # A module runs on the engine of the code that first imports it.
+    path = find_module_path(module_name)
+    if path is None: return None
+
+    key = os.path.realpath(path)
+    module = self.modules.get(key)
+    if module: return module
+
+    with open(path, 'r') as f:
+      text = f.read()
+
+    node, error = parse_cache.parse(path, text, self.optimize)
+    if error: raise error
+
+    module = Module(module_name, path)
+    self.modules[key] = module
+    try:
+      if use_vm:
+        VM().run(Compiler().compile(node), module.context)
+      else:
+        Interpreter().visit(node, module.context)
+    except Error:
+      # A module that failed to load is tried again on the next import
+      del self.modules[key]
+      raise
+    except ControlSignal:
+      pass
+
+    return module
+
+  def clear(self):
+    self.modules.clear()
+
+module_registry = ModuleRegistry()
+
+#######################################
+# PARALLEL MAP
+#######################################
+
+# parallel_map(fn, list, workers) calls fn on every element in a pool of
+# worker processes. A job is pickled once: a copy of fn without its
+# context, the module-level data and functions fn reads (following the
+# functions it calls) and the frame names the trees were resolved with.
+# The job is written once to the pool's private directory and chunks
+# carry only its key and path, so each worker reads a job once however
+# many chunks it is sent. The pool stays up between calls; on fork-based
+# platforms its workers start with the interpreter already loaded. Only
+# numbers, strings, lists and functions cross between processes.
+
+def portable(value):
+  # A copy of value that can be pickled without its context, or None
+  if isinstance(value, Number):
+    return Number(value.value)
+  if isinstance(value, String):
+    return String(value.value)
+  if isinstance(value, List):
+    elements = [portable(element) for element in value.elements]
+    if any(element is None for element in elements): return None
+    return List(elements)
+  if isinstance(value, Function):
+    # The compiled body is left behind; workers walk the tree
+    return Function(value.name, value.body_node, value.arg_names, value.should_auto_return, layout=value.layout).set_pos(value.pos_start, value.pos_end)
+  return None
+
+def to_plain(value):
+  # Elements and results cross as plain Python numbers, strings and lists,
+  # which pickle far faster than Values. None if value can't cross.
+  if isinstance(value, (Number, String)):
+    return value.value
+  if isinstance(value, List):
+    elements = [to_plain(element) for element in value.elements]
+    if any(element is None for element in elements): return None
+    return elements
+  return portable(value)
+
+def from_plain(value):
+  if isinstance(value, str):
+    return String(value)
+  if isinstance(value, list):
+    return List([from_plain(element) for element in value])
+  if isinstance(value, BaseFunction):
+    return value
+  return Number(value)
+
+class ParallelJob:
+  def __init__(self, func, environment, frame_names):
+    self.func = func
+    self.environment = environment
+    self.frame_names = frame_names
+
+class WorkerPool:
+  def __init__(self):
+    self.pool = None
+    self.workers = 0
+    # Jobs are handed to workers through files here, readable only by us
+    self.directory = None
+
+  def get(self, workers):
+    global multiprocessing
+    if self.pool is None or self.workers != workers:
+      import multiprocessing
+      if self.pool is None: atexit.register(self.close)
+      self.close()
+      self.pool = multiprocessing.Pool(workers)
+      self.workers = workers
+      self.directory = tempfile.mkdtemp(prefix='jhayscript-jobs-')
+    return self.pool
+
+  def close(self):
+    if self.pool is not None:
+      self.pool.terminate()
+      self.pool = None
+      shutil.rmtree(self.directory, ignore_errors=True)
+
+worker_pool = WorkerPool()
+
+# The latest job this worker process has loaded, by key
+parallel_jobs = {}
+
+def read_names(value, names):
+  # Adds the names a node (or list/tuple of them) reads to names
+  if isinstance(value, (list, tuple)):
+    for item in value:
+      read_names(item, names)
+    return
+  if not isinstance(value, Node): return
+
+  if isinstance(value, VarAccessNode):
+    names.add(value.var_name_tok.value)
+  for child in value.fields():
+    read_names(child, names)
+
+def function_bodies(value):
+  # The bodies of the functions in a portable value
+  if isinstance(value, Function):
+    yield value.body_node
+  elif isinstance(value, List):
+    for element in value.elements:
+      yield from function_bodies(element)
+
+def job_environment(func):
+  # The portable module-level values fn reads, and those the functions
+  # among them read, by name. Workers have their own builtins.
+  tables = [table for table in (func.namespace, global_symbol_table) if table is not None]
+  environment = {}
+  seen = set()
+  bodies = [func.body_node]
+
+  while bodies:
+    names = set()
+    read_names(bodies.pop(), names)
+    for name in names - seen:
+      seen.add(name)
+      value = next((table.symbols[name] for table in tables if name in table.symbols), None)
+      if value is None or isinstance(value, BuiltInFunction): continue
+      value = portable(value)
+      if value is None: continue
+      environment[name] = value
+      bodies.extend(function_bodies(value))
+  return environment
+
+def parallel_map(func, elements, workers):
+  # (results, None), or (None, (index, message)) where index is None if
+  # the failure wasn't in any one element
+  global multiprocessing
+  import multiprocessing
+  if multiprocessing.current_process().daemon:
+    return None, (None, "parallel_map can't start workers from inside a worker process")
+
+  job = pickle.dumps(ParallelJob(portable(func), job_environment(func), frame_names), pickle.HIGHEST_PROTOCOL)
+  key = hashlib.sha256(job).hexdigest()
+
+  try:
+    pool = worker_pool.get(workers)
+    path = os.path.join(worker_pool.directory, key)
+    with open(path, 'wb') as f:
+      f.write(job)
+
+    # A few chunks per worker evens out elements that take longer than others
+    indexed = list(enumerate(elements))
+    size = max(1, -(-len(indexed) // (workers * 4)))
+    chunks = [(key, path, indexed[i:i + size]) for i in range(0, len(indexed), size)]
+
+    try:
+      outcomes = pool.starmap(run_parallel_chunk, chunks)
+    finally:
+      os.remove(path)
+  except Exception as e:
+    # The pool itself failed; don't reuse it
+    worker_pool.close()
+    return None, (None, f"{type(e).__name__}: {e}")
+
+  results = []
+  for chunk_results, error in outcomes:
+    if error: return None, error
+    results.extend(map(from_plain, chunk_results))
+  return results, None
+
+def load_parallel_job(key, path):
+  # The job with key, read from path the first time this worker sees it.
+  # Only the latest job is kept.
+  loaded = parallel_jobs.get(key)
+  if loaded is None:
+    with open(path, 'rb') as f:
+      job = pickle.load(f)
+    frame_names.update(job.frame_names)
+
+    # Jobs see the builtins, not what the parent process had defined when
+    # the worker was forked
+    builtins = SymbolTable()
+    builtins.symbols = dict(builtin_symbols)
+
+    loaded = (job, builtins)
+    parallel_jobs.clear()
+    parallel_jobs[key] = loaded
+  return loaded
+
+def run_parallel_chunk(key, path, elements):
+  # Runs in a worker: returns (results, None) or (None, (index, message))
+  index = None
+  try:
+    job, builtins = load_parallel_job(key, path)
+
+    results = []
+    for index, element in elements:
+      # Every element starts from the values the job was sent with, so
+      # what fn changes can't reach other elements however they are chunked
+      context = Context('<program>')
+      context.symbol_table = SymbolTable(builtins)
+      for name, value in job.environment.items():
+        context.symbol_table.set(name, value.copy().set_context(context))
+
+      result = to_plain(job.func.copy().set_context(context).execute([from_plain(element).set_context(context)]))
+      if result is None:
+        return None, (index, "Only numbers, strings, lists and functions can be returned from workers")
+      results.append(result)
+    return results, None
+  except Error as error:
+    return None, (index, error.as_string())
+  except Exception as e:
+    return None, (index, f"{type(e).__name__}: {e}")
 
 #######################################
 # RUN
@@ -3690,27 +7105,87 @@ global_symbol_table.set("len_str", BuiltInFunction.len_str)
 global_symbol_table.set("is_prime", BuiltInFunction.is_prime)
 global_symbol_table.set("unique", BuiltInFunction.unique)
 global_symbol_table.set("shuffle", BuiltInFunction.shuffle)
+global_symbol_table.set("get", BuiltInFunction.get)
+global_symbol_table.set("set", BuiltInFunction.set)
+global_symbol_table.set("add", BuiltInFunction.add)
+global_symbol_table.set("has", BuiltInFunction.has)
+global_symbol_table.set("delete", BuiltInFunction.delete)
+global_symbol_table.set("keys", BuiltInFunction.keys)
+global_symbol_table.set("values", BuiltInFunction.values)
+global_symbol_table.set("to_set", BuiltInFunction.to_set)
+global_symbol_table.set("to_array", BuiltInFunction.to_array)
+global_symbol_table.set("to_list", BuiltInFunction.to_list)
+global_symbol_table.set("slice", BuiltInFunction.slice)
+global_symbol_table.set("vec_add", BuiltInFunction.vec_add)
+global_symbol_table.set("vec_sub", BuiltInFunction.vec_sub)
+global_symbol_table.set("vec_mul", BuiltInFunction.vec_mul)
+global_symbol_table.set("vec_div", BuiltInFunction.vec_div)
+global_symbol_table.set("vec_dot", BuiltInFunction.vec_dot)
+global_symbol_table.set("vec_sum", BuiltInFunction.vec_sum)
+global_symbol_table.set("vec_mean", BuiltInFunction.vec_mean)
+global_symbol_table.set("vec_min", BuiltInFunction.vec_min)
+global_symbol_table.set("vec_max", BuiltInFunction.vec_max)
+global_symbol_table.set("vec_sort", BuiltInFunction.vec_sort)
+global_symbol_table.set("vec_cumsum", BuiltInFunction.vec_cumsum)
+global_symbol_table.set("open_read", BuiltInFunction.open_read)
+global_symbol_table.set("open_write", BuiltInFunction.open_write)
+global_symbol_table.set("read_lines", BuiltInFunction.read_lines)
+global_symbol_table.set("read_chunk", BuiltInFunction.read_chunk)
+global_symbol_table.set("write_lines", BuiltInFunction.write_lines)
+global_symbol_table.set("close", BuiltInFunction.close)
 global_symbol_table.set("run_async", BuiltInFunction("run_async"))
+global_symbol_table.set("gather", BuiltInFunction("gather"))
+global_symbol_table.set("race", BuiltInFunction("race"))
+global_symbol_table.set("with_timeout", BuiltInFunction("with_timeout"))
+global_symbol_table.set("parallel_map", BuiltInFunction("parallel_map"))
 
-def run(fn, text):
-  # Generate tokens
-  lexer = Lexer(fn, text)
-  tokens, error = lexer.make_tokens()
+# What is bound before any script runs, for parallel_map workers
+builtin_symbols = dict(global_symbol_table.symbols)
+
+# The engine and optimize flag of the program being executed, which awake
+# runs its script with
+program_options = (False, False)
+
+def run(fn, text, use_vm=False, optimize=False):
+  # Generate the AST, or reuse the one parsed from the same text before
+  node, error = parse_cache.parse(fn, text, optimize)
   if error: return None, error
 
-  # Generate AST
-  parser = Parser(tokens)
-  ast = parser.parse()
-  if ast.error: 
-    return None, ast.error
+  return execute(node, use_vm, optimize)
+
+def run_file(fn, use_vm=False, optimize=False):
+  # Like run, but loads <fn>c instead of parsing when it is up to date
+  entry, error = compile_file(fn, optimize)
+  if error: return None, error
+
+  return execute(entry.node, use_vm, optimize)
+
+def execute(node, use_vm=False, optimize=False):
+  global program_options
+  outer_options, program_options = program_options, (use_vm, optimize)
+  try:
+    result = execute_program(node, use_vm)
+
+    # Finish the tasks the program started with run_async
+    event_loop.run_pending()
+  except Error as error:
+    return None, error
+  except ControlSignal:
+    return None, None
+  finally:
+    program_options = outer_options
+
+  return result, None
 
-  # Run program
-  interpreter = Interpreter()
+def execute_program(node, use_vm):
+  # Runs the tree on a fresh program context, leaving the tasks it queues
+  # to whoever finishes the outermost program
   context = Context('<program>')
   context.symbol_table = global_symbol_table
-  result = interpreter.visit(ast.node, context)
 
-  return result.value, result.error
+  if use_vm:
+    return VM().run(Compiler().compile(node), context)
+  return Interpreter().visit(node, context)
 
 
 def validate(text):
@@ -0,0 +1,70 @@
+#######################################
+# ALLOCATION BENCHMARK
+#######################################
+
+# Heap memory held per evaluated node, measured with tracemalloc. Deep
+# recursion and deeply nested expressions keep every level's intermediate
+# objects alive at once, so peak traced memory divided by the depth is the
+# memory each level of evaluation allocates.
+#
+#   python benchmarks/allocations.py [depth]
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+RECURSION = '''
+function down(n)
+  if n == 0 THEN release 0
+  release 1 + down(n - 1)
+END
+down({depth})
+'''
+
+def nested_expression(depth):
+  return '1 + (' * depth + '1' + ')' * depth
+
+def parse(text):
+  tokens, error = basic.Lexer('<bench>', text).make_tokens()
+  if error: raise SystemExit(error.as_string())
+  ast = basic.Parser(tokens).parse()
+  if ast.error: raise SystemExit(ast.error.as_string())
+  return ast.node
+
+def peak_bytes(node, use_vm=False):
+  context = basic.Context('<program>')
+  context.symbol_table = basic.SymbolTable(basic.global_symbol_table)
+  code = basic.Compiler().compile(node) if use_vm else None
+
+  tracemalloc.start()
+  tracemalloc.reset_peak()
+  base = tracemalloc.get_traced_memory()[0]
+  if use_vm:
+    basic.VM().run(code, context)
+  else:
+    basic.Interpreter().visit(node, context)
+  peak = tracemalloc.get_traced_memory()[1] - base
+  tracemalloc.stop()
+  return peak
+
+def main():
+  depth = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+  sys.setrecursionlimit(max(sys.getrecursionlimit(), depth * 200))
+
+  workloads = (
+    ('recursion', parse(RECURSION.format(depth=depth)), depth),
+    ('nested expression', parse(nested_expression(depth)), depth),
+  )
+
+  print(f'{"workload":<20}{"engine":<8}{"peak":>12}{"per level":>14}')
+  for label, node, levels in workloads:
+    for engine, use_vm in (('tree', False), ('vm', True)):
+      peak = peak_bytes(node, use_vm)
+      print(f'{label:<20}{engine:<8}{peak / 1024:>10.1f}KB{peak / levels:>12.0f}B')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,48 @@
+#######################################
+# ASYNC SLEEP BENCHMARK
+#######################################
+
+# Wall time of N tasks that each sleep for the same duration, started
+# together with run_async. Sleeping tasks yield to the event loop, so the
+# run should take about one sleep plus scheduling overhead, where the old
+# blocking sleep took N sleeps.
+#
+#   python benchmarks/async_sleep.py [tasks] [seconds]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+SOURCE = '''
+initiate results = []
+async function task(i)
+  await sleep({seconds})
+  release i
+END
+function done(result)
+  append(results, result)
+END
+for i = 0 to {tasks} THEN
+  run_async(task(i), done)
+END
+'''
+
+def main():
+  tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+  seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+  for label, use_vm in (('tree', False), ('vm', True)):
+    start = time.perf_counter()
+    _, error = basic.run('<bench>', SOURCE.format(tasks=tasks, seconds=seconds), use_vm)
+    elapsed = time.perf_counter() - start
+    if error: raise SystemExit(error.as_string())
+
+    finished = len(basic.global_symbol_table.get('results').elements)
+    print(f'{label:<6}{finished} tasks sleeping {seconds:g}s each: {elapsed:.2f}s (serial: {tasks * seconds:g}s)')
+
+if __name__ == '__main__':
+  main()
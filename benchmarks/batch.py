@@ -0,0 +1,60 @@
+#######################################
+# BATCH BENCHMARK
+#######################################
+
+# Running a directory of small scripts the way a shell loop does it, one
+# interpreter process per file, against one `--batch` run that spreads
+# them over a pool of worker processes.
+#
+#   python benchmarks/batch.py [scripts] [jobs]
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+MAIN = os.path.join(ROOT, '__main__.py')
+
+SCRIPT = '''
+function fib(n)
+  if n < 2 THEN release n
+  release fib(n - 1) + fib(n - 2)
+END
+initiate total = 0
+for i = 0 to {n} THEN
+  initiate total = total + i
+END
+echo(fib(12) + total)
+'''
+
+def main():
+  scripts = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+  jobs = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+
+  with tempfile.TemporaryDirectory() as directory:
+    paths = []
+    for i in range(scripts):
+      path = os.path.join(directory, f'script_{i:04}.jhay')
+      with open(path, 'w') as f:
+        f.write(SCRIPT.format(n=i))
+      paths.append(path)
+
+    start = time.perf_counter()
+    for path in paths:
+      subprocess.run([sys.executable, MAIN, path], stdout=subprocess.DEVNULL)
+    loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, MAIN, '--batch', directory, '--jobs', str(jobs)], stdout=subprocess.DEVNULL)
+    batch = time.perf_counter() - start
+
+  print(f'{scripts} scripts')
+  print(f'{"":<20}{"total":>10}{"per script":>12}')
+  for label, total in (('process per script', loop), (f'--batch --jobs {jobs}', batch)):
+    print(f'{label:<20}{total:>9.2f}s{total / scripts * 1e3:>10.1f}ms')
+  print(f'speedup: {loop / batch:.1f}x')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,109 @@
+#######################################
+# DISPATCH BENCHMARK
+#######################################
+
+# Per-node cost of the interpreter on a tight `for` loop, comparing the
+# old f-string + getattr lookup against the class-keyed dispatch table.
+#
+#   python benchmarks/dispatch.py [iterations]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+SOURCE = '''
+initiate total = 0
+for i = 0 to {n} THEN
+  initiate total = total + i * 2 - 1
+END
+'''
+
+# The interpreter's hot paths call handlers straight from self.dispatch
+# (falling back to resolve_visit_method) rather than through visit(), so
+# these subclasses swap and count handlers there, each with a table of
+# its own, instead of overriding visit().
+
+class GetattrLookup(dict):
+  # A dispatch table that finds the handler the way Interpreter.visit did
+  # before the table: by building its name and calling getattr, every time
+  def get(self, node_class, default=None):
+    return getattr(basic.Interpreter, f'visit_{node_class.__name__}', basic.Interpreter.no_visit_method)
+
+class GetattrInterpreter(basic.Interpreter):
+  dispatch = GetattrLookup()
+
+class CountingInterpreter(basic.Interpreter):
+  dispatch = {}
+  visits = 0
+
+  @classmethod
+  def resolve_visit_method(cls, node_class):
+    method = getattr(cls, f'visit_{node_class.__name__}', cls.no_visit_method)
+
+    def counted(self, node, context):
+      cls.visits += 1
+      return method(self, node, context)
+
+    cls.dispatch[node_class] = counted
+    return counted
+
+def parse(text):
+  tokens, error = basic.Lexer('<bench>', text).make_tokens()
+  if error: raise SystemExit(error.as_string())
+  ast = basic.Parser(tokens).parse()
+  if ast.error: raise SystemExit(ast.error.as_string())
+  return ast.node
+
+def new_context():
+  context = basic.Context('<program>')
+  context.symbol_table = basic.SymbolTable(basic.global_symbol_table)
+  return context
+
+def time_run(interpreter, node, repeat=5):
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    interpreter.visit(node, new_context())
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+def time_lookup(lookup, nodes, rounds):
+  start = time.perf_counter()
+  for _ in range(rounds):
+    for node in nodes:
+      lookup(node)
+  return time.perf_counter() - start
+
+def main():
+  n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+  node = parse(SOURCE.format(n=n))
+
+  CountingInterpreter().visit(node, new_context())
+  visits = CountingInterpreter.visits
+
+  # Method resolution on its own, without running the visit_* bodies
+  interpreter = basic.Interpreter()
+  sample = [node, node.element_nodes[1], node.element_nodes[1].body_node]
+  rounds = visits // len(sample)
+  old_lookup = time_lookup(lambda node: getattr(interpreter, f'visit_{type(node).__name__}'), sample, rounds)
+  new_lookup = time_lookup(lambda node: interpreter.dispatch.get(type(node)), sample, rounds)
+
+  old_total = time_run(GetattrInterpreter(), node)
+  new_total = time_run(basic.Interpreter(), node)
+
+  print(f'for loop with {n} iterations, {visits} node visits')
+  print(f'{"":<18}{"total":>10}{"per node":>12}{"lookup/node":>14}')
+  for label, total, lookup in (
+    ('getattr', old_total, old_lookup),
+    ('dispatch table', new_total, new_lookup),
+  ):
+    print(f'{label:<18}{total:>9.3f}s{total / visits * 1e9:>10.0f}ns{lookup / (rounds * len(sample)) * 1e9:>12.0f}ns')
+  print(f'speedup: {old_total / new_total:.2f}x')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,65 @@
+#######################################
+# EVENT LOOP STARTUP BENCHMARK
+#######################################
+
+# Process start time of the CLI, the REPL and a bare `import basic` now
+# that asyncio and the event loop are set up on first use, against the
+# same starts with the loop forced up front the way every import used to
+# do it (without the old daemon thread, so the eager numbers are a lower
+# bound).
+#
+#   python benchmarks/event_loop_startup.py [starts]
+
+import compileall
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+EAGER = 'import basic; basic.event_loop.loop; '
+
+def command(eager, script=None, args=()):
+  code = EAGER if eager else 'import basic; '
+  if script:
+    path = os.path.join(ROOT, script)
+    code += f'import runpy, sys; sys.argv = {[path] + list(args)!r}; runpy.run_path({path!r}, run_name="__main__")'
+  return [sys.executable, '-c', code]
+
+def time_starts(cmd, starts, stdin=None):
+  best = None
+  for _ in range(starts):
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=ROOT, input=stdin, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+def main():
+  starts = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+  # A stale .pyc would add a recompile to every start
+  compileall.compile_file(os.path.join(ROOT, 'basic.py'), quiet=1)
+
+  with tempfile.TemporaryDirectory() as directory:
+    script = os.path.join(directory, 'hello.jhay')
+    with open(script, 'w') as f:
+      f.write('echo("Hello, World!")\n')
+
+    workloads = (
+      ('import basic', None, (), None),
+      ('CLI', '__main__.py', (script,), None),
+      ('REPL', 'jhayscript.py', (), b'echo(1)\nexit\n'),
+    )
+
+    print(f'best of {starts} starts')
+    print(f'{"":<14}{"eager":>10}{"lazy":>10}{"saved":>10}')
+    for label, target, args, stdin in workloads:
+      eager = time_starts(command(True, target, args), starts, stdin)
+      lazy = time_starts(command(False, target, args), starts, stdin)
+      print(f'{label:<14}{eager * 1e3:>8.1f}ms{lazy * 1e3:>8.1f}ms{(eager - lazy) * 1e3:>8.1f}ms')
+
+if __name__ == '__main__':
+  main()
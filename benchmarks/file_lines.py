@@ -0,0 +1,100 @@
+#######################################
+# FILE STREAMING BENCHMARK
+#######################################
+
+# Filters the ERROR lines out of generated logs of growing size, once by
+# streaming read_lines into write_lines and once by reading the whole file
+# into a list first (what scripts did by shelling out). Peak memory,
+# measured with tracemalloc, stays flat for the stream as the log grows.
+#
+#   python benchmarks/file_lines.py [largest lines]
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+STREAM_SOURCE = '''
+initiate out = open_write(output)
+for line in read_lines(log) THEN
+  if len_str(line) > 40 THEN write_lines(out, [line])
+END
+close(out)
+'''
+
+WHOLE_SOURCE = '''
+initiate kept = []
+for line in lines THEN
+  if len_str(line) > 40 THEN append(kept, line)
+END
+write_lines(output, kept)
+'''
+
+def write_log(path, n):
+  # One line in four is an ERROR, the only lines longer than 40 characters
+  with open(path, 'w') as f:
+    for i in range(n):
+      if i % 4 == 0:
+        f.write(f'{i:>10} ERROR request {i % 997} failed: timeout\n')
+      else:
+        f.write(f'{i:>10} INFO request {i % 997} ok\n')
+
+def parse(text):
+  node, error = basic.parse_cache.parse('<bench>', text)
+  if error: raise SystemExit(error.as_string())
+  return node
+
+def measure(run):
+  tracemalloc.start()
+  start = time.perf_counter()
+  run()
+  elapsed = time.perf_counter() - start
+  peak = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  return elapsed, peak
+
+def stream(node):
+  _, error = basic.execute(node)
+  if error: raise SystemExit(error.as_string())
+
+def whole(node, log):
+  with open(log) as f:
+    lines = f.read().splitlines()
+  basic.global_symbol_table.set('lines', basic.List([basic.String(line) for line in lines]))
+  _, error = basic.execute(node)
+  if error: raise SystemExit(error.as_string())
+
+def main():
+  largest = int(sys.argv[1]) if len(sys.argv) > 1 else 160000
+  sizes = (largest // 16, largest // 4, largest)
+  stream_node = parse(STREAM_SOURCE)
+  whole_node = parse(WHOLE_SOURCE)
+
+  with tempfile.TemporaryDirectory() as directory:
+    log = os.path.join(directory, 'app.log')
+    basic.global_symbol_table.set('log', basic.String(log))
+    basic.global_symbol_table.set('output', basic.String(os.path.join(directory, 'errors.log')))
+
+    print(f'{"lines":>10}{"log MB":>8}{"stream":>10}{"peak":>10}{"whole":>10}{"peak":>10}')
+    for n in sizes:
+      write_log(log, n)
+      megabytes = os.path.getsize(log) / 1e6
+      stream_time, stream_peak = measure(lambda: stream(stream_node))
+      whole_time, whole_peak = measure(lambda: whole(whole_node, log))
+      print(
+        f'{n:>10}{megabytes:>8.1f}'
+        f'{stream_time:>9.2f}s{stream_peak / 1e6:>8.1f}MB'
+        f'{whole_time:>9.2f}s{whole_peak / 1e6:>8.1f}MB'
+      )
+
+  for name in ('log', 'output', 'lines', 'out', 'kept', 'line'):
+    if name in basic.global_symbol_table.symbols:
+      basic.global_symbol_table.remove(name)
+
+if __name__ == '__main__':
+  main()
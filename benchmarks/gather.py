@@ -0,0 +1,68 @@
+#######################################
+# GATHER BENCHMARK
+#######################################
+
+# Fanning out N simulated I/O calls (a sleep each), awaited one after the
+# other against gather() over all of them. Serial time grows with N times
+# the delay; gathered time should stay near one delay.
+#
+#   python benchmarks/gather.py [delay]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+FETCH = '''
+async function fetch(i)
+  await sleep({delay})
+  release i
+END
+'''
+
+SERIAL = FETCH + '''
+async function main()
+  initiate results = []
+  for i = 0 to {n} THEN
+    append(results, await fetch(i))
+  END
+  release results
+END
+initiate results = await main()
+'''
+
+GATHERED = FETCH + '''
+async function main()
+  initiate tasks = []
+  for i = 0 to {n} THEN
+    append(tasks, fetch(i))
+  END
+  release await gather(tasks)
+END
+initiate results = await main()
+'''
+
+def time_run(source):
+  start = time.perf_counter()
+  _, error = basic.run('<bench>', source)
+  elapsed = time.perf_counter() - start
+  if error: raise SystemExit(error.as_string())
+  return elapsed, len(basic.global_symbol_table.get('results').elements)
+
+def main():
+  delay = float(sys.argv[1]) if len(sys.argv) > 1 else 0.05
+
+  print(f'simulated I/O of {delay:g}s per call')
+  print(f'{"calls":>8}{"serial":>10}{"gather":>10}')
+  for n in (10, 100, 1000, 10000):
+    # Serial runs past 100 calls only take longer
+    serial = f'{time_run(SERIAL.format(n=n, delay=delay))[0]:>9.2f}s' if n <= 100 else f'{"-":>10}'
+    gathered, count = time_run(GATHERED.format(n=n, delay=delay))
+    assert count == n
+    print(f'{n:>8}{serial}{gathered:>9.2f}s')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,95 @@
+#######################################
+# HASHING BENCHMARK
+#######################################
+
+# Time per element of unique(), contains() and count() on lists of 10^3
+# to 10^6 numbers and strings, half of them distinct. All three compare
+# by hash_key, so the time per element stays flat as the list grows. For
+# reference, the list-scanning unique() they replaced is timed on the
+# sizes it finishes in reasonable time.
+#
+#   python benchmarks/hashing.py [largest]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+CALLS = (
+  ('unique', 'initiate result = unique(data)'),
+  ('contains', 'initiate result = contains(data, "missing")'),
+  ('count', 'initiate result = count(data, 7)'),
+)
+
+# The largest list the old unique() is timed on
+OLD_UNIQUE_LIMIT = 10000
+
+def make_data(n):
+  elements = []
+  for i in range(n // 2):
+    elements.append(basic.Number(i))
+    elements.append(basic.String(f's{i % 100}'))
+  return basic.List(elements)
+
+def old_unique(list_):
+  # What unique() did before: `seen` is a Python list
+  seen = []
+  unique_elements = []
+  for element in list_.elements:
+    if isinstance(element, (basic.Number, basic.String)):
+      if element.value not in seen:
+        seen.append(element.value)
+        unique_elements.append(element)
+    elif element not in seen:
+      seen.append(element)
+      unique_elements.append(element)
+  return basic.List(unique_elements)
+
+def parse(text):
+  node, error = basic.parse_cache.parse('<bench>', text)
+  if error: raise SystemExit(error.as_string())
+  return node
+
+def time_run(run, repeat=3):
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+def main():
+  largest = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+  sizes = []
+  n = 1000
+  while n <= largest:
+    sizes.append(n)
+    n *= 10
+
+  print('time per element')
+  print(f'{"elements":>10}' + ''.join(f'{label:>12}' for label, _ in CALLS) + f'{"old unique":>14}')
+  for n in sizes:
+    data = make_data(n)
+    basic.global_symbol_table.set('data', data)
+
+    row = f'{n:>10}'
+    for _, text in CALLS:
+      node = parse(text)
+      elapsed = time_run(lambda: basic.execute(node))
+      row += f'{elapsed / n * 1e9:>10.0f}ns'
+
+    if n <= OLD_UNIQUE_LIMIT:
+      elapsed = time_run(lambda: old_unique(data))
+      row += f'{elapsed / n * 1e9:>12.0f}ns'
+    else:
+      row += f'{"-":>14}'
+    print(row)
+
+  basic.global_symbol_table.remove('data')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,85 @@
+#######################################
+# INTERNING BENCHMARK
+#######################################
+
+# Nested counting loops whose counters, literals and comparisons stay
+# within the small int range, run with and without the shared Numbers
+# (the range emptied for the first run). Besides wall time, counts the
+# Numbers each run builds.
+#
+#   python benchmarks/interning.py [iterations]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+SOURCE = '''
+for i = 0 to {n} THEN
+  for j = 0 to 100 THEN
+    if (i + j) % 3 == 0 and j < 50 THEN initiate last = j
+  END
+END
+'''
+
+def parse(text):
+  node, error = basic.parse_cache.parse('<bench>', text)
+  if error: raise SystemExit(error.as_string())
+  return node
+
+def new_context():
+  context = basic.Context('<program>')
+  context.symbol_table = basic.SymbolTable(basic.global_symbol_table)
+  return context
+
+def count_numbers(run):
+  original = basic.Number.__init__
+  count = 0
+
+  def counting_init(self, value):
+    nonlocal count
+    count += 1
+    original(self, value)
+
+  basic.Number.__init__ = counting_init
+  try:
+    run()
+  finally:
+    basic.Number.__init__ = original
+  return count
+
+def time_run(run, repeat=3):
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+def main():
+  n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+  node = parse(SOURCE.format(n=n))
+  code = basic.Compiler().compile(node)
+  small_int_max = basic.SMALL_INT_MAX
+
+  print(f'{n} x 100 loop iterations')
+  print(f'{"":<12}{"engine":<8}{"total":>10}{"numbers built":>16}')
+  for label, interning in (('fresh', False), ('interned', True)):
+    basic.SMALL_INT_MAX = small_int_max if interning else basic.SMALL_INT_MIN - 1
+    try:
+      for engine, run in (
+        ('tree', lambda: basic.Interpreter().visit(node, new_context())),
+        ('vm', lambda: basic.VM().run(code, new_context())),
+      ):
+        total = time_run(run)
+        numbers = count_numbers(run)
+        print(f'{label:<12}{engine:<8}{total:>9.3f}s{numbers:>16}')
+    finally:
+      basic.SMALL_INT_MAX = small_int_max
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,362 @@
+#######################################
+# LEXER BENCHMARK
+#######################################
+
+# Tokenizing throughput of Lexer.make_tokens on a generated source of
+# the given size (1 MB by default), mixing identifiers, keywords,
+# numbers, strings with escapes, operators and comments, against the
+# character-at-a-time scanner it replaced (OldLexer below).
+#
+#   python benchmarks/lexer.py [megabytes]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+#######################################
+# OLD LEXER
+#######################################
+
+# Lexer, Token and Position as they were before the master regex, kept
+# here as the baseline the new lexer is measured against
+
+class OldPosition:
+  def __init__(self, idx, ln, col, fn, ftxt):
+    self.idx = idx
+    self.ln = ln
+    self.col = col
+    self.fn = fn
+    self.ftxt = ftxt
+
+  def advance(self, current_char=None):
+    self.idx += 1
+    self.col += 1
+
+    if current_char == '\n':
+      self.ln += 1
+      self.col = 0
+
+    return self
+
+  def copy(self):
+    return OldPosition(self.idx, self.ln, self.col, self.fn, self.ftxt)
+
+class OldToken:
+  def __init__(self, type_, value=None, pos_start=None, pos_end=None):
+    self.type = type_
+    self.value = value
+
+    if pos_start:
+      self.pos_start = pos_start.copy()
+      self.pos_end = pos_start.copy()
+      self.pos_end.advance()
+
+    if pos_end:
+      self.pos_end = pos_end.copy()
+
+class OldLexer:
+  def __init__(self, fn, text):
+    self.fn = fn
+    self.text = text
+    self.pos = OldPosition(-1, 0, -1, fn, text)
+    self.current_char = None
+    self.advance()
+
+  def advance(self):
+    self.pos.advance(self.current_char)
+    self.current_char = self.text[self.pos.idx] if self.pos.idx < len(self.text) else None
+
+  def make_tokens(self):
+    tokens = []
+
+    while self.current_char != None:
+      if self.current_char in ' \t':
+        self.advance()
+
+      elif self.current_char == ':':
+        # Check if this is the start of a comment
+        next_char = self.text[self.pos.idx + 1] if self.pos.idx + 1 < len(self.text) else None
+        if next_char == ':':
+          self.skip_comment()
+        else:
+          pos_start = self.pos.copy()
+          char = self.current_char
+          self.advance()
+          return [], basic.IllegalCharError(pos_start, self.pos, "'" + char + "'")
+
+      elif self.current_char in ';\n':
+        tokens.append(OldToken(basic.TT_NEWLINE, pos_start=self.pos))
+        self.advance()
+
+      elif self.current_char in basic.DIGITS:
+        tokens.append(self.make_number())
+
+      elif self.current_char in basic.LETTERS:
+        tokens.append(self.make_identifier())
+
+      elif self.current_char in ('"', "'"):  # Handle both single and double quotes
+        token, error = self.make_string()
+        if error: return [], error
+        tokens.append(token)
+
+      elif self.current_char == '{':
+        tokens.append(OldToken(basic.TT_LBRACE, pos_start=self.pos))
+        self.advance()
+
+      elif self.current_char == '}':
+        tokens.append(OldToken(basic.TT_RBRACE, pos_start=self.pos))
+        self.advance()
+
+      elif self.current_char == '+':
+        tokens.append(OldToken(basic.TT_PLUS, pos_start=self.pos))
+        self.advance()
+
+      elif self.current_char == '-':
+        tokens.append(self.make_minus_or_arrow())
+
+      elif self.current_char == '*':
+        tokens.append(OldToken(basic.TT_MUL, pos_start=self.pos))
+        self.advance()
+
+      elif self.current_char == '%':
+        tokens.append(OldToken(basic.TT_MOD, pos_start=self.pos))
+        self.advance()
+
+      elif self.current_char == '/':
+        tokens.append(OldToken(basic.TT_DIV, pos_start=self.pos))
+        self.advance()
+
+      elif self.current_char == '^':
+        tokens.append(OldToken(basic.TT_POW, pos_start=self.pos))
+        self.advance()
+
+      elif self.current_char == '(':
+        tokens.append(OldToken(basic.TT_LPAREN, pos_start=self.pos))
+        self.advance()
+
+      elif self.current_char == ')':
+        tokens.append(OldToken(basic.TT_RPAREN, pos_start=self.pos))
+        self.advance()
+
+      elif self.current_char == '[':
+        tokens.append(OldToken(basic.TT_LSQUARE, pos_start=self.pos))
+        self.advance()
+
+      elif self.current_char == ']':
+        tokens.append(OldToken(basic.TT_RSQUARE, pos_start=self.pos))
+        self.advance()
+
+      elif self.current_char == '!':
+        token, error = self.make_not_equals()
+        if error: return [], error
+        tokens.append(token)
+
+      elif self.current_char == '=':
+        tokens.append(self.make_equals())
+
+      elif self.current_char == '<':
+        tokens.append(self.make_less_than())
+
+      elif self.current_char == '>':
+        tokens.append(self.make_greater_than())
+
+      elif self.current_char == ',':
+        tokens.append(OldToken(basic.TT_COMMA, pos_start=self.pos))
+        self.advance()
+
+      else:
+        pos_start = self.pos.copy()
+        char = self.current_char
+        self.advance()
+        return [], basic.IllegalCharError(pos_start, self.pos, "'" + char + "'")
+
+    tokens.append(OldToken(basic.TT_EOF, pos_start=self.pos))
+    return tokens, None
+
+  def make_number(self):
+    num_str = ''
+    dot_count = 0
+    pos_start = self.pos.copy()
+
+    while self.current_char != None and self.current_char in basic.DIGITS + '.':
+      if self.current_char == '.':
+        if dot_count == 1: break
+        dot_count += 1
+      num_str += self.current_char
+      self.advance()
+
+    if dot_count == 0:
+      return OldToken(basic.TT_INT, int(num_str), pos_start, self.pos)
+    else:
+      return OldToken(basic.TT_FLOAT, float(num_str), pos_start, self.pos)
+
+  def make_string(self):
+    string = ''
+    pos_start = self.pos.copy()
+    escape_character = False
+    quote_char = self.current_char
+    self.advance()
+
+    escape_characters = {
+      'n': '\n',
+      't': '\t'
+    }
+
+    while self.current_char != None and (self.current_char != quote_char or escape_character):
+        if escape_character:
+            string += escape_characters.get(self.current_char, self.current_char)
+            escape_character = False
+        else:
+            if self.current_char == '\\':
+                escape_character = True
+            else:
+                string += self.current_char
+        self.advance()
+
+    if self.current_char != quote_char:
+        return None, basic.IllegalCharError(pos_start, self.pos, f"Expected closing quote {quote_char}")
+
+    self.advance()
+    return OldToken(basic.TT_STRING, string, pos_start, self.pos), None
+
+  def make_identifier(self):
+    id_str = ''
+    pos_start = self.pos.copy()
+
+    while self.current_char != None and self.current_char in basic.LETTERS_DIGITS + '_':
+      id_str += self.current_char
+      self.advance()
+
+    tok_type = basic.TT_KEYWORD if id_str in basic.KEYWORDS else basic.TT_IDENTIFIER
+    return OldToken(tok_type, id_str, pos_start, self.pos)
+
+  def make_minus_or_arrow(self):
+    tok_type = basic.TT_MINUS
+    pos_start = self.pos.copy()
+    self.advance()
+
+    if self.current_char == '>':
+      self.advance()
+      tok_type = basic.TT_ARROW
+
+    return OldToken(tok_type, pos_start=pos_start, pos_end=self.pos)
+
+  def make_not_equals(self):
+    pos_start = self.pos.copy()
+    self.advance()
+
+    if self.current_char == '=':
+      self.advance()
+      return OldToken(basic.TT_NE, pos_start=pos_start, pos_end=self.pos), None
+
+    self.advance()
+    return None, basic.ExpectedCharError(pos_start, self.pos, "'=' (after '!')")
+
+  def make_equals(self):
+    tok_type = basic.TT_EQ
+    pos_start = self.pos.copy()
+    self.advance()
+
+    if self.current_char == '=':
+      self.advance()
+      tok_type = basic.TT_EE
+
+    return OldToken(tok_type, pos_start=pos_start, pos_end=self.pos)
+
+  def make_less_than(self):
+    tok_type = basic.TT_LT
+    pos_start = self.pos.copy()
+    self.advance()
+
+    if self.current_char == '=':
+      self.advance()
+      tok_type = basic.TT_LTE
+
+    return OldToken(tok_type, pos_start=pos_start, pos_end=self.pos)
+
+  def make_greater_than(self):
+    tok_type = basic.TT_GT
+    pos_start = self.pos.copy()
+    self.advance()
+
+    if self.current_char == '=':
+      self.advance()
+      tok_type = basic.TT_GTE
+
+    return OldToken(tok_type, pos_start=pos_start, pos_end=self.pos)
+
+  def skip_comment(self):
+    # Skip both colons
+    self.advance()  # first colon
+    self.advance()  # second colon
+
+    # Skip everything until newline
+    while self.current_char != None and self.current_char != '\n':
+        self.advance()
+
+    # Skip the newline character if present
+    if self.current_char == '\n':
+        self.advance()
+
+#######################################
+# BENCHMARK
+#######################################
+
+CHUNK = \
+'''initiate total_{n} = 0
+:: running sum with a step
+for i = 0 to {n} step 2 THEN
+  initiate total_{n} = total_{n} + i * 3.25 - (i % 7) ^ 2
+  if total_{n} >= 100 and not i == 3 THEN echo("big\\tvalue: " + str(total_{n}))
+END
+function scale_{n}(x, y) -> [x / y, x != y, 'done\\n']
+'''
+
+def make_source(size):
+  parts = []
+  length = 0
+  n = 0
+  while length < size:
+    chunk = CHUNK.format(n=n)
+    parts.append(chunk)
+    length += len(chunk)
+    n += 1
+  return ''.join(parts)
+
+def time_lexer(lexer_class, text):
+  best = None
+  for _ in range(5):
+    # Drop the last run's tokens first so freeing them isn't timed
+    tokens = None
+    start = time.perf_counter()
+    tokens, error = lexer_class('<bench>', text).make_tokens()
+    elapsed = time.perf_counter() - start
+    if error: raise SystemExit(error.as_string())
+    best = elapsed if best is None else min(best, elapsed)
+  return best, tokens
+
+def main():
+  megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+  text = make_source(int(megabytes * 1024 * 1024))
+  size = len(text) / 1024 / 1024
+
+  old_time, tokens = time_lexer(OldLexer, text)
+  # Only the kinds and values are kept, so the old tokens aren't still
+  # on the heap while the new lexer is timed
+  old_tokens = [(t.type, t.value) for t in tokens]
+  tokens = None
+  new_time, tokens = time_lexer(basic.Lexer, text)
+  assert old_tokens == [(t.type, t.value) for t in tokens]
+
+  print(f'{size:.2f} MB, {len(tokens)} tokens')
+  print(f'{"":<8}{"total":>10}{"MB/s":>8}{"Mtok/s":>8}')
+  for label, best in (('old', old_time), ('new', new_time)):
+    print(f'{label:<8}{best:>9.3f}s{size / best:>8.2f}{len(tokens) / best / 1e6:>8.2f}')
+  print(f'speedup: {old_time / new_time:.2f}x')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,79 @@
+#######################################
+# LIST BUILDING BENCHMARK
+#######################################
+
+# Time per element of building a list in a loop, by `+` and by append(),
+# and of rewriting every item of it with update(), at growing sizes on
+# both engines. With the lists sharing one buffer the time per element
+# stays flat as the list grows; a copy per `+` would grow with the list.
+#
+#   python benchmarks/list_building.py [largest]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+SOURCES = (
+  ('plus', '''
+initiate items = []
+for i = 0 to {n} THEN
+  initiate items = items + i
+END
+'''),
+  ('append', '''
+initiate items = []
+for i = 0 to {n} THEN
+  append(items, i)
+END
+'''),
+  ('update', '''
+initiate items = []
+for i = 0 to {n} THEN
+  initiate items = items + i
+END
+for i = 0 to {n} THEN
+  update(items, i, items(i) * 2)
+END
+'''),
+)
+
+def parse(text):
+  node, error = basic.parse_cache.parse('<bench>', text)
+  if error: raise SystemExit(error.as_string())
+  return node
+
+def new_context():
+  context = basic.Context('<program>')
+  context.symbol_table = basic.SymbolTable(basic.global_symbol_table)
+  return context
+
+def time_run(run, repeat=3):
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+def main():
+  largest = int(sys.argv[1]) if len(sys.argv) > 1 else 40000
+  sizes = (largest // 16, largest // 4, largest)
+
+  print('time per element')
+  print(f'{"":<8}{"elements":>10}{"tree":>12}{"vm":>12}')
+  for label, source in SOURCES:
+    for n in sizes:
+      node = parse(source.format(n=n))
+      code = basic.Compiler().compile(node)
+
+      tree = time_run(lambda: basic.Interpreter().visit(node, new_context()))
+      vm = time_run(lambda: basic.VM().run(code, new_context()))
+      print(f'{label:<8}{n:>10}{tree / n * 1e9:>10.0f}ns{vm / n * 1e9:>10.0f}ns')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,86 @@
+#######################################
+# MAP AND SET BENCHMARK
+#######################################
+
+# Time per element of filling a set and a map from a loop and probing
+# them with has(), at growing sizes on both engines. Lookups hash the
+# plain value of the key, so the time per element stays flat as the
+# collections grow. Also dedups a list of the same size with to_set().
+#
+#   python benchmarks/map_set.py [largest]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+SOURCES = (
+  ('set', '''
+initiate seen = to_set([])
+initiate hits = 0
+for i = 0 to {n} THEN
+  add(seen, i % 997 * 7 + i)
+END
+for i = 0 to {n} THEN
+  if has(seen, i) THEN initiate hits = hits + 1
+END
+'''),
+  ('map', '''
+initiate counts = {{}}
+for i = 0 to {n} THEN
+  initiate key = "k" + i % 5000
+  if has(counts, key) THEN
+    set(counts, key, get(counts, key) + 1)
+  else
+    set(counts, key, 1)
+  END
+END
+'''),
+  ('to_set', '''
+initiate items = []
+for i = 0 to {n} THEN
+  append(items, i % 1000)
+END
+initiate distinct = len(to_set(items))
+'''),
+)
+
+def parse(text):
+  node, error = basic.parse_cache.parse('<bench>', text)
+  if error: raise SystemExit(error.as_string())
+  return node
+
+def new_context():
+  context = basic.Context('<program>')
+  context.symbol_table = basic.SymbolTable(basic.global_symbol_table)
+  return context
+
+def time_run(run, repeat=3):
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+def main():
+  largest = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+  sizes = (largest // 16, largest // 4, largest)
+
+  print('time per element')
+  print(f'{"":<8}{"elements":>10}{"tree":>12}{"vm":>12}')
+  for label, source in SOURCES:
+    for n in sizes:
+      node = parse(source.format(n=n))
+      code = basic.Compiler().compile(node)
+
+      tree = time_run(lambda: basic.Interpreter().visit(node, new_context()))
+      vm = time_run(lambda: basic.VM().run(code, new_context()))
+      print(f'{label:<8}{n:>10}{tree / n * 1e9:>10.0f}ns{vm / n * 1e9:>10.0f}ns')
+
+if __name__ == '__main__':
+  main()
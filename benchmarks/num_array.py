@@ -0,0 +1,85 @@
+#######################################
+# NUMERIC ARRAY BENCHMARK
+#######################################
+
+# The same float data as a List of Numbers and as a NumArray: memory per
+# element, measured with tracemalloc, then the time of the reductions and
+# of an elementwise `x * 2 + y`, which for lists is a script loop.
+#
+#   python benchmarks/num_array.py [elements]
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+LIST_SOURCES = (
+  ('sum', 'initiate result = sum(xs)'),
+  ('average', 'initiate result = average(xs)'),
+  ('max', 'initiate result = max(xs)'),
+  ('x * 2 + y', '''
+initiate result = []
+for i = 0 to len(xs) THEN
+  append(result, xs(i) * 2 + ys(i))
+END
+'''),
+)
+
+ARRAY_SOURCES = (
+  'initiate result = sum(a)',
+  'initiate result = average(a)',
+  'initiate result = max(a)',
+  'initiate result = a * 2 + b',
+)
+
+def held_per_element(make, n):
+  tracemalloc.start()
+  base = tracemalloc.get_traced_memory()[0]
+  value = make()
+  held = tracemalloc.get_traced_memory()[0] - base
+  tracemalloc.stop()
+  return value, held / n
+
+def parse(text):
+  node, error = basic.parse_cache.parse('<bench>', text)
+  if error: raise SystemExit(error.as_string())
+  return node
+
+def time_run(node, repeat=3):
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    _, error = basic.execute(node)
+    elapsed = time.perf_counter() - start
+    if error: raise SystemExit(error.as_string())
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+def main():
+  n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+  values = [i * 0.5 + 0.25 for i in range(n)]
+
+  xs, list_bytes = held_per_element(lambda: basic.List([basic.Number(value) for value in values]), n)
+  a, array_bytes = held_per_element(lambda: basic.NumArray(basic.make_array(values)), n)
+  ys = basic.List([basic.Number(value) for value in values])
+  b = basic.NumArray(basic.make_array(values))
+  for name, value in (('xs', xs), ('ys', ys), ('a', a), ('b', b)):
+    basic.global_symbol_table.set(name, value)
+
+  print(f'{n} floats')
+  print(f'{"":<12}{"list":>10}{"array":>10}{"speedup":>10}')
+  print(f'{"bytes":<12}{list_bytes:>10.0f}{array_bytes:>10.0f}{list_bytes / array_bytes:>9.1f}x')
+  for (label, list_source), array_source in zip(LIST_SOURCES, ARRAY_SOURCES):
+    list_time = time_run(parse(list_source))
+    array_time = time_run(parse(array_source))
+    print(f'{label:<12}{list_time:>9.3f}s{array_time:>9.3f}s{list_time / array_time:>9.1f}x')
+
+  for name in ('xs', 'ys', 'a', 'b', 'result'):
+    basic.global_symbol_table.remove(name)
+
+if __name__ == '__main__':
+  main()
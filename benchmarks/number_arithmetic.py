@@ -0,0 +1,67 @@
+#######################################
+# NUMBER ARITHMETIC BENCHMARK
+#######################################
+
+# Time per iteration of arithmetic `for` loops on both engines, which do
+# all their Number-with-Number operations through NUMBER_OPERATIONS. Run
+# it against an older checkout to compare.
+#
+#   python benchmarks/number_arithmetic.py [iterations]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+SOURCES = (
+  ('sum', '''
+initiate total = 0
+for i = 0 to {n} THEN
+  initiate total = total + i
+END
+'''),
+  ('mixed', '''
+initiate total = 0
+for i = 0 to {n} THEN
+  initiate total = total + i * 2 - i % 7 / 2
+END
+'''),
+)
+
+def parse(text):
+  node, error = basic.parse_cache.parse('<bench>', text)
+  if error: raise SystemExit(error.as_string())
+  return node
+
+def new_context():
+  context = basic.Context('<program>')
+  context.symbol_table = basic.SymbolTable(basic.global_symbol_table)
+  return context
+
+def time_run(run, repeat=3):
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+def main():
+  n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+  print(f'for loops with {n} iterations')
+  print(f'{"":<8}{"tree":>10}{"per iteration":>16}{"vm":>10}{"per iteration":>16}')
+  for label, source in SOURCES:
+    node = parse(source.format(n=n))
+    code = basic.Compiler().compile(node)
+
+    tree = time_run(lambda: basic.Interpreter().visit(node, new_context()))
+    vm = time_run(lambda: basic.VM().run(code, new_context()))
+    print(f'{label:<8}{tree:>9.3f}s{tree / n * 1e9:>14.0f}ns{vm:>9.3f}s{vm / n * 1e9:>14.0f}ns')
+
+if __name__ == '__main__':
+  main()
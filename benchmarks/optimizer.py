@@ -0,0 +1,71 @@
+#######################################
+# OPTIMIZER BENCHMARK
+#######################################
+
+# A loop whose body is mostly constant arithmetic and a constant `if`,
+# run from the plain tree and from the tree the Optimizer folded, on both
+# engines. Also counts the nodes each tree has left.
+#
+#   python benchmarks/optimizer.py [iterations]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+SOURCE = '''
+initiate total = 0
+for i = 0 to {n} THEN
+  initiate circumference = 2 * MATH_PI * 10
+  initiate seconds = 60 * 60 * 24
+  if True THEN
+    initiate total = total + circumference / seconds + i
+  else
+    initiate total = total - 1
+  END
+END
+'''
+
+def count_nodes(value):
+  if isinstance(value, (list, tuple)):
+    return sum(count_nodes(item) for item in value)
+  if not isinstance(value, basic.Node):
+    return 0
+  return 1 + sum(count_nodes(child) for child in value.fields())
+
+def parse(text, optimize):
+  basic.parse_cache.clear()
+  node, error = basic.parse_cache.parse('<bench>', text, optimize)
+  if error: raise SystemExit(error.as_string())
+  return node
+
+def time_run(node, use_vm, repeat=5):
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    _, error = basic.execute(node, use_vm)
+    elapsed = time.perf_counter() - start
+    if error: raise SystemExit(error.as_string())
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+def main():
+  n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+  text = SOURCE.format(n=n)
+  plain = parse(text, False)
+  optimized = parse(text, True)
+
+  print(f'for loop with {n} iterations')
+  print(f'{"":<12}{"nodes":>8}{"tree":>10}{"vm":>10}')
+  results = {}
+  for label, node in (('plain', plain), ('optimized', optimized)):
+    results[label] = (time_run(node, False), time_run(node, True))
+    print(f'{label:<12}{count_nodes(node):>8}{results[label][0]:>9.3f}s{results[label][1]:>9.3f}s')
+  for index, engine in enumerate(('tree', 'vm')):
+    print(f'speedup ({engine}): {results["plain"][index] / results["optimized"][index]:.2f}x')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,75 @@
+#######################################
+# PARALLEL MAP BENCHMARK
+#######################################
+
+# Throughput of a CPU-bound JhayScript function mapped over a list, in
+# this process with a for loop against parallel_map with a growing number
+# of workers. Speedup can only reach the number of CPUs on the machine,
+# which is printed first.
+#
+#   python benchmarks/parallel_map.py [elements] [n]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+SETUP = '''
+function count_primes(n)
+  initiate count = 0
+  for i = 2 to n THEN
+    if is_prime(i) THEN initiate count = count + 1
+  END
+  release count
+END
+initiate inputs = []
+for i = 0 to {elements} THEN
+  append(inputs, {n} + i)
+END
+'''
+
+SERIAL = '''
+initiate results = []
+for i = 0 to len(inputs) THEN
+  append(results, count_primes(inputs(i)))
+END
+'''
+
+PARALLEL = 'initiate results = parallel_map(count_primes, inputs, {workers})'
+
+def time_run(source):
+  start = time.perf_counter()
+  _, error = basic.run('<bench>', source)
+  elapsed = time.perf_counter() - start
+  if error: raise SystemExit(error.as_string())
+  return elapsed, [number.value for number in basic.global_symbol_table.get('results').elements]
+
+def main():
+  elements = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+  n = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+  cpus = os.cpu_count() or 1
+
+  _, error = basic.run('<bench>', SETUP.format(elements=elements, n=n))
+  if error: raise SystemExit(error.as_string())
+
+  serial, expected = time_run(SERIAL)
+  print(f'{elements} x count_primes(~{n}) on {cpus} CPUs')
+  print(f'{"":<14}{"total":>10}{"speedup":>10}')
+  print(f'{"for loop":<14}{serial:>9.2f}s{1:>9.2f}x')
+
+  workers = 1
+  while workers <= max(cpus, 2):
+    # The first call also starts the pool; time the warm one
+    time_run(PARALLEL.format(workers=workers))
+    elapsed, results = time_run(PARALLEL.format(workers=workers))
+    assert results == expected
+    print(f'{f"{workers} workers":<14}{elapsed:>9.2f}s{serial / elapsed:>9.2f}x')
+    workers *= 2
+
+  basic.worker_pool.close()
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,64 @@
+#######################################
+# PARSE CACHE BENCHMARK
+#######################################
+
+# Cost of awake()-ing the same script over and over, with the parse cache
+# emptied before every call (lex + parse + resolve each time) against a warm
+# cache that hands back the tree parsed the first time. The script mostly
+# defines functions, so nearly all of its cost is front end work.
+#
+#   python benchmarks/parse_cache.py [calls] [functions]
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+FUNCTION = '''
+function helper_{i}(a, b)
+  initiate total = 0
+  for i = 0 to a THEN
+    initiate total = total + i * b - {i}
+  END
+  if total > 100 THEN release total / 2
+  release total
+END
+'''
+
+def make_script(functions):
+  return ''.join(FUNCTION.format(i=i) for i in range(functions)) + 'initiate loaded = 1\n'
+
+def time_calls(path, calls, cold):
+  basic.parse_cache.clear()
+  call = f'awake("{path}")'
+  start = time.perf_counter()
+  for _ in range(calls):
+    if cold: basic.parse_cache.clear()
+    _, error = basic.run('<bench>', call)
+    if error: raise SystemExit(error.as_string())
+  return time.perf_counter() - start
+
+def main():
+  calls = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+  functions = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+  with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, 'module.jhay')
+    with open(path, 'w') as f:
+      f.write(make_script(functions))
+
+    cold = time_calls(path, calls, cold=True)
+    warm = time_calls(path, calls, cold=False)
+
+  print(f'{calls} awake() calls of a script defining {functions} functions')
+  print(f'{"":<12}{"total":>10}{"per call":>12}')
+  for label, total in (('no cache', cold), ('cached', warm)):
+    print(f'{label:<12}{total:>9.3f}s{total / calls * 1e3:>10.2f}ms')
+  print(f'speedup: {cold / warm:.1f}x')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,83 @@
+#######################################
+# POSITION BENCHMARK
+#######################################
+
+# Memory held by the tokens and AST of a generated script (2 MB by
+# default) and the time to lex and parse it. Tokens and nodes carry
+# integer offsets into a shared Source; Position objects only exist for
+# what an error, or the interpreter, actually reads.
+#
+#   python benchmarks/positions.py [megabytes]
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+CHUNK = \
+'''initiate total_{n} = 0
+for i = 0 to {n} step 2 THEN
+  initiate total_{n} = total_{n} + i * 3.25 - (i % 7) ^ 2
+  if total_{n} >= 100 and not i == 3 THEN echo("big: " + str(total_{n}))
+END
+function scale_{n}(x, y) -> [x / y, x == y, 'done']
+'''
+
+def make_source(size):
+  parts = []
+  length = 0
+  n = 0
+  while length < size:
+    chunk = CHUNK.format(n=n)
+    parts.append(chunk)
+    length += len(chunk)
+    n += 1
+  return ''.join(parts)
+
+def parse(text):
+  tokens, error = basic.Lexer('<bench>', text).make_tokens()
+  if error: raise SystemExit(error.as_string())
+  ast = basic.Parser(tokens).parse()
+  if ast.error: raise SystemExit(ast.error.as_string())
+  return tokens, ast.node
+
+def count_positions(node, seen=None):
+  # Position objects reachable from the AST
+  seen = set() if seen is None else seen
+  if id(node) in seen: return 0
+  seen.add(id(node))
+
+  if isinstance(node, basic.Position): return 1
+  if isinstance(node, (list, tuple)):
+    return sum(count_positions(item, seen) for item in node)
+  if not isinstance(node, basic.Node): return 0
+  # Cached positions live in the node's __dict__, its fields in slots
+  values = node.fields() + list(vars(node).values())
+  return sum(count_positions(value, seen) for value in values)
+
+def main():
+  megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+  sys.setrecursionlimit(max(sys.getrecursionlimit(), 100000))
+  text = make_source(int(megabytes * 1024 * 1024))
+
+  start = time.perf_counter()
+  parse(text)
+  elapsed = time.perf_counter() - start
+
+  tracemalloc.start()
+  base = tracemalloc.get_traced_memory()[0]
+  tokens, node = parse(text)
+  held = tracemalloc.get_traced_memory()[0] - base
+  tracemalloc.stop()
+
+  print(f'{len(text) / 1024 / 1024:.2f} MB source, {len(tokens)} tokens')
+  print(f'lex + parse       {elapsed:>8.3f}s')
+  print(f'tokens + AST held {held / 1024 / 1024:>8.1f}MB ({held / len(tokens):.0f}B per token)')
+  print(f'Position objects  {count_positions(node):>8}')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,93 @@
+#######################################
+# RESOLVER BENCHMARK
+#######################################
+
+# Variable lookups with and without the resolver pass. Unresolved, every
+# read hashes its name into each frame on the call chain until it finds
+# it, so globals and builtins read from deep recursion cost O(depth).
+# Resolved, locals are read from their frame slot and names no function
+# binds skip the call chain.
+#
+#   python benchmarks/resolver.py [depth]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+RECURSION = '''
+initiate limit = {depth}
+initiate scale = 3
+function down(n)
+  initiate total = 0
+  for i = 0 to 20 THEN
+    initiate total = total + abs(i * scale - n) + limit
+  END
+  if n == 0 THEN release total
+  release total + down(n - 1)
+END
+for k = 0 to 5 THEN
+  down(limit)
+END
+'''
+
+LOOP = '''
+function work(n)
+  initiate total = 0
+  for i = 0 to n THEN
+    initiate total = total + i * 2 - i
+  END
+  release total
+END
+work({n})
+'''
+
+def parse(text):
+  tokens, error = basic.Lexer('<bench>', text).make_tokens()
+  if error: raise SystemExit(error.as_string())
+  ast = basic.Parser(tokens).parse()
+  if ast.error: raise SystemExit(ast.error.as_string())
+  return ast.node
+
+def new_context():
+  context = basic.Context('<program>')
+  context.symbol_table = basic.SymbolTable(basic.global_symbol_table)
+  return context
+
+def time_run(text, resolve, use_vm, repeat=3):
+  node = parse(text)
+  if resolve:
+    basic.Resolver().resolve(node)
+
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    if use_vm:
+      basic.VM().run(basic.Compiler().compile(node), new_context())
+    else:
+      basic.Interpreter().visit(node, new_context())
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+def main():
+  depth = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+  sys.setrecursionlimit(max(sys.getrecursionlimit(), depth * 200))
+
+  workloads = (
+    (f'recursion depth {depth}', RECURSION.format(depth=depth)),
+    ('local loop', LOOP.format(n=depth * 100)),
+  )
+
+  print(f'{"workload":<24}{"engine":<8}{"by name":>10}{"resolved":>10}{"speedup":>10}')
+  for label, text in workloads:
+    for engine, use_vm in (('tree', False), ('vm', True)):
+      by_name = time_run(text, False, use_vm)
+      resolved = time_run(text, True, use_vm)
+      print(f'{label:<24}{engine:<8}{by_name:>9.3f}s{resolved:>9.3f}s{by_name / resolved:>9.2f}x')
+
+if __name__ == '__main__':
+  main()
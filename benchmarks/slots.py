@@ -0,0 +1,72 @@
+#######################################
+# SLOTS BENCHMARK
+#######################################
+
+# Memory per object, measured with tracemalloc. First for each of the
+# classes a run creates the most of, built directly, then for a script
+# that builds a large list of numbers and strings, where the memory the
+# finished list holds is divided by its length.
+#
+#   python benchmarks/slots.py [elements]
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+SOURCE = '''
+initiate items = []
+for i = 0 to {n} THEN
+  append(items, i * 0.5)
+  append(items, "item")
+END
+'''
+
+COUNT = 20000
+
+def bytes_per_object(make):
+  tracemalloc.start()
+  base = tracemalloc.get_traced_memory()[0]
+  objects = [make(i) for i in range(COUNT)]
+  held = tracemalloc.get_traced_memory()[0] - base
+  tracemalloc.stop()
+  # Less the list holding them
+  return (held - sys.getsizeof(objects)) / len(objects)
+
+def main():
+  n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+  source = basic.Source('<bench>', 'x')
+  token = basic.Token(basic.TT_INT, 1, source, 0, 1)
+  number_node = basic.NumberNode(token)
+
+  print(f'{"object":<14}{"bytes":>8}')
+  for label, make in (
+    ('Number', lambda i: basic.Number(i + 0.5)),
+    ('String', lambda i: basic.String('item')),
+    ('List', lambda i: basic.List([])),
+    ('Token', lambda i: basic.Token(basic.TT_INT, i, source, i, i + 1)),
+    ('Position', lambda i: basic.Position(i, source)),
+    ('NumberNode', lambda i: basic.NumberNode(token)),
+    ('BinOpNode', lambda i: basic.BinOpNode(number_node, token, number_node)),
+  ):
+    print(f'{label:<14}{bytes_per_object(make):>8.0f}')
+
+  node, error = basic.parse_cache.parse('<bench>', SOURCE.format(n=n))
+  if error: raise SystemExit(error.as_string())
+
+  tracemalloc.start()
+  base = tracemalloc.get_traced_memory()[0]
+  _, error = basic.execute(node)
+  if error: raise SystemExit(error.as_string())
+  items = basic.global_symbol_table.get('items')
+  held = tracemalloc.get_traced_memory()[0] - base
+  tracemalloc.stop()
+
+  print(f'list of {len(items.elements)} built by a script: '
+        f'{held / 1024 / 1024:.1f}MB, {held / len(items.elements):.0f}B per element')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,79 @@
+#######################################
+# STARTUP BENCHMARK
+#######################################
+
+# Wall time of starting a fresh `python __main__.py script.jhay` process,
+# deleting script.jhayc before every start (the script is read, lexed and
+# parsed each time) against leaving the .jhayc written by the first start
+# in place. The script mostly defines functions, like a library-heavy
+# main.jhay, so its run time is small next to the front end.
+#
+#   python benchmarks/startup.py [starts] [functions]
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+MAIN = os.path.join(ROOT, '__main__.py')
+
+FUNCTION = '''
+function helper_{i}(a, b)
+  initiate total = 0
+  for i = 0 to a THEN
+    initiate total = total + i * b - {i}
+  END
+  if total > 100 THEN release total / 2
+  release total
+END
+'''
+
+def make_script(functions):
+  return ''.join(FUNCTION.format(i=i) for i in range(functions)) + 'echo(helper_0(3, 4))\n'
+
+def remove(path):
+  try: os.remove(path)
+  except OSError: pass
+
+def time_starts(path, starts, keep_compiled):
+  remove(path + 'c')
+  if keep_compiled:
+    # The first start writes the .jhayc the timed ones load
+    subprocess.run([sys.executable, MAIN, path], check=True, stdout=subprocess.DEVNULL)
+  total = 0
+  for _ in range(starts):
+    if not keep_compiled: remove(path + 'c')
+    start = time.perf_counter()
+    subprocess.run([sys.executable, MAIN, path], check=True, stdout=subprocess.DEVNULL)
+    total += time.perf_counter() - start
+  return total
+
+def main():
+  starts = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+  functions = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+  with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, 'main.jhay')
+    with open(path, 'w') as f:
+      f.write(make_script(functions))
+
+    cold = time_starts(path, starts, keep_compiled=False)
+    warm = time_starts(path, starts, keep_compiled=True)
+
+    # Interpreter import and process start, paid either way
+    empty = os.path.join(directory, 'empty.jhay')
+    with open(empty, 'w') as f:
+      f.write('echo(1)\n')
+    floor = time_starts(empty, starts, keep_compiled=True)
+
+  print(f'{starts} starts of a script defining {functions} functions')
+  print(f'{"":<14}{"per start":>12}{"minus empty":>14}')
+  for label, total in (('parse', cold), ('.jhayc', warm)):
+    print(f'{label:<14}{total / starts * 1e3:>10.1f}ms{(total - floor) / starts * 1e3:>12.1f}ms')
+  print(f'{"empty script":<14}{floor / starts * 1e3:>10.1f}ms')
+  print(f'speedup: {cold / warm:.2f}x, {(cold - floor) / (warm - floor):.2f}x excluding the empty start')
+
+if __name__ == '__main__':
+  main()
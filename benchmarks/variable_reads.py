@@ -0,0 +1,101 @@
+#######################################
+# VARIABLE READ BENCHMARK
+#######################################
+
+# Cost of reading variables in a loop-heavy script, comparing the old
+# copy-on-every-read visit_VarAccessNode against handing out the stored
+# value. Besides wall time, counts how many Value objects each run builds.
+#
+#   python benchmarks/variable_reads.py [iterations]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+SOURCE = '''
+initiate total = 0
+initiate delta = 3
+initiate items = [1, 2, 3, 4]
+for i = 0 to {n} THEN
+  initiate total = total + i * delta - delta + i
+  initiate last = items / 3
+END
+'''
+
+class CopyingInterpreter(basic.Interpreter):
+  # The read visit_VarAccessNode did before values were shared
+  def visit_VarAccessNode(self, node, context):
+    var_name = node.var_name_tok.value
+    value = context.symbol_table.get(var_name)
+
+    if not value:
+      raise basic.RTError(
+        node.pos_start, node.pos_end,
+        f"'{var_name}' is not defined",
+        context
+      )
+
+    return value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
+
+CopyingInterpreter.dispatch = {}
+
+def parse(text):
+  tokens, error = basic.Lexer('<bench>', text).make_tokens()
+  if error: raise SystemExit(error.as_string())
+  ast = basic.Parser(tokens).parse()
+  if ast.error: raise SystemExit(ast.error.as_string())
+  return ast.node
+
+def new_context():
+  context = basic.Context('<program>')
+  context.symbol_table = basic.SymbolTable(basic.global_symbol_table)
+  return context
+
+def count_values(interpreter, node):
+  original = basic.Value.__init__
+  count = 0
+
+  def counting_init(self, *args, **kwargs):
+    nonlocal count
+    count += 1
+    original(self, *args, **kwargs)
+
+  basic.Value.__init__ = counting_init
+  try:
+    interpreter.visit(node, new_context())
+  finally:
+    basic.Value.__init__ = original
+  return count
+
+def time_run(interpreter, node, repeat=5):
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    interpreter.visit(node, new_context())
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+def main():
+  n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+  node = parse(SOURCE.format(n=n))
+
+  print(f'for loop with {n} iterations')
+  print(f'{"":<12}{"total":>10}{"values built":>16}')
+  results = []
+  for label, interpreter in (
+    ('copy', CopyingInterpreter()),
+    ('shared', basic.Interpreter()),
+  ):
+    total = time_run(interpreter, node)
+    values = count_values(interpreter, node)
+    results.append(total)
+    print(f'{label:<12}{total:>9.3f}s{values:>16}')
+  print(f'speedup: {results[0] / results[1]:.2f}x')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,73 @@
+#######################################
+# VECTOR BENCHMARK
+#######################################
+
+# The vec_* builtins on an array of floats, run through NumPy and through
+# the pure-Python fallback (use_numpy off). The last row passes a List
+# instead, so it also pays for converting the list on every call.
+#
+#   python benchmarks/vectors.py [elements]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+SOURCES = (
+  ('vec_add', 'initiate result = vec_add(a, b)'),
+  ('vec_mul', 'initiate result = vec_mul(a, 2)'),
+  ('vec_dot', 'initiate result = vec_dot(a, b)'),
+  ('vec_sum', 'initiate result = vec_sum(a)'),
+  ('vec_sort', 'initiate result = vec_sort(b)'),
+  ('vec_cumsum', 'initiate result = vec_cumsum(a)'),
+  ('vec_add list', 'initiate result = vec_add(xs, xs)'),
+)
+
+def parse(text):
+  node, error = basic.parse_cache.parse('<bench>', text)
+  if error: raise SystemExit(error.as_string())
+  return node
+
+def time_run(node, repeat=3):
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    _, error = basic.execute(node)
+    elapsed = time.perf_counter() - start
+    if error: raise SystemExit(error.as_string())
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+def main():
+  n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+  values = [(i * 7919) % n * 0.5 for i in range(n)]
+  data = {
+    'a': basic.NumArray(basic.make_array(values)),
+    'b': basic.NumArray(basic.make_array(values[::-1])),
+    'xs': basic.List([basic.Number(value) for value in values]),
+  }
+  for name, value in data.items():
+    basic.global_symbol_table.set(name, value)
+
+  has_numpy = basic.load_numpy() is not None
+  print(f'{n} floats, NumPy {"installed" if has_numpy else "not installed"}')
+  print(f'{"":<14}{"python":>10}{"numpy":>10}{"speedup":>10}')
+  for label, source in SOURCES:
+    node = parse(source)
+    basic.use_numpy = False
+    python_time = time_run(node)
+    basic.use_numpy = True
+    if has_numpy:
+      numpy_time = time_run(node)
+      print(f'{label:<14}{python_time:>9.3f}s{numpy_time:>9.3f}s{python_time / numpy_time:>9.1f}x')
+    else:
+      print(f'{label:<14}{python_time:>9.3f}s{"-":>10}{"-":>10}')
+
+  for name in list(data) + ['result']:
+    basic.global_symbol_table.remove(name)
+
+if __name__ == '__main__':
+  main()
@@ -9,10 +9,21 @@ from .lexer import *
 #######################################
 
 class Interpreter:
+  # Node class -> unbound visit_* method, filled in the first time each
+  # node class is seen so visit() never has to build a method name again
+  dispatch = {}
+
   def visit(self, node, context):
-    method_name = f'visit_{type(node).__name__}'
-    method = getattr(self, method_name, self.no_visit_method)
-    return method(node, context)
+    method = self.dispatch.get(type(node))
+    if method is None:
+      method = self.resolve_visit_method(type(node))
+    return method(self, node, context)
+
+  @classmethod
+  def resolve_visit_method(cls, node_class):
+    method = getattr(cls, f'visit_{node_class.__name__}', cls.no_visit_method)
+    cls.dispatch[node_class] = method
+    return method
 
   def no_visit_method(self, node, context):
     raise Exception(f'No visit_{type(node).__name__} method defined')
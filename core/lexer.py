@@ -4,6 +4,8 @@ from strings_with_arrows import *
 from .tokens import *
 
 class Token:
+  __slots__ = ('type', 'value', 'pos_start', 'pos_end')
+
   def __init__(self, type_, value=None, pos_start=None, pos_end=None):
     self.type = type_
     self.value = value
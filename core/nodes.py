@@ -6,6 +6,8 @@ from .tokens import *
 #######################################
 
 class NumberNode:
+  __slots__ = ('tok', 'pos_start', 'pos_end')
+
   def __init__(self, tok):
     self.tok = tok
 
@@ -16,6 +18,8 @@ class NumberNode:
     return f'{self.tok}'
 
 class StringNode:
+  __slots__ = ('tok', 'pos_start', 'pos_end')
+
   def __init__(self, tok):
     self.tok = tok
 
@@ -26,6 +30,8 @@ class StringNode:
     return f'{self.tok}'
 
 class ListNode:
+  __slots__ = ('element_nodes', 'pos_start', 'pos_end')
+
   def __init__(self, element_nodes, pos_start, pos_end):
     self.element_nodes = element_nodes
 
@@ -33,6 +39,8 @@ class ListNode:
     self.pos_end = pos_end
 
 class VarAccessNode:
+  __slots__ = ('var_name_tok', 'pos_start', 'pos_end')
+
   def __init__(self, var_name_tok):
     self.var_name_tok = var_name_tok
 
@@ -40,6 +48,8 @@ class VarAccessNode:
     self.pos_end = self.var_name_tok.pos_end
 
 class VarAssignNode:
+  __slots__ = ('var_name_tok', 'value_node', 'pos_start', 'pos_end')
+
   def __init__(self, var_name_tok, value_node):
     self.var_name_tok = var_name_tok
     self.value_node = value_node
@@ -48,6 +58,8 @@ class VarAssignNode:
     self.pos_end = self.value_node.pos_end
 
 class BinOpNode:
+  __slots__ = ('left_node', 'op_tok', 'right_node', 'pos_start', 'pos_end')
+
   def __init__(self, left_node, op_tok, right_node):
     self.left_node = left_node
     self.op_tok = op_tok
@@ -60,6 +72,8 @@ class BinOpNode:
     return f'({self.left_node}, {self.op_tok}, {self.right_node})'
 
 class UnaryOpNode:
+  __slots__ = ('op_tok', 'node', 'pos_start', 'pos_end')
+
   def __init__(self, op_tok, node):
     self.op_tok = op_tok
     self.node = node
@@ -71,6 +85,8 @@ class UnaryOpNode:
     return f'({self.op_tok}, {self.node})'
 
 class IfNode:
+  __slots__ = ('cases', 'else_case', 'pos_start', 'pos_end')
+
   def __init__(self, cases, else_case):
     self.cases = cases
     self.else_case = else_case
@@ -79,6 +95,8 @@ class IfNode:
     self.pos_end = (self.else_case or self.cases[len(self.cases) - 1])[0].pos_end
 
 class ForNode:
+  __slots__ = ('var_name_tok', 'start_value_node', 'end_value_node', 'step_value_node', 'body_node', 'should_return_null', 'pos_start', 'pos_end')
+
   def __init__(self, var_name_tok, start_value_node, end_value_node, step_value_node, body_node, should_return_null):
     self.var_name_tok = var_name_tok
     self.start_value_node = start_value_node
@@ -91,6 +109,8 @@ class ForNode:
     self.pos_end = self.body_node.pos_end
 
 class WhileNode:
+  __slots__ = ('condition_node', 'body_node', 'should_return_null', 'pos_start', 'pos_end')
+
   def __init__(self, condition_node, body_node, should_return_null):
     self.condition_node = condition_node
     self.body_node = body_node
@@ -100,6 +120,8 @@ class WhileNode:
     self.pos_end = self.body_node.pos_end
 
 class TryNode:
+  __slots__ = ('try_body', 'catch_var', 'catch_body', 'pos_start', 'pos_end')
+
   def __init__(self, try_body, catch_var, catch_body, pos_start, pos_end):
     self.try_body = try_body
     self.catch_var = catch_var
@@ -114,6 +136,8 @@ class TryNode:
     return f"<error: {self.value}>"
 
 class FuncDefNode:
+  __slots__ = ('var_name_tok', 'arg_name_toks', 'body_node', 'should_auto_return', 'pos_start', 'pos_end')
+
   def __init__(self, var_name_tok, arg_name_toks, body_node, should_auto_return):
     self.var_name_tok = var_name_tok
     self.arg_name_toks = arg_name_toks
@@ -130,6 +154,8 @@ class FuncDefNode:
     self.pos_end = self.body_node.pos_end
 
 class CallNode:
+  __slots__ = ('node_to_call', 'arg_nodes', 'pos_start', 'pos_end')
+
   def __init__(self, node_to_call, arg_nodes):
     self.node_to_call = node_to_call
     self.arg_nodes = arg_nodes
@@ -142,6 +168,8 @@ class CallNode:
       self.pos_end = self.node_to_call.pos_end
 
 class ReturnNode:
+  __slots__ = ('node_to_return', 'pos_start', 'pos_end')
+
   def __init__(self, node_to_return, pos_start, pos_end):
     self.node_to_return = node_to_return
 
@@ -149,16 +177,22 @@ class ReturnNode:
     self.pos_end = pos_end
 
 class ContinueNode:
+  __slots__ = ('pos_start', 'pos_end')
+
   def __init__(self, pos_start, pos_end):
     self.pos_start = pos_start
     self.pos_end = pos_end
 
 class BreakNode:
+  __slots__ = ('pos_start', 'pos_end')
+
   def __init__(self, pos_start, pos_end):
     self.pos_start = pos_start
     self.pos_end = pos_end
 
 class ImportNode:
+  __slots__ = ('imports', 'module_path', 'pos_start', 'pos_end')
+
   def __init__(self, imports, module_path, pos_start, pos_end):
     self.imports = imports  # List of (name, alias) tuples
     self.module_path = module_path
@@ -66,6 +66,8 @@ class RTResult:
 #######################################
 
 class Value:
+  __slots__ = ('pos_start', 'pos_end', 'context')
+
   def __init__(self):
     self.set_pos()
     self.set_context()
@@ -139,6 +141,8 @@ class Value:
     )
 
 class Number(Value):
+  __slots__ = ('value',)
+
   def __init__(self, value):
     super().__init__()
     self.value = value
@@ -261,6 +265,8 @@ Number.true = Number(1)
 Number.math_PI = Number(math.pi)
 
 class String(Value):
+  __slots__ = ('value',)
+
   def __init__(self, value):
     super().__init__()
     self.value = value
@@ -292,6 +298,8 @@ class String(Value):
     return f'"{self.value}"'
 
 class List(Value):
+  __slots__ = ('elements',)
+
   def __init__(self, elements):
     super().__init__()
     self.elements = elements
@@ -350,6 +358,8 @@ class List(Value):
     return f'[{", ".join([repr(x) for x in self.elements])}]'
 
 class BaseFunction(Value):
+  __slots__ = ('name',)
+
   def __init__(self, name):
     super().__init__()
     self.name = name or "<anonymous>"
@@ -393,6 +403,8 @@ class BaseFunction(Value):
     return res.success(None)
   
 class ErrorValue(Value):
+  __slots__ = ('error', 'properties')
+
   def __init__(self, error):
     super().__init__()
     self.error = error
@@ -433,6 +445,8 @@ class ErrorValue(Value):
     return f"ErrorValue({self.error.error_name})"
 
 class Function(BaseFunction):
+  __slots__ = ('body_node', 'arg_names', 'should_auto_return')
+
   def __init__(self, name, body_node, arg_names, should_auto_return):
     super().__init__(name)
     self.body_node = body_node
@@ -463,6 +477,8 @@ class Function(BaseFunction):
     return f"<function {self.name}>"
 
 class BuiltInFunction(BaseFunction):
+  __slots__ = ()
+
   def __init__(self, name):
     super().__init__(name)
 
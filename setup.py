@@ -23,6 +23,9 @@ setup(
         ],
     },
     python_requires='>=3.6',
+    extras_require={
+        'vec': ['numpy'],  # Vectorized vec_* builtins
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -0,0 +1,218 @@
+#######################################
+# LANGUAGE TESTS
+#######################################
+
+# Each program is run on both engines, the tree interpreter and the VM.
+#
+#   python -m pytest tests
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+
+def run_both(text):
+  # (result, error) from each engine
+  return [basic.run('<test>', text, use_vm) for use_vm in (False, True)]
+
+#######################################
+# OPERATORS
+#######################################
+
+def test_not_on_non_numbers_is_illegal():
+  for operand in ('"s"', '[1]', 'echo'):
+    for result, error in run_both(f'not {operand}'):
+      assert result is None
+      assert isinstance(error, basic.RTError)
+      assert error.details == 'Illegal operation'
+
+def test_not_on_non_numbers_can_be_caught():
+  text = '''
+initiate caught = 0
+fuck_around THEN
+  not "s"
+find_out(e) THEN
+  initiate caught = 1
+END
+caught
+'''
+  for result, error in run_both(text):
+    assert error is None
+    assert result.elements[-1].value == 1
+
+#######################################
+# OPTIMIZER
+#######################################
+
+def test_optimizer_leaves_huge_powers_to_runtime():
+  def folded(text):
+    node, error = basic.parse_cache.parse('<test>', text, True)
+    assert error is None
+    return isinstance(node.element_nodes[0], basic.NumberNode)
+
+  assert folded('2^100')
+  assert folded('2^-3')
+  assert not folded('9^9^9')
+  assert not folded('(10^60)^64')
+
+#######################################
+# PARALLEL MAP
+#######################################
+
+def test_parallel_map_errors_can_be_caught():
+  # A worker can't start workers of its own; that must surface as an
+  # RTError, not a Python exception
+  text = '''
+function double(x) -> x * 2
+function nested(x) -> parallel_map(double, [x], 2)
+initiate caught = 0
+fuck_around THEN
+  parallel_map(nested, [1], 2)
+find_out(e) THEN
+  initiate caught = 1
+END
+caught
+'''
+  try:
+    result, error = basic.run('<test>', text)
+  finally:
+    basic.worker_pool.close()
+  assert error is None
+  assert result.elements[-1].value == 1
+
+def test_parallel_map_keeps_its_pool_between_jobs():
+  try:
+    basic.run('<test>', 'function double(x) -> x * 2\nparallel_map(double, [1, 2], 2)')
+    pool = basic.worker_pool.pool
+    result, error = basic.run('<test>', 'function triple(x) -> x * 3\nparallel_map(triple, [1, 2], 2)')
+    assert basic.worker_pool.pool is pool
+  finally:
+    basic.worker_pool.close()
+  assert error is None
+  assert [number.value for number in result.elements[-1].elements] == [3, 6]
+
+#######################################
+# MODULES
+#######################################
+
+MODULE = '''
+initiate secret = 42
+function reveal() -> secret
+'''
+
+def test_module_names_come_before_the_importers(tmp_path, monkeypatch):
+  # The importer binding the same name must not change what the
+  # module's functions see
+  (tmp_path / ('secretmod' + basic.MODULE_EXTENSION)).write_text(MODULE)
+  monkeypatch.chdir(tmp_path)
+
+  text = '''
+import { reveal } from "secretmod"
+initiate secret = 7
+function wrap()
+  initiate secret = 99
+  release reveal()
+END
+[reveal(), wrap(), secret]
+'''
+  for use_vm in (False, True):
+    basic.module_registry.clear()
+    try:
+      result, error = basic.run('<test>', text, use_vm)
+    finally:
+      basic.module_registry.clear()
+      for name in ('reveal', 'secret', 'wrap'):
+        basic.global_symbol_table.remove(name)
+    assert error is None
+    assert [number.value for number in result.elements[-1].elements] == [42, 42, 7]
+
+#######################################
+# AWAKE
+#######################################
+
+TASK_SCRIPT = '''
+async function task()
+  release 1
+END
+function finish(value) -> append(finished, value)
+run_async(task(), finish)
+'''
+
+def test_awake_leaves_queued_tasks_to_the_end_of_the_program(tmp_path):
+  # The awoken script's task must not run while the caller is still going
+  script = tmp_path / 'script.jhay'
+  script.write_text(TASK_SCRIPT)
+
+  text = f'''
+initiate finished = []
+awake("{script}")
+len(finished)
+'''
+  for use_vm in (False, True):
+    try:
+      result, error = basic.run('<test>', text, use_vm)
+      finished = basic.global_symbol_table.get('finished')
+    finally:
+      for name in ('finished', 'task', 'finish'):
+        basic.global_symbol_table.remove(name)
+    assert error is None
+    assert result.elements[-1].value == 0
+    assert [number.value for number in finished.elements] == [1]
+
+def test_awake_runs_the_script_the_way_the_caller_runs(tmp_path, monkeypatch):
+  script = tmp_path / 'script.jhay'
+  script.write_text('1 + 2')
+  parse, execute_program = basic.parse_cache.parse, basic.execute_program
+  runs = []
+
+  def recording_parse(fn, text, optimize=False):
+    runs.append(('optimize', optimize))
+    return parse(fn, text, optimize)
+
+  def recording_execute_program(node, use_vm):
+    runs.append(('use_vm', use_vm))
+    return execute_program(node, use_vm)
+
+  monkeypatch.setattr(basic.parse_cache, 'parse', recording_parse)
+  monkeypatch.setattr(basic, 'execute_program', recording_execute_program)
+
+  for use_vm, optimize in ((False, False), (True, True)):
+    runs.clear()
+    _, error = basic.run('<test>', f'awake("{script}")', use_vm, optimize)
+    assert error is None
+    # The program, then the script it wakes
+    assert runs == [('optimize', optimize), ('use_vm', use_vm)] * 2
+
+#######################################
+# CACHED TREES
+#######################################
+
+# Without uids (Windows) there is no ownership to check
+posix_only = pytest.mark.skipif(not hasattr(os, 'getuid'), reason='needs file ownership')
+
+@posix_only
+def test_parse_cache_ignores_a_directory_others_can_write(tmp_path):
+  directory = tmp_path / 'cache'
+  cache = basic.ParseCache(directory=str(directory))
+  cache.parse('<test>', '1 + 2')
+  assert len(list(directory.iterdir())) == 1
+
+  assert basic.ParseCache(directory=str(directory)).load(cache.key('<test>', '1 + 2')) is not None
+  directory.chmod(0o777)
+  assert basic.ParseCache(directory=str(directory)).load(cache.key('<test>', '1 + 2')) is None
+
+@posix_only
+def test_compiled_scripts_others_can_write_are_ignored(tmp_path):
+  script = tmp_path / 'script.jhay'
+  script.write_text('1 + 2')
+  basic.compile_file(str(script))
+  compiled = tmp_path / 'script.jhayc'
+  assert compiled.stat().st_mode & 0o022 == 0
+
+  assert basic.load_compiled(str(script)) is not None
+  compiled.chmod(0o666)
+  assert basic.load_compiled(str(script)) is None